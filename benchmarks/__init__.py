@@ -0,0 +1,3 @@
+"""
+Benchmarks for modern-urwid, run with ``hatch run bench:run``
+"""
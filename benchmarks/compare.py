@@ -0,0 +1,49 @@
+"""
+Compares two benchmark result files
+
+Usage: ``python -m benchmarks.compare base.json new.json``
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any
+
+
+def compare(base: dict[str, Any], new: dict[str, Any]) -> dict[str, dict[str, float]]:
+    """Get the ratio of the new median time and peak memory to the base ones
+
+    :return: Ratios keyed by benchmark name. Values below 1 are improvements
+    :rtype: dict[str, dict[str, float]]
+    """
+    ratios = {}
+    for name, result in new["results"].items():
+        if (previous := base["results"].get(name)) is None:
+            continue
+        ratios[name] = {
+            "median": result["median"] / previous["median"],
+            "peak_memory": result["peak_memory"] / max(previous["peak_memory"], 1),
+        }
+    return ratios
+
+
+def main(argv: Any = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    args = parser.parse_args(argv)
+
+    base = json.loads(args.base.read_text())
+    new = json.loads(args.new.read_text())
+    if base["params"] != new["params"]:
+        print("warning: the results were generated with different layout parameters")
+
+    print(f"{base.get('commit') or args.base} -> {new.get('commit') or args.new}")
+    for name, ratio in compare(base, new).items():
+        print(
+            f"{name:<18} time x{ratio['median']:.3f}   memory x{ratio['peak_memory']:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
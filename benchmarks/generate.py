@@ -0,0 +1,177 @@
+"""
+Generates synthetic layouts and stylesheets for benchmarking
+"""
+
+from pathlib import Path
+
+COLORS = ["light red", "dark blue", "yellow", "light gray", "dark green", "white"]
+
+DATA_MODULE = '''\
+from modern_urwid import Controller
+
+title = "Benchmark"
+count = 42
+
+
+def on_click(node, ctx, *args):
+    pass
+
+
+def on_change(node, ctx, *args):
+    pass
+'''
+
+CONTROLLER = '''
+
+class {cls}(Controller):
+    name = "{name}"
+'''
+
+
+class LayoutParams:
+    """Shape of a generated layout
+
+    :param depth: The number of nested container levels
+    :type depth: int
+    :param breadth: The number of children of each container
+    :type breadth: int
+    :param classes: The number of distinct classes to spread over elements
+    :type classes: int
+    :param ids: Whether to give every element an ID
+    :type ids: bool
+    :param selectors: The number of rules in the generated stylesheet
+    :type selectors: int
+    :param templates: Whether leaves use template attributes
+    :type templates: bool
+    :param signals: Whether leaves are bound to callbacks
+    :type signals: bool
+    """
+
+    def __init__(
+        self,
+        depth: int = 3,
+        breadth: int = 4,
+        classes: int = 8,
+        ids: bool = True,
+        selectors: int = 50,
+        templates: bool = True,
+        signals: bool = True,
+    ):
+        self.depth = depth
+        self.breadth = breadth
+        self.classes = classes
+        self.ids = ids
+        self.selectors = selectors
+        self.templates = templates
+        self.signals = signals
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+def generate_stylesheet(params: LayoutParams) -> str:
+    """Generate a stylesheet with ``params.selectors`` rules
+
+    :rtype: str
+    """
+    rules = []
+    for i in range(params.selectors):
+        color = COLORS[i % len(COLORS)]
+        background = COLORS[(i + 3) % len(COLORS)]
+        kind = i % 4
+        if kind == 0:
+            selector = f".c{i % max(params.classes, 1)}"
+        elif kind == 1:
+            selector = f"#n{i}"
+        elif kind == 2:
+            selector = ["pile", "columns", "text", "button"][i % 4]
+        else:
+            selector = f".c{i % max(params.classes, 1)}:focus"
+        rules.append(f"{selector} {{\n    color: {color};\n    background: {background};\n}}")
+    return "\n\n".join(rules) + "\n"
+
+
+def generate_layout(params: LayoutParams, name: str = "main") -> str:
+    """Generate an XML layout
+
+    :param params: The shape of the layout
+    :type params: LayoutParams
+    :param name: The name the layout is registered under, used for its controller
+    :type name: str
+    :rtype: str
+    """
+    counter = 0
+
+    def attrs() -> str:
+        nonlocal counter
+        counter += 1
+        result = f' mu:class="c{counter % max(params.classes, 1)}"'
+        if params.ids:
+            result += f' mu:id="n{counter}"'
+        return result
+
+    def leaf(index: int) -> str:
+        label = "{data.title} #{data.count}" if params.templates else "Item"
+        if index % 2 == 0:
+            callback = ' on_press="@data.on_click"' if params.signals else ""
+            return f'<button{attrs()} label="{label}"{callback} />'
+        signal = (
+            '<mu:signal name="change" callback="@data.on_change" />'
+            if params.signals
+            else ""
+        )
+        return f'<edit{attrs()} caption="{label}: ">{signal}</edit>'
+
+    def container(level: int) -> str:
+        tag = "pile" if level % 2 == 0 else "columns"
+        if level >= params.depth:
+            children = "".join(leaf(i) for i in range(params.breadth))
+        else:
+            children = "".join(container(level + 1) for _ in range(params.breadth))
+        return f"<{tag}{attrs()}>{children}</{tag}>"
+
+    return (
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        "<mu:resources>"
+        '<mu:python path="data.py" />'
+        '<mu:stylesheet path="styles.css" />'
+        "</mu:resources>"
+        f'<mu:layout controller="@data.{get_controller_name(name)}" />'
+        f"{container(1)}"
+        "</pile>\n"
+    )
+
+
+def get_controller_name(name: str) -> str:
+    return f"{name.capitalize()}Controller"
+
+
+def write_layouts(
+    directory: Path, params: LayoutParams, names: tuple[str, ...] = ("main",)
+) -> dict[str, Path]:
+    """Write generated layouts, their stylesheet and their Python module to a directory
+
+    :param directory: The directory to write to
+    :type directory: pathlib.Path
+    :param params: The shape of the layouts
+    :type params: LayoutParams
+    :param names: The names to register the layouts under, also used as file names
+    :type names: tuple[str, ...]
+    :return: The path to each layout file, keyed by name
+    :rtype: dict[str, pathlib.Path]
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "data.py").write_text(
+        DATA_MODULE
+        + "".join(
+            CONTROLLER.format(cls=get_controller_name(name), name=name)
+            for name in names
+        )
+    )
+    (directory / "styles.css").write_text(generate_stylesheet(params))
+
+    paths = {}
+    for name in names:
+        paths[name] = directory / f"{name}.xml"
+        paths[name].write_text(generate_layout(params, name))
+    return paths
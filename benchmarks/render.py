@@ -0,0 +1,242 @@
+"""
+Times drawing and input handling of compiled layouts without a terminal
+
+Usage: ``python -m benchmarks.render --depth 3 --breadth 4 --keys "down*10,right*5" --output render.json``
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Union
+
+import urwid
+from urwid.display.html_fragment import HtmlGenerator
+
+from modern_urwid import CompileContext, LifecycleManager
+from modern_urwid.__about__ import VERSION
+
+from .generate import LayoutParams, write_layouts
+from .suite import get_commit
+
+DEFAULT_SIZES = [(80, 24), (120, 40), (200, 60)]
+DEFAULT_KEYS = ["down"] * 10 + ["right"] * 5 + ["a", "b", "backspace"] + ["up"] * 10
+
+
+def parse_keys(value: str) -> list[str]:
+    """Parse a key script such as ``down*10,tab,enter``
+
+    :rtype: list[str]
+    """
+    keys = []
+    for item in value.split(","):
+        key, _, amount = item.strip().partition("*")
+        keys.extend([key] * (int(amount) if amount else 1))
+    return keys
+
+
+def summarize(times: list[float]) -> dict[str, float]:
+    ordered = sorted(times)
+    return {
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+class CacheStats:
+    """Counts :class:`urwid.CanvasCache` fetches and hits while it is active"""
+
+    def __enter__(self) -> "CacheStats":
+        self.hits = urwid.CanvasCache.hits
+        self.fetches = urwid.CanvasCache.fetches
+        return self
+
+    def __exit__(self, *exc_info):
+        self.hits = urwid.CanvasCache.hits - self.hits
+        self.fetches = urwid.CanvasCache.fetches - self.fetches
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.fetches if self.fetches else 0.0
+
+
+class FrameScreen(HtmlGenerator):
+    """A screen of a fixed size that draws frames without a terminal
+
+    Every frame is converted to an HTML fragment, which reads each row of the canvas
+    and looks up its attributes in the registered palette like a terminal screen
+    would. Like a terminal screen, the last canvas is kept alive.
+    """
+
+    def __init__(self, cols: int, rows: int):
+        super().__init__()
+        self.size = (cols, rows)
+        self.canvas: Union[urwid.Canvas, None] = None
+
+    def get_cols_rows(self) -> tuple[int, int]:
+        return self.size
+
+    def draw_screen(self, size: tuple[int, int], canvas: urwid.Canvas):
+        super().draw_screen(size, canvas)
+        self.fragments.clear()
+        self.canvas = canvas
+
+
+def render_frames(loop: urwid.MainLoop, frames: int) -> list[float]:
+    """Time drawing the screen repeatedly. The first frame is drawn with an empty canvas cache
+
+    :return: The time of each frame, in seconds
+    :rtype: list[float]
+    """
+    urwid.CanvasCache.clear()
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        loop.draw_screen()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def replay_keys(loop: urwid.MainLoop, keys: list[str]) -> list[float]:
+    """Time the handling of each key, up to the next drawn screen
+
+    :return: The keypress to screen latency of each key, in seconds
+    :rtype: list[float]
+    """
+    times = []
+    loop.draw_screen()
+    for key in keys:
+        start = time.perf_counter()
+        loop.process_input([key])
+        loop.draw_screen()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_render(
+    target: Union[urwid.Widget, LifecycleManager],
+    sizes: list[tuple[int, int]] = DEFAULT_SIZES,
+    keys: list[str] = DEFAULT_KEYS,
+    frames: int = 20,
+    palette: Union[list[tuple], None] = None,
+) -> dict[str, Any]:
+    """Draw a widget (or a manager's current layout) at several sizes and replay keys on it
+
+    Frames are drawn and keys are processed by a MainLoop with a :class:`FrameScreen`.
+    A manager's own MainLoop is used, so unhandled keys reach
+    :meth:`~modern_urwid.lifecycle.manager.LifecycleManager.on_unhandled_input`.
+
+    :param target: The widget or manager to benchmark
+    :type target: urwid.Widget | LifecycleManager
+    :param sizes: The terminal sizes to render at, as (columns, rows)
+    :type sizes: list[tuple[int, int]]
+    :param keys: The keys to replay at every size
+    :type keys: list[str]
+    :param frames: The number of frames to draw without input at every size
+    :type frames: int
+    :param palette: The palette of a widget target. A manager's palette is read from its
+        style registry
+    :type palette: list[tuple], optional
+    :return: Frame times, keypress latencies and canvas cache hit rates, keyed by size
+    :rtype: dict[str, typing.Any]
+    """
+    if isinstance(target, LifecycleManager):
+        loop = target.loop
+        palette = target.context.style_registry.get_palettes()
+    else:
+        loop = urwid.MainLoop(target, screen=FrameScreen(0, 0))
+
+    screen, widget = loop.screen, loop.widget
+    # the topmost widget of a MainLoop is drawn at the screen size
+    if urwid.BOX not in widget.sizing():
+        loop.widget = urwid.Filler(widget, "top")
+    results = {}
+    try:
+        for cols, rows in sizes:
+            loop.screen = FrameScreen(cols, rows)
+            loop.screen.register_palette(palette or [])
+            loop.screen_size = None
+
+            with CacheStats() as frame_cache:
+                frame_times = render_frames(loop, frames)
+            with CacheStats() as key_cache:
+                key_times = replay_keys(loop, keys) if keys else []
+
+            results[f"{cols}x{rows}"] = {
+                "first_frame": frame_times[0],
+                "frames": summarize(frame_times[1:] or frame_times),
+                "frame_cache_hit_rate": frame_cache.hit_rate,
+                "keypress": summarize(key_times) if key_times else None,
+                "keypress_cache_hit_rate": key_cache.hit_rate,
+            }
+    finally:
+        loop.screen = screen
+        loop.screen_size = None
+        if isinstance(loop.widget, urwid.Filler) and loop.widget.original_widget is widget:
+            loop.widget = widget
+    return results
+
+
+def main(argv: Any = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--breadth", type=int, default=4)
+    parser.add_argument("--selectors", type=int, default=50)
+    parser.add_argument(
+        "--sizes",
+        default=",".join(f"{cols}x{rows}" for cols, rows in DEFAULT_SIZES),
+        help="comma separated terminal sizes, e.g. 80x24,200x60",
+    )
+    parser.add_argument("--keys", help="key script, e.g. down*10,tab,enter")
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    sizes = [
+        tuple(int(value) for value in size.split("x")) for size in args.sizes.split(",")
+    ]
+    keys = parse_keys(args.keys) if args.keys else DEFAULT_KEYS
+    params = LayoutParams(
+        depth=args.depth, breadth=args.breadth, selectors=args.selectors
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_layouts(Path(tmp), params)
+        manager = LifecycleManager(
+            CompileContext(Path(tmp)), urwid.MainLoop(urwid.Text(""))
+        )
+        manager.register(paths["main"], "main")
+        manager.switch("main")
+        results = {
+            "version": VERSION,
+            "commit": get_commit(),
+            "python": platform.python_version(),
+            "params": params.to_dict(),
+            "keys": keys,
+            "results": run_render(manager, sizes, keys, args.frames),  # type: ignore[arg-type]
+        }
+
+    for size, result in results["results"].items():
+        keypress = result["keypress"]
+        print(
+            f"{size:<9} first frame {result['first_frame'] * 1000:8.2f} ms"
+            f"   frame {result['frames']['median'] * 1000:8.3f} ms"
+            f"   keypress {keypress['median'] * 1000 if keypress else 0:8.3f} ms"
+            f"   cache hits {result['keypress_cache_hit_rate']:6.1%}",
+            file=sys.stderr,
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Times the compiler and lifecycle manager on generated layouts
+
+Usage: ``python -m benchmarks.suite --depth 4 --breadth 4 --output results.json``
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+import urwid
+
+from modern_urwid import CompileContext, LifecycleManager, compile_widget
+from modern_urwid.__about__ import VERSION
+from modern_urwid.style.css_parser import parse_stylesheet
+
+from .generate import LayoutParams, write_layouts
+
+
+def measure(
+    fn: Callable[[Any], Any],
+    repeat: int,
+    setup: Callable[[], Any] = lambda: None,
+) -> dict[str, Any]:
+    """Time a function and record its peak memory use
+
+    ``setup`` is called before every run and is not timed. Its result is passed to ``fn``.
+
+    :return: The run times in seconds, their minimum and median, and the peak memory in bytes
+    :rtype: dict[str, typing.Any]
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        fn(state)
+        times.append(time.perf_counter() - start)
+
+    # measured separately, since tracing slows down the timed runs
+    state = setup()
+    tracemalloc.start()
+    fn(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "peak_memory": peak,
+    }
+
+
+def make_manager(directory: Path) -> LifecycleManager:
+    return LifecycleManager(
+        CompileContext(directory), urwid.MainLoop(urwid.Text(""))
+    )
+
+
+def run_suite(params: LayoutParams, repeat: int = 5) -> dict[str, Any]:
+    """Run all benchmarks on a layout generated from ``params``
+
+    :return: Results keyed by benchmark name
+    :rtype: dict[str, typing.Any]
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        paths = write_layouts(directory, params, ("main", "other"))
+        layout = paths["main"]
+
+        def register(manager: LifecycleManager):
+            manager.register(layout, "main")
+
+        def register_all(manager: LifecycleManager):
+            manager.register(layout, "main")
+            manager.register(paths["other"], "other")
+
+        def register_many(manager: LifecycleManager):
+            manager.register_many({"main": layout, "other": paths["other"]})
+
+        def switch(manager: LifecycleManager):
+            manager.switch("main")
+            manager.switch("other")
+
+        def switch_setup() -> LifecycleManager:
+            manager = make_manager(directory)
+            manager.register(layout, "main")
+            manager.register(paths["other"], "other")
+            return manager
+
+        def lazy_setup() -> LifecycleManager:
+            manager = make_manager(directory)
+            manager.register(layout, "main", lazy=True)
+            manager.register(paths["other"], "other", lazy=True)
+            return manager
+
+        return {
+            "parse_stylesheet": measure(
+                lambda _: parse_stylesheet(directory / "styles.css"), repeat
+            ),
+            "compile_widget": measure(
+                lambda _: compile_widget(layout, CompileContext(directory)), repeat
+            ),
+            "register": measure(register, repeat, lambda: make_manager(directory)),
+            "register_all": measure(
+                register_all, repeat, lambda: make_manager(directory)
+            ),
+            "register_many": measure(
+                register_many, repeat, lambda: make_manager(directory)
+            ),
+            "switch": measure(switch, repeat, switch_setup),
+            "switch_lazy": measure(switch, repeat, lazy_setup),
+        }
+
+
+def get_commit() -> Any:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Any = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--breadth", type=int, default=4)
+    parser.add_argument("--classes", type=int, default=8)
+    parser.add_argument("--no-ids", action="store_true")
+    parser.add_argument("--selectors", type=int, default=50)
+    parser.add_argument("--no-templates", action="store_true")
+    parser.add_argument("--no-signals", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    params = LayoutParams(
+        depth=args.depth,
+        breadth=args.breadth,
+        classes=args.classes,
+        ids=not args.no_ids,
+        selectors=args.selectors,
+        templates=not args.no_templates,
+        signals=not args.no_signals,
+    )
+    results = {
+        "version": VERSION,
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "params": params.to_dict(),
+        "repeat": args.repeat,
+        "results": run_suite(params, args.repeat),
+    }
+
+    for name, result in results["results"].items():
+        print(
+            f"{name:<18} min {result['min'] * 1000:9.2f} ms"
+            f"   median {result['median'] * 1000:9.2f} ms"
+            f"   peak {result['peak_memory'] / 1024:9.1f} KiB",
+            file=sys.stderr,
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,47 @@
-from .compiler import compile_widget, parse_xml_layout
-from .constants import RESOURCE_CHAR, XML_NS
-from .context import CompileContext
-from .decorators import assign_widget
-from .exceptions import InvalidTemplate, UnknownModule
-from .lifecycle.controller import Controller
-from .lifecycle.manager import LifecycleManager
-from .resource.registry import ModuleRegistry
-from .style.registry import StyleRegistry
-from .widgets.builder import WidgetBuilder
-from .widgets.registry import WidgetRegistry
-from .xml.ast import LayoutNode
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .compiler import LayoutPlan, compile_plan, compile_widget, parse_xml_layout
+    from .constants import RESOURCE_CHAR, XML_NS
+    from .context import CompileContext
+    from .decorators import assign_widget
+    from .exceptions import InvalidTemplate, UnknownModule
+    from .lifecycle.controller import Controller
+    from .lifecycle.manager import LifecycleManager
+    from .resource.registry import ModuleRegistry
+    from .stats import CompileStats
+    from .store import DataStore
+    from .style.registry import StyleRegistry
+    from .widgets.builder import WidgetBuilder
+    from .widgets.registry import WidgetRegistry
+    from .xml.ast import LayoutNode
+    from .xml.cache import LayoutCache
+
+# the submodule each name is imported from on first access, so importing the
+# package stays cheap for programs that only use part of it
+_EXPORTS = {
+    "LayoutPlan": ".compiler",
+    "compile_plan": ".compiler",
+    "compile_widget": ".compiler",
+    "parse_xml_layout": ".compiler",
+    "RESOURCE_CHAR": ".constants",
+    "XML_NS": ".constants",
+    "CompileContext": ".context",
+    "assign_widget": ".decorators",
+    "InvalidTemplate": ".exceptions",
+    "UnknownModule": ".exceptions",
+    "Controller": ".lifecycle.controller",
+    "LifecycleManager": ".lifecycle.manager",
+    "ModuleRegistry": ".resource.registry",
+    "CompileStats": ".stats",
+    "DataStore": ".store",
+    "StyleRegistry": ".style.registry",
+    "WidgetBuilder": ".widgets.builder",
+    "WidgetRegistry": ".widgets.registry",
+    "LayoutNode": ".xml.ast",
+    "LayoutCache": ".xml.cache",
+}
 
 __all__ = [
     "XML_NS",
@@ -20,11 +52,28 @@ __all__ = [
     "UnknownModule",
     "InvalidTemplate",
     "CompileContext",
+    "CompileStats",
+    "DataStore",
     "ModuleRegistry",
     "StyleRegistry",
     "WidgetRegistry",
     "LayoutNode",
+    "LayoutCache",
+    "LayoutPlan",
     "assign_widget",
+    "compile_plan",
     "compile_widget",
     "parse_xml_layout",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if (module := _EXPORTS.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
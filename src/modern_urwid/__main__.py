@@ -0,0 +1,77 @@
+"""
+Command line interface
+
+``python -m modern_urwid compile layout.xml -o build/`` writes ``build/layout.py``
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Union
+
+
+def compile_command(args: argparse.Namespace) -> int:
+    from modern_urwid.aot.codegen import check_module, compile_module, load_module
+    from modern_urwid.context import CompileContext
+
+    status = 0
+    for layout in args.layouts:
+        layout = Path(layout)
+        base_dir = Path(args.base_dir) if args.base_dir else layout.parent
+        output = Path(args.output) / f"{layout.stem}.py"
+        compile_module(layout, output, CompileContext(base_dir), args.stylesheet)
+        print(f"{layout} -> {output}")
+
+        if args.check:
+            contexts = []
+            for _ in range(2):
+                context = CompileContext(base_dir)
+                for stylesheet in args.stylesheet:
+                    context.style_registry.load_stylesheet(Path(stylesheet))
+                contexts.append(context)
+            difference = check_module(layout, load_module(output), *contexts)
+            if difference is not None:
+                print(
+                    f"{output} does not match {layout}: {difference}", file=sys.stderr
+                )
+                status = 1
+    return status
+
+
+def main(argv: Union[list[str], None] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m modern_urwid")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = subparsers.add_parser(
+        "compile", help="compile layouts into Python modules that build their widgets"
+    )
+    compile_parser.add_argument(
+        "layouts", nargs="+", help="the layout files to compile"
+    )
+    compile_parser.add_argument(
+        "-o", "--output", default=".", help="the directory to write the modules to"
+    )
+    compile_parser.add_argument(
+        "-s",
+        "--stylesheet",
+        action="append",
+        default=[],
+        help="a stylesheet to apply to every layout (may be repeated)",
+    )
+    compile_parser.add_argument(
+        "--base-dir",
+        help="the directory resources are resolved from (defaults to the layout's directory)",
+    )
+    compile_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="check that each module builds the same widgets as compile_widget",
+    )
+    compile_parser.set_defaults(func=compile_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
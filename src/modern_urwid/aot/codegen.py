@@ -0,0 +1,479 @@
+"""
+Ahead-of-time compilation of layouts into plain Python modules
+
+The generated module constructs the urwid widget tree directly. Styles are matched,
+and palette names, sizing options and widget classes are looked up, when the module
+is generated. Resources and templates are still resolved when the widgets are built,
+so they read the current values of their modules.
+"""
+
+import importlib.util
+import keyword
+import os
+from itertools import count
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Union
+
+import urwid
+
+from modern_urwid.compiler import NodePlan, compile_plan
+from modern_urwid.context import CompileContext
+from modern_urwid.exceptions import UnsupportedFeature
+from modern_urwid.resource.dummies import UnresolvedResource, UnresolvedTemplate
+from modern_urwid.style.record import StyleRecord
+from modern_urwid.widgets.builder import WidgetBuilder
+from modern_urwid.widgets.builders import GenericWidgetBuilder, ListBoxBuilder
+
+HEADER = '''"""
+Generated by ``python -m modern_urwid compile`` from {source}. Do not edit.
+"""
+
+from pathlib import Path
+
+import urwid
+
+{imports}
+BASE_DIR = (Path(__file__).parent / {base_dir!r}).resolve()
+
+PALETTE = {palette}
+
+IDS = {ids}
+
+
+def build(context=None):
+    """Build the widget tree
+
+    :param context: The compile context to build with. A new one is created if not provided
+    :type context: modern_urwid.CompileContext, optional
+    :return: The root widget, and a dictionary mapping widgets to their ``mu:id``
+    :rtype: tuple[urwid.Widget, dict[str, urwid.Widget]]
+    """
+    rt = Runtime(BASE_DIR, PALETTE, context)
+    P = rt.palette
+    mapped = rt.mapped
+'''
+
+
+def literal(value: Any) -> str:
+    """Get the Python source for an attribute value"""
+    if isinstance(value, UnresolvedResource):
+        return f"UnresolvedResource({value.path!r})"
+    elif isinstance(value, UnresolvedTemplate):
+        return f"UnresolvedTemplate({value.value!r})"
+    elif isinstance(value, dict):
+        items = ", ".join(f"{literal(k)}: {literal(v)}" for k, v in value.items())
+        return f"{{{items}}}"
+    elif isinstance(value, list):
+        return f"[{', '.join(literal(item) for item in value)}]"
+    elif isinstance(value, (str, int, float, bool, type(None))):
+        return repr(value)
+    raise UnsupportedFeature(f"Can not write {value!r} as Python source")
+
+
+def get_kwargs(kwargs: dict[str, str]) -> str:
+    """Get the Python source for keyword arguments, given the source of each value"""
+    args = []
+    extra = []
+    for name, source in kwargs.items():
+        if name.isidentifier() and not keyword.iskeyword(name):
+            args.append(f"{name}={source}")
+        else:
+            extra.append(f"{name!r}: {source}")
+    if extra:
+        args.append(f"**{{{', '.join(extra)}}}")
+    return ", ".join(args)
+
+
+class ModuleWriter:
+    """Writes the source of a generated module for a planned layout
+
+    :param context: The context the layout was planned with
+    :type context: CompileContext
+    """
+
+    def __init__(self, context: CompileContext):
+        self.context = context
+        self.setup: list[str] = []
+        self.lines: list[str] = []
+        self.ids: list[str] = []
+        self._counter = count()
+
+    def emit(self, line: str, lines: Union[list[str], None] = None):
+        (self.lines if lines is None else lines).append(f"    {line}")
+
+    def write_resources(self, plan: NodePlan):
+        """Import the modules listed by a node's metadata when the widgets are built"""
+        resources = plan.meta["resources"]
+        for tag in resources.get("python", []):
+            kwargs = {
+                "module": literal(tag.get("module")),
+                "path": literal(tag.get("path")),
+                "alias": literal(tag.get("as")),
+            }
+            line = f"rt.import_python({get_kwargs(kwargs)})"
+            if f"    {line}" not in self.setup:
+                self.emit(line, self.setup)
+        for tag in resources.get("widget", []):
+            kwargs = {
+                "module": literal(tag.get("module")),
+                "path": literal(tag.get("path")),
+                "namespace": literal(tag.get("namespace")),
+            }
+            line = f"rt.import_widgets({get_kwargs(kwargs)})"
+            if f"    {line}" not in self.setup:
+                self.emit(line, self.setup)
+
+    def get_value(self, node_var: str, value: Any) -> str:
+        """Get the source for an attribute value, resolving resources and templates at build time"""
+        if isinstance(value, (UnresolvedResource, UnresolvedTemplate)):
+            return f"rt.resolve({node_var}, {literal(value)})"
+        return literal(value)
+
+    def get_meta(self, plan: NodePlan) -> str:
+        """Get the source for a node's metadata, as passed to its parent's builder"""
+        if not any(plan.meta.values()):
+            return "EMPTY_META"
+        return literal(plan.meta)
+
+    def get_class(self, cls: type, tag: str) -> str:
+        """Get the source for a widget class"""
+        if getattr(urwid, cls.__name__, None) is cls:
+            return f"urwid.{cls.__name__}"
+        return f"rt.widget_class({tag!r})"
+
+    def write_node(self, plan: NodePlan, parent: Union[str, None] = None) -> str:
+        """Write the statements that create a node's widget
+
+        :param plan: The plan of the node
+        :type plan: NodePlan
+        :param parent: The variable holding the parent's AST node
+        :type parent: str, optional
+        :raises UnsupportedFeature: Raises if the node can not be compiled ahead of time
+        :return: The variable holding the finished widget
+        :rtype: str
+        """
+        node = plan.node
+        if plan.repeat is not None:
+            raise UnsupportedFeature(
+                f"<{node.tag}>: mu:for can not be compiled ahead of time"
+            )
+        if plan.bindings:
+            raise UnsupportedFeature(
+                f"<{node.tag}>: attributes bound to the data store can not be compiled ahead of time"
+            )
+
+        i = next(self._counter)
+        n, w, a = f"n{i}", f"w{i}", f"a{i}"
+        self.write_resources(plan)
+        self.emit(
+            f"{n} = rt.node({node.tag!r}, {node.text!r}, {literal(node.attrs)}, "
+            f"{literal(node.meta_attrs)}, {parent})"
+        )
+        kwargs = {k: self.get_value(n, v) for k, v in node.attrs.items()}
+
+        # build base widget
+        builder_cls = plan.builder_cls
+        custom = builder_cls not in (GenericWidgetBuilder, ListBoxBuilder)
+        if builder_cls is GenericWidgetBuilder:
+            self.write_generic(plan, w, kwargs)
+        elif builder_cls is ListBoxBuilder:
+            if node.get_meta_attr("lazy") is True:
+                raise UnsupportedFeature(
+                    f"<{node.tag}>: mu:lazy can not be compiled ahead of time"
+                )
+            if "body" not in kwargs:
+                kwargs = {"body": "urwid.SimpleFocusListWalker([])", **kwargs}
+            self.emit(f"{w} = urwid.ListBox({get_kwargs(kwargs)})")
+        else:
+            if (
+                node.children
+                and builder_cls.attach_lazy_children
+                is not WidgetBuilder.attach_lazy_children
+            ):
+                raise UnsupportedFeature(
+                    f"<{node.tag}>: lazy children can not be compiled ahead of time"
+                )
+            name = f"{builder_cls.__module__}.{builder_cls.__qualname__}"
+            self.emit(f"b{i} = rt.builder({n}, {name!r})")
+            self.emit(f"{w} = b{i}.build()")
+
+        for signal, resource, _ in plan.signals:
+            self.emit(
+                f"urwid.connect_signal({w}, {signal!r}, "
+                f"rt.resolve({n}, {literal(resource)}))"
+            )
+
+        if plan.id is not None:
+            if plan.id in self.ids:
+                raise ValueError(f"Cannot duplicate IDs: {plan.id}")
+            self.ids.append(plan.id)
+            self.emit(f"mapped[{plan.id!r}] = {w}")
+
+        palette = f"P[{plan.palette!r}]" if plan.palette else "None"
+        focus = f"P[{plan.focus_palette!r}]" if plan.focus_palette else "None"
+        self.emit(f"{a} = urwid.AttrMap({w}, {palette}, {focus})")
+
+        # children, as (widget, sizing options, metadata) like NodePlan.instantiate
+        children = []
+        for child in node.children:
+            child_plan = plan.get_child(self.context, child)
+            sizing = child_plan.sizing
+            children.append(
+                f"({self.write_node(child_plan, n)}, "
+                f"SizeOptions({sizing.wh_type!r}, {sizing.wh_amount!r}), "
+                f"{self.get_meta(child_plan)})"
+            )
+        c = f"c{i}" if children else "[]"
+        if children:
+            self.emit(f"{c} = [{', '.join(children)}]")
+            if custom:
+                self.emit(f"b{i}.attach_children({w}, {c})")
+            elif builder_cls is ListBoxBuilder:
+                self.emit(f"{w}.body.extend([child for child, _, _ in {c}])")
+            else:
+                self.emit(f"set_children({w}, {c})")
+
+        # handle mu:selectable override
+        if isinstance(selectable := node.meta_attrs.get("selectable"), bool):
+            self.emit(f"set_selectable({w}, {selectable!r}, {c})")
+
+        if custom:
+            self.emit(f"{a} = b{i}.after_build({a})")
+        return a
+
+    def write_generic(self, plan: NodePlan, w: str, kwargs: dict[str, str]):
+        """Write the widget creation of :class:`~modern_urwid.widgets.builders.GenericWidgetBuilder`,
+        with the widget class and build strategy looked up ahead of time"""
+        node = plan.node
+        entry = self.context.widget_registry.tag_index.get(node.tag)
+        if entry is None:
+            self.emit(f"{w} = missing_widget({node.tag!r})")
+            return
+
+        cls, strategy = entry
+        items = ", ".join(f"{k!r}: {v}" for k, v in kwargs.items())
+        self.emit(
+            f"{w} = create_widget({self.get_class(cls, node.tag)}, {strategy!r}, "
+            f"{node.text!r}, {{{items}}})"
+        )
+
+    def get_source(self, source: str, base_dir: str, root: str) -> str:
+        """Get the source of the generated module"""
+        palette = self.context.style_registry.get_palettes()
+        body = "\n".join([*self.setup, *self.lines])
+        runtime = "EMPTY_META, Runtime" if "EMPTY_META" in body else "Runtime"
+        imports = [f"from modern_urwid.aot.runtime import {runtime}\n"]
+        if helpers := [
+            name
+            for name in (
+                "create_widget",
+                "missing_widget",
+                "set_children",
+                "set_selectable",
+            )
+            if f"{name}(" in body
+        ]:
+            imports.append(
+                f"from modern_urwid.widgets.builders import {', '.join(helpers)}\n"
+            )
+        if dummies := [
+            name
+            for name in ("UnresolvedResource", "UnresolvedTemplate")
+            if f"{name}(" in body
+        ]:
+            imports.append(
+                f"from modern_urwid.resource.dummies import {', '.join(dummies)}\n"
+            )
+        if "SizeOptions(" in body:
+            imports.append(
+                "from modern_urwid.widgets.size_options import SizeOptions\n"
+            )
+        header = HEADER.format(
+            imports="".join(imports),
+            source=source,
+            base_dir=base_dir,
+            palette=repr(palette),
+            ids=repr(tuple(self.ids)),
+        )
+        return "\n".join(
+            [
+                header.rstrip("\n"),
+                body,
+                f"    rt.finish({root})",
+                f"    return {root}, mapped",
+                "",
+            ]
+        )
+
+
+def compile_module(
+    file_path: Union[Path, str],
+    output: Union[Path, str],
+    context: Union[CompileContext, None] = None,
+    stylesheets: list[Union[Path, str]] = [],
+) -> Path:
+    """Compile a layout into a Python module that builds its widgets without parsing it
+
+    The module exports ``PALETTE`` (the palette entries to register with the screen),
+    ``IDS`` (all ``mu:id`` values) and ``build(context=None)``, which returns the same
+    values as :func:`~modern_urwid.compiler.compile_widget`.
+
+    :param file_path: The file path to the layout file
+    :type file_path: pathlib.Path | str
+    :param output: The path of the module to write
+    :type output: pathlib.Path | str
+    :param context: The compile context to plan the layout with
+    :type context: CompileContext, optional
+    :param stylesheets: Extra stylesheets to apply to the layout
+    :type stylesheets: list[pathlib.Path | str], optional
+    :raises UnsupportedFeature: Raises if the layout uses features that need the
+        layout at runtime (``mu:for``, ``mu:lazy`` or data store bindings)
+    :return: The path of the written module
+    :rtype: pathlib.Path
+    """
+    file_path = Path(file_path)
+    output = Path(output)
+    if context is None:
+        context = CompileContext(file_path.parent)
+    for stylesheet in stylesheets:
+        context.style_registry.load_stylesheet(Path(stylesheet))
+
+    plan = compile_plan(file_path, context)
+    writer = ModuleWriter(context)
+    root = writer.write_node(plan.root)
+    base_dir = os.path.relpath(context.base_dir, output.resolve().parent)
+    source = writer.get_source(file_path.name, Path(base_dir).as_posix(), root)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(source)
+    return output
+
+
+def load_module(path: Union[Path, str]) -> ModuleType:
+    """Import a generated module from its path"""
+    path = Path(path)
+    spec = importlib.util.spec_from_file_location(path.stem, str(path))
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load module from path {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def describe_widget(widget: urwid.Widget, palettes: dict[str, StyleRecord]) -> tuple:
+    """Describe a widget tree as plain data, so trees built in different contexts
+    can be compared
+
+    :param widget: The root widget
+    :type widget: urwid.Widget
+    :param palettes: The palettes of the context the tree was built in, used to
+        compare styles instead of palette names
+    :type palettes: dict[str, StyleRecord]
+    :rtype: tuple
+    """
+    info: list[Any] = [type(widget).__name__, widget.selectable()]
+    signals = widget.__dict__.get("_urwid_signals", {})
+    info.append(tuple(sorted((name, len(cbs)) for name, cbs in signals.items() if cbs)))
+
+    if isinstance(widget, urwid.AttrMap):
+        info.append(palettes.get(widget.attr_map[None], widget.attr_map[None]))
+        focus = widget.focus_map[None] if widget.focus_map else None
+        info.append(palettes.get(focus, focus))
+    if isinstance(widget, urwid.Text):
+        info.append(widget.get_text())
+    if isinstance(widget, urwid.ProgressBar):
+        info.append((widget.current, widget.done, widget.normal, widget.complete))
+
+    if isinstance(widget, urwid.ListBox):
+        children = [describe_widget(child, palettes) for child in widget.body]
+    elif isinstance(widget, urwid.WidgetContainerMixin) and hasattr(widget, "contents"):
+        children = [
+            (describe_widget(child, palettes), options)
+            for child, options in widget.contents
+        ]
+    elif isinstance(widget, urwid.WidgetDecoration):
+        children = [describe_widget(widget.original_widget, palettes)]
+    elif isinstance(widget, urwid.WidgetWrap):
+        children = [describe_widget(widget._w, palettes)]
+    else:
+        children = []
+    info.append(tuple(children))
+    return tuple(info)
+
+
+def render_widget(
+    widget: urwid.Widget,
+    palettes: dict[str, StyleRecord],
+    size: tuple[int, int] = (80, 40),
+) -> list:
+    """Render a box widget, with palette names replaced by their styles"""
+    canvas = widget.render(size, focus=True)
+    return [
+        [(palettes.get(attr, attr), cs, text) for attr, cs, text in row]
+        for row in canvas.content()
+    ]
+
+
+def check_module(
+    file_path: Union[Path, str],
+    module: ModuleType,
+    context: Union[CompileContext, None] = None,
+    module_context: Union[CompileContext, None] = None,
+) -> Union[str, None]:
+    """Check that a generated module builds the same widget tree as
+    :func:`~modern_urwid.compiler.compile_widget`
+
+    :param file_path: The file path to the layout file the module was generated from
+    :type file_path: pathlib.Path | str
+    :param module: The generated module
+    :type module: types.ModuleType
+    :param context: The context to compile the layout with. Defaults to a new context
+    :type context: CompileContext, optional
+    :param module_context: The context to build the module with. Defaults to a new context
+    :type module_context: CompileContext, optional
+    :return: A description of the first difference, or ``None`` if the trees are identical
+    :rtype: str | None
+    """
+    from modern_urwid.compiler import compile_widget
+
+    file_path = Path(file_path)
+    if context is None:
+        context = CompileContext(file_path.parent)
+    if module_context is None:
+        module_context = CompileContext(file_path.parent)
+
+    expected, expected_ids = compile_widget(file_path, context)
+    actual, actual_ids = module.build(module_context)
+    expected_palettes = context.style_registry.palettes
+    actual_palettes = module_context.style_registry.palettes
+
+    # compile_widget only returns the IDs mapped before a nested layout is
+    # compiled (e.g. by a custom builder), the module returns all of them
+    if missing := set(expected_ids) - set(actual_ids):
+        return f"mu:id missing: {sorted(missing)}"
+    if difference := get_difference(
+        describe_widget(expected, expected_palettes),
+        describe_widget(actual, actual_palettes),
+    ):
+        return difference
+    if render_widget(expected, expected_palettes) != render_widget(
+        actual, actual_palettes
+    ):
+        return "the widget trees render differently"
+    return None
+
+
+def get_difference(expected: Any, actual: Any, path: str = "root") -> Union[str, None]:
+    """Find the first difference between two widget descriptions"""
+    if expected == actual:
+        return None
+    if (
+        isinstance(expected, tuple)
+        and isinstance(actual, tuple)
+        and len(expected) == len(actual)
+    ):
+        for index, (a, b) in enumerate(zip(expected, actual)):
+            if difference := get_difference(a, b, f"{path}[{index}]"):
+                return difference
+    return f"{path}: {expected!r} != {actual!r}"
@@ -0,0 +1,151 @@
+"""
+Helpers used by modules generated with ``python -m modern_urwid compile``
+
+This module does not import the XML or CSS parsers, so generated modules start
+without ``lxml``, ``cssselect2`` or ``tinycss2``.
+"""
+
+import uuid
+import weakref
+from pathlib import Path
+from typing import Any, Union
+
+from modern_urwid.context import CompileContext
+from modern_urwid.exceptions import UnknownTag
+from modern_urwid.resource.dummies import UnresolvedResource, UnresolvedTemplate
+from modern_urwid.style.record import StyleRecord
+from modern_urwid.widgets.builder import WidgetBuilder
+from modern_urwid.xml.ast import LayoutNode
+
+# the metadata of children without resources, signals or layout attributes
+EMPTY_META = {"resources": {}, "signals": [], "layout": {}}
+
+
+class Runtime:
+    """The state of a single ``build()`` call of a generated module
+
+    :param base_dir: The directory the layout was compiled from, used to resolve module paths
+    :type base_dir: pathlib.Path
+    :param palette: The palette entries of the layout, in urwid form
+    :type palette: list[tuple]
+    :param context: The compile context to build with. A new one is created if not provided
+    :type context: CompileContext, optional
+    """
+
+    def __init__(
+        self,
+        base_dir: Path,
+        palette: list[tuple],
+        context: Union[CompileContext, None] = None,
+    ):
+        if context is None:
+            context = CompileContext(base_dir)
+        self.context = context
+        self.key = uuid.uuid4().hex
+        context.add_local(self.key)
+        self.mapped = context.get_local(self.key).mapped_widgets
+
+        # the palette names are looked up again, in case the context already has styles
+        registry = context.style_registry
+        self.palette: dict[str, str] = {
+            name: registry.intern(StyleRecord(*style)) for name, *style in palette
+        }
+        registry.acquire(self.key, *self.palette.values())
+
+    def import_python(
+        self,
+        module: Union[str, None] = None,
+        path: Union[str, None] = None,
+        alias: Union[str, None] = None,
+    ):
+        """Import and register a module listed by a ``mu:python`` tag"""
+        file_path = self.context.resolve_path(path) if path else None
+        if alias:
+            name = alias
+        elif module:
+            name = module.split(".")[-1]
+        elif file_path:
+            name = file_path.stem
+        else:
+            name = ""
+        registry = self.context.module_registry
+        if registry.is_registered(name):
+            return
+
+        result = registry.import_module(module, file_path)
+        if result is None:
+            raise ValueError(
+                "Could not get attribute 'module' or 'path' for mu:python tag"
+            )
+        registry.register(alias or result[0], result[1])
+
+    def import_widgets(
+        self,
+        module: Union[str, None] = None,
+        path: Union[str, None] = None,
+        namespace: Union[str, None] = None,
+    ):
+        """Import and register the widgets of a module listed by a ``mu:widget`` tag"""
+        file_path = self.context.resolve_path(path) if path else None
+        result = self.context.module_registry.import_module(module, file_path)
+        if result is None:
+            raise ValueError(
+                "Could not get attribute 'module' or 'path' for mu:widget tag"
+            )
+        self.context.widget_registry.register_module(result[1], namespace)
+
+    def node(
+        self,
+        tag: str,
+        text: Union[str, None],
+        attrs: dict[str, Any],
+        meta_attrs: dict[str, Any],
+        parent: Union[LayoutNode, None] = None,
+    ) -> LayoutNode:
+        """Create the AST node passed to callbacks and custom builders"""
+        node = LayoutNode(tag, text, attrs, meta_attrs, parent=parent)
+        if parent is not None:
+            parent.children.append(node)
+        return node
+
+    def resolve(
+        self, node: LayoutNode, value: Union[UnresolvedResource, UnresolvedTemplate]
+    ) -> Any:
+        """Resolve a resource or template attribute of a node"""
+        return WidgetBuilder(node, self.context).resolve_value(value)
+
+    def widget_class(self, tag: str) -> type:
+        """Get a widget class from the tag index, for classes that are not part of urwid"""
+        if (entry := self.context.widget_registry.tag_index.get(tag)) is None:
+            raise UnknownTag(tag)
+        return entry[0]
+
+    def builder(self, node: LayoutNode, name: str) -> WidgetBuilder:
+        """Create the custom builder of a node
+
+        :param node: The node to build
+        :type node: LayoutNode
+        :param name: The qualified name of the builder the layout was compiled with
+        :type name: str
+        :raises UnknownTag: Raises if a different builder is registered for the tag
+        """
+        builder_cls = self.context.widget_registry.get(node.tag)
+        if f"{builder_cls.__module__}.{builder_cls.__qualname__}" != name:
+            raise UnknownTag(
+                f"<{node.tag}> was compiled with {name}, which is not registered"
+            )
+        return builder_cls(node, self.context)
+
+    def finish(self, root: Any = None):
+        """Notify palette listeners once the widgets are built
+
+        The palette entries and local data of the build are released once the root
+        widget is garbage collected, like :func:`~modern_urwid.compiler.compile_widget`.
+
+        :param root: The root widget of the layout
+        :type root: urwid.Widget, optional
+        """
+        if root is not None:
+            self.context.style_registry.release_with(self.key, root)
+            weakref.finalize(root, self.context.local_data.pop, self.key, None)
+        self.context.style_registry.notify_palettes()
@@ -1,28 +1,27 @@
-import inspect
 import random
 import string
 import sys
 from pathlib import Path
-from typing import Union
+from typing import TYPE_CHECKING, Any, Callable, Union
 
 import urwid
-from lxml import etree
-from typing_extensions import TypedDict
 
-from .constants import DEFAULT_STYLE
+from .constants import DEFAULT_STYLE, STORE_NAME, XML_NS
 from .context import CompileContext
-from .resource.dummies import UnresolvedResource
-from .resource.utils import (
-    import_module,
-    is_class_method,
-    resolve_resource,
-    wrap_callback,
-)
-from .style.css_parser import create_wrapper, parse_stylesheet
+from .resource.dummies import UnresolvedResource, UnresolvedTemplate
+from .resource.utils import get_root_name, resolve_resource
+from .store import Binding, get_store_keys
+from .style.css_parser import create_wrapper
+from .style.record import StyleRecord
 from .widgets.builder import WidgetBuilder
+from .widgets.builders import set_selectable
 from .widgets.size_options import SizeOptions
 from .xml.ast import LayoutNode, MetaNode
-from .xml.parser import parse_element
+from .xml.cache import read_layout
+from .xml.parser import parse_attrs, parse_element
+
+if TYPE_CHECKING:
+    from lxml import etree
 
 if sys.version_info < (3, 11):
     from typing_extensions import NotRequired, Required, TypedDict
@@ -72,7 +71,7 @@ def compile_meta_nodes(
                 if resource.tag not in resources:
                     resources[resource.tag] = []
                 if resource.children:
-                    data: dict = resource.attrs
+                    data: dict = resource.attrs.copy()
                     for child in resource.children:
                         if child.tag not in data:
                             data[child.tag] = []
@@ -90,23 +89,8 @@ def compile_meta_nodes(
     return {"resources": resources, "signals": signals, "layout": layout}
 
 
-def compile_node(
-    node: "LayoutNode",
-    ctx: "CompileContext",
-    root_style: dict[str, str] = DEFAULT_STYLE,
-    child_class: Union[str, None] = None,
-) -> tuple[urwid.Widget, SizeOptions, Metadata]:
-    """
-    Take the AST and CSS rules and create a widget
-    """
-
-    # build base widget
-    builder = ctx.widget_registry.get(node.tag)(node, ctx)
-    widget = builder.build()
-
-    # parse meta
-    meta = compile_meta_nodes(node.meta)
-
+def load_resources(meta: Metadata, ctx: "CompileContext"):
+    """Import the modules and widgets, and register the stylesheets listed in a node's metadata"""
     for tag in meta.get("resources").get("python", []):
         if file_path := tag.get("path"):
             file_path = ctx.resolve_path(file_path)
@@ -121,10 +105,14 @@ def compile_node(
             name = file_path.stem
         else:
             name = ""
+        if name == STORE_NAME:
+            raise ValueError(f"'{STORE_NAME}' is reserved for the data store")
         if ctx.module_registry.is_registered(name):
             continue
 
-        if (result := import_module(tag.get("module"), file_path)) is None:
+        with ctx.measure("import"):
+            result = ctx.module_registry.import_module(tag.get("module"), file_path)
+        if result is None:
             raise ValueError(
                 "Could not get attribute 'module' or 'path' for mu:python tag"
             )
@@ -132,6 +120,8 @@ def compile_node(
         name, module = result
         if alias := tag.get("as"):
             name = alias
+        if name == STORE_NAME:
+            raise ValueError(f"'{STORE_NAME}' is reserved for the data store")
         ctx.module_registry.register(name, module)
 
     for tag in meta.get("resources").get("widget", []):
@@ -139,18 +129,13 @@ def compile_node(
             file_path = ctx.resolve_path(file_path)
         else:
             file_path = None
-        if (result := import_module(tag.get("module"), file_path)) is None:
+        with ctx.measure("import"):
+            result = ctx.module_registry.import_module(tag.get("module"), file_path)
+        if result is None:
             raise ValueError(
                 "Could not get attribute 'module' or 'path' for mu:widget tag"
             )
-
-        for name, obj in inspect.getmembers(result[1]):
-            if (
-                inspect.isclass(obj)
-                and issubclass(obj, WidgetBuilder)
-                and obj is not WidgetBuilder
-            ):
-                ctx.widget_registry.register(obj)
+        ctx.widget_registry.register_module(result[1], tag.get("namespace"))
 
     for stylesheet in meta.get("resources").get("stylesheet", []):
         path = stylesheet.get("path")
@@ -161,47 +146,44 @@ def compile_node(
         for var in stylesheet.get("var", []):
             vars[var.get("name")] = var.get("value")
 
-        selectors, pseudo_map = parse_stylesheet(
-            ctx.resolve_path(path),
-            vars,
-        )
-        ctx.style_registry.add_selectors(selectors)
-        ctx.style_registry.pseudo_map.update(pseudo_map)
+        # rules loaded while a layout is compiled apply to the widgets compiled after them
+        ctx.style_registry.load_stylesheet(ctx.resolve_path(path), vars, restyle=False)
 
-    for signal in meta.get("signals"):
-        if not (name := signal.get("name")):
-            raise ValueError("Name attribute not present on <mu:signal> tag")
 
-        if not (resource := signal.get("callback")):
-            raise ValueError("Callback attribute not present on <mu:signal> tag")
+STORE_NAMES = frozenset({STORE_NAME})
 
-        if callable(callback := resolve_resource(ctx.module_registry, resource)):
-            if is_class_method(ctx.module_registry, resource):
-                urwid.connect_signal(widget, name, wrap_callback(callback, node))
-            else:
-                urwid.connect_signal(widget, name, wrap_callback(callback, node, ctx))
-        else:
-            raise TypeError(f"Resource at {resource} is not callable.")
 
-    # style
-    if not isinstance(id := node.meta_attrs.get("id"), str):
-        id = None
-    else:
-        if id in ctx.get_local().mapped_widgets:
-            raise ValueError(f"Cannot duplicate IDs: {id}")
-        ctx.get_local().mapped_widgets[id] = widget
+def depends_on(value: Any, names: frozenset[str]) -> bool:
+    """Check if an attribute value reads any of the given scope variables"""
+    if not names:
+        return False
+    if isinstance(value, UnresolvedResource):
+        return get_root_name(value) in names
+    elif isinstance(value, UnresolvedTemplate):
+        return not names.isdisjoint(value.roots)
+    return False
 
-    if not isinstance(clazz := node.meta_attrs.get("class"), str):
-        clazz = child_class
-    elif child_class:
-        clazz = f"{child_class} {clazz}"
 
-    style, hash, focus_hash = ctx.style_registry.get(
-        create_wrapper(node.tag, id, clazz),
-        root_style,
-    )
+def get_repeat(node: "LayoutNode") -> Union[tuple[UnresolvedResource, str], None]:
+    """Get the resource and item name set by a node's ``mu:for`` and ``mu:as`` attributes
 
-    # sizing
+    :raises TypeError: Raises if ``mu:for`` is not a resource or ``mu:as`` is not a name
+    :return: The resource to repeat the node for and the name of each item, or
+        ``None`` if the node is not repeated
+    :rtype: tuple[UnresolvedResource, str] | None
+    """
+    if (resource := node.meta_attrs.get("for")) is None:
+        return None
+    if not isinstance(resource, UnresolvedResource):
+        raise TypeError(f"mu:for '{resource}' is not a resource reference")
+    name = node.meta_attrs.get("as", "item")
+    if not isinstance(name, str):
+        raise TypeError(f"mu:as '{name}' is not a name")
+    return resource, name
+
+
+def get_sizing(node: "LayoutNode") -> SizeOptions:
+    """Get the sizing options set by a node's ``mu:height``, ``mu:weight`` or ``mu:pack`` attributes"""
     if "height" in node.meta_attrs:
         wh_type = "given"
         wh_amount = node.get_meta_attr("height")
@@ -218,49 +200,642 @@ def compile_node(
     if not isinstance(wh_amount, (int, float)) and wh_amount is not None:
         # TODO: support floats
         raise TypeError(f"WH amount '{wh_amount}' is not an int on node {node}")
-    sizing = SizeOptions(wh_type, wh_amount)
+    return SizeOptions(wh_type, wh_amount)
+
+
+class NodePlan:
+    """Precompiled instructions for creating the widget of a single node
+
+    Everything that does not depend on the widget instance (imports, stylesheets,
+    builder class, static attributes, signal callbacks, style and sizing) is resolved
+    by :func:`plan_node`, so :meth:`instantiate` only has to run the builder and the
+    urwid constructors. Child plans are created on first use and then reused.
+    """
+
+    def __init__(
+        self,
+        node: "LayoutNode",
+        builder_cls: type[WidgetBuilder],
+        meta: Metadata,
+        attrs: dict[str, Any],
+        signals: list[tuple[str, UnresolvedResource, Union[Callable, None]]],
+        id: Union[str, None],
+        classes: Union[str, None],
+        root_style: StyleRecord,
+        style: StyleRecord,
+        palette: str,
+        focus_palette: Union[str, None],
+        sizing: SizeOptions,
+        child_class: Union[str, None],
+        scope_names: frozenset[str],
+        repeat: Union[tuple[UnresolvedResource, str], None],
+        bindings: list[tuple[str, Any, frozenset[Union[str, None]]]],
+    ):
+        self.node = node
+        self.builder_cls = builder_cls
+        self.meta = meta
+        self.attrs = attrs
+        self.signals = signals
+        self.id = id
+        self.classes = classes
+        self.root_style = root_style
+        self.style = style
+        self.palette = palette
+        self.focus_palette = focus_palette
+        self.sizing = sizing
+        self.child_class = child_class
+        self.scope_names = scope_names
+        self.repeat = repeat
+        self.bindings = bindings
+        self._children: dict["LayoutNode", "NodePlan"] = {}
+
+    def get_child(self, ctx: "CompileContext", child: "LayoutNode") -> "NodePlan":
+        """Get the plan for one of this node's children"""
+        if (plan := self._children.get(child)) is None:
+            plan = plan_node(child, ctx, self.style, self.child_class, self.scope_names)
+            self._children[child] = plan
+        return plan
+
+    def prepare(self, ctx: "CompileContext") -> "NodePlan":
+        """Plan all descendants of this node up front
+
+        :rtype: NodePlan
+        """
+        # rows of lazy listboxes are planned when they are first created
+        if self.node.get_meta_attr("lazy") is True:
+            return self
+        for child in self.node.children:
+            self.get_child(ctx, child).prepare(ctx)
+        return self
+
+    def get_rows(
+        self, ctx: "CompileContext", scope: dict[str, Any]
+    ) -> list[Union["LayoutNode", tuple["LayoutNode", dict[str, Any]]]]:
+        """Get this node's children, expanding ``mu:for`` children into one
+        ``(node, scope)`` row per item"""
+        rows = []
+        for child in self.node.children:
+            # read from the node, so rows of lazy listboxes are not planned up front
+            if (repeat := get_repeat(child)) is None:
+                rows.append(child)
+                continue
+
+            resource, name = repeat
+            items = resolve_resource(ctx.module_registry, resource, scope=scope)
+            rows.extend((child, {**scope, name: item}) for item in items)
+        return rows
+
+    def instantiate_row(
+        self,
+        ctx: "CompileContext",
+        row: Union["LayoutNode", tuple["LayoutNode", dict[str, Any]]],
+        scope: dict[str, Any] = {},
+        record: Union[dict["LayoutNode", tuple["NodePlan", urwid.AttrMap]], None] = None,
+        parent: Union[urwid.AttrMap, None] = None,
+    ) -> tuple[urwid.Widget, SizeOptions, Metadata]:
+        """Create the widget for a row returned by :meth:`get_rows`"""
+        if isinstance(row, tuple):
+            child, scope = row
+        else:
+            child = row
+        return self.get_child(ctx, child).instantiate(ctx, scope, record, parent)
+
+    def iter_plans(self):
+        """Iterate over this plan and the plans of its descendants that were created"""
+        yield self
+        for plan in self._children.values():
+            yield from plan.iter_plans()
+
+    def release_row(
+        self,
+        ctx: "CompileContext",
+        row: Union["LayoutNode", tuple["LayoutNode", dict[str, Any]]],
+        owner: Union[str, None],
+        record: Union[dict["LayoutNode", tuple["NodePlan", urwid.AttrMap]], None] = None,
+    ):
+        """Forget a row created by :meth:`instantiate_row` once its widget is dropped
+
+        The row's ``mu:id`` values are unmapped and its hot reload records removed, so
+        the widget can be freed. The plan of a node row is dropped as well, releasing
+        the palette entries it acquired; it is planned again if the row is recreated.
+
+        :param ctx: The compile context
+        :type ctx: CompileContext
+        :param row: The row returned by :meth:`get_rows`
+        :type row: LayoutNode | tuple[LayoutNode, dict[str, typing.Any]]
+        :param owner: The layout key the row was compiled under
+        :type owner: str, optional
+        :param record: The records passed to :meth:`instantiate`
+        :type record: dict[LayoutNode, tuple[NodePlan, urwid.AttrMap]], optional
+        """
+        # rows stamped by mu:for share their plan and have no IDs or records
+        if isinstance(row, tuple) or (plan := self._children.pop(row, None)) is None:
+            return
+
+        mapped_widgets = ctx.get_local(owner).mapped_widgets
+        names = []
+        for child in plan.iter_plans():
+            if child.id is not None:
+                mapped_widgets.pop(child.id, None)
+            if record is not None:
+                record.pop(child.node, None)
+            names.extend((child.palette, child.focus_palette))
+        ctx.style_registry.release(owner, *names)
+
+    def instantiate(
+        self,
+        ctx: "CompileContext",
+        scope: dict[str, Any] = {},
+        record: Union[dict["LayoutNode", tuple["NodePlan", urwid.AttrMap]], None] = None,
+        parent: Union[urwid.AttrMap, None] = None,
+        children: Union[list[tuple[urwid.Widget, SizeOptions, Metadata]], None] = None,
+    ) -> tuple[urwid.Widget, SizeOptions, Metadata]:
+        """Create a new widget from this plan
+
+        :param ctx: The compile context
+        :type ctx: CompileContext
+        :param scope: Values for the scope variables used by this node (e.g. ``mu:for`` items)
+        :type scope: dict[str, typing.Any], optional
+        :param record: If provided, the plan and style map created for every node
+            outside of ``mu:for`` elements is stored in this dictionary (used for hot reloading)
+        :type record: dict[LayoutNode, tuple[NodePlan, urwid.AttrMap]], optional
+        :param parent: The style map of the parent widget, used to restyle this widget
+            when the style rules change
+        :type parent: urwid.AttrMap, optional
+        :param children: Already compiled children to attach, instead of creating them
+            from the node's children
+        :type children: list[tuple[urwid.Widget, SizeOptions, Metadata]], optional
+        :return: The widget, its sizing options and the node's metadata
+        :rtype: tuple[urwid.Widget, SizeOptions, Metadata]
+        """
+        node = self.node
+
+        # build base widget
+        builder = self.builder_cls(node, ctx)
+        builder.scope = scope
+        builder.preset_attrs = self.attrs
+        with ctx.measure("build", node.tag):
+            widget = builder.build()
+
+        for name, value, keys in self.bindings:
+            ctx.store.bind(Binding(builder, widget, name, value), keys)
+
+        if self.signals:
+            with ctx.measure("signals", node.tag):
+                for name, resource, handler in self.signals:
+                    if handler is None:
+                        handler = builder.resolve_value(resource)
+                        if not callable(handler):
+                            raise TypeError(f"Resource at {resource} is not callable.")
+                    urwid.connect_signal(widget, name, handler)
+
+        if self.id is not None:
+            mapped_widgets = ctx.get_local().mapped_widgets
+            if self.id in mapped_widgets:
+                raise ValueError(f"Cannot duplicate IDs: {self.id}")
+            mapped_widgets[self.id] = widget
+
+        # the style map is created before the children, so they can inherit from it
+        attr_map = urwid.AttrMap(widget, self.palette, self.focus_palette)
+        ctx.style_registry.register_widget(
+            attr_map, node.tag, self.id, self.classes, self.root_style, parent
+        )
+
+        # children
+        if children is None:
+            rows = self.get_rows(ctx, scope)
+
+            def compile_child(row):
+                return self.instantiate_row(ctx, row, scope, record, attr_map)
+
+            owner = ctx.current_key
+
+            def release_child(row):
+                self.release_row(ctx, row, owner, record)
+
+            children = []
+            if not builder.attach_lazy_children(
+                widget, rows, compile_child, release_child
+            ):
+                children = [compile_child(row) for row in rows]
+                if children:
+                    with ctx.measure("attach_children", node.tag):
+                        builder.attach_children(widget, children)
+        elif children:
+            with ctx.measure("attach_children", node.tag):
+                builder.attach_children(widget, children)
+
+        # handle mu:selectable override
+        if isinstance(selectable := node.meta_attrs.get("selectable"), bool):
+            set_selectable(widget, selectable, children)
+
+        if record is not None and not self.scope_names:
+            record[node] = (self, attr_map)
+
+        with ctx.measure("after_build", node.tag):
+            widget = builder.after_build(attr_map)
+        return widget, self.sizing, self.meta
+
+
+def plan_node(
+    node: "LayoutNode",
+    ctx: "CompileContext",
+    root_style: StyleRecord = DEFAULT_STYLE,
+    child_class: Union[str, None] = None,
+    scope_names: frozenset[str] = frozenset(),
+) -> NodePlan:
+    """Analyze a node and create the plan used to build its widget
+
+    :param node: The node to plan
+    :type node: LayoutNode
+    :param ctx: The compile context
+    :type ctx: CompileContext
+    :param root_style: The style inherited from the parent node
+    :type root_style: StyleRecord, optional
+    :param child_class: The classes inherited from the parent node
+    :type child_class: str, optional
+    :param scope_names: Scope variables available to this node (e.g. from ``mu:for``)
+    :type scope_names: frozenset[str], optional
+    :rtype: NodePlan
+    """
+    builder_cls = ctx.widget_registry.get(node.tag)
+
+    # repeat
+    if (repeat := get_repeat(node)) is not None:
+        scope_names = scope_names | {repeat[1]}
+
+    # parse meta
+    with ctx.measure("compile_meta_nodes", node.tag):
+        meta = compile_meta_nodes(node.meta)
+    load_resources(meta, ctx)
+
+    # resolve everything that does not depend on a scope variable or the data store
+    resolver = WidgetBuilder(node, ctx)
+    attrs = {}
+    bindings = []
+    for k, v in node.attrs.items():
+        if depends_on(v, STORE_NAMES):
+            bindings.append((k, v, get_store_keys(v)))
+        elif not depends_on(v, scope_names):
+            attrs[k] = resolver.resolve_value(v)
+
+    signals = []
+    for signal in meta.get("signals"):
+        if not (name := signal.get("name")):
+            raise ValueError("Name attribute not present on <mu:signal> tag")
+
+        if not (resource := signal.get("callback")):
+            raise ValueError("Callback attribute not present on <mu:signal> tag")
+
+        handler = None
+        if not depends_on(resource, scope_names):
+            if not callable(handler := resolver.resolve_value(resource)):
+                raise TypeError(f"Resource at {resource} is not callable.")
+        signals.append((name, resource, handler))
+
+    # style
+    if not isinstance(id := node.meta_attrs.get("id"), str):
+        id = None
+    elif scope_names:
+        raise ValueError(f"mu:id '{id}' can not be used inside of mu:for")
+
+    if not isinstance(clazz := node.meta_attrs.get("class"), str):
+        clazz = child_class
+    elif child_class:
+        clazz = f"{child_class} {clazz}"
+
+    style, hash, focus_hash = ctx.style_registry.resolve(
+        node.tag, id, clazz, root_style
+    )
+    ctx.style_registry.acquire(ctx.current_key, hash, focus_hash)
+
+    # sizing
+    sizing = get_sizing(node)
 
     # children
     if child_class := node.get_meta_attr("child_class"):
         child_class = f"{clazz} {child_class}"
     else:
         child_class = clazz
-    children = [compile_node(child, ctx, style, child_class) for child in node.children]
-    if children:
-        builder.attach_children(widget, children)
-
-    # handle mu:selectable override
-    if isinstance(selectable := node.meta_attrs.get("selectable"), bool):
-        widget._selectable = selectable
-
-        # TODO: extremely hacky
-        if isinstance(widget, (urwid.LineBox)):
-            setattr(
-                widget,
-                "keypress",
-                lambda size, key: children[0][0].keypress(size, key),
+
+    return NodePlan(
+        node,
+        builder_cls,
+        meta,
+        attrs,
+        signals,
+        id,
+        clazz,
+        root_style,
+        style,
+        hash,
+        focus_hash,
+        sizing,
+        child_class,
+        scope_names,
+        repeat,
+        bindings,
+    )
+
+
+def compile_node(
+    node: "LayoutNode",
+    ctx: "CompileContext",
+    root_style: StyleRecord = DEFAULT_STYLE,
+    child_class: Union[str, None] = None,
+) -> tuple[urwid.Widget, SizeOptions, Metadata]:
+    """
+    Take the AST and CSS rules and create a widget
+    """
+    return plan_node(node, ctx, root_style, child_class).instantiate(ctx)
+
+
+class LayoutPlan:
+    """A compiled layout that can create any number of independent widget trees
+
+    Resources, stylesheets, styles, attributes that do not depend on ``mu:for`` items
+    and signal callbacks are resolved once by :func:`compile_plan`, so each call to
+    :meth:`instantiate` only runs the widget builders and urwid constructors.
+    Resolved attribute values are shared between all instances.
+
+    :param root: The plan for the layout's root node
+    :type root: NodePlan
+    :param context: The compile context the plan was created with
+    :type context: CompileContext
+    :param key: The key the plan's palette entries are held under
+    :type key: str
+    """
+
+    def __init__(self, root: NodePlan, context: CompileContext, key: str):
+        self.root = root
+        self.context = context
+        self.key = key
+
+    @property
+    def meta(self) -> Metadata:
+        """The metadata of the layout's root node"""
+        return self.root.meta
+
+    def instantiate(
+        self, name: Union[str, None] = None
+    ) -> tuple[urwid.Widget, dict[str, urwid.Widget]]:
+        """Create a new widget tree from this plan
+
+        :param name: The :class:`~modern_urwid.context.LocalData` key to map the
+            instance's widgets under. A random key is used if not provided. Palette
+            entries acquired for the instance are held under this key until the
+            returned widget is garbage collected
+        :type name: str, optional
+        :return: Two values: the root urwid :class:`~urwid.Widget`, and a dictionary
+            mapping any widgets to their respective ``mu:id`` tag
+        :rtype: tuple[urwid.Widget, dict[str, urwid.Widget]]
+        """
+        if name is None:
+            name = gen_random_key(16)
+        previous_key = self.context.current_key
+        self.context.add_local(name)
+        try:
+            widget, _, _ = self.root.instantiate(self.context)
+        finally:
+            self.context.set_local_key(previous_key)
+
+        # entries acquired for this instance only (e.g. by lazily built rows)
+        self.context.style_registry.release_with(name, widget)
+        return widget, self.context.get_local(name).mapped_widgets
+
+    def release(self):
+        """Release the palette entries held by this plan"""
+        self.context.style_registry.release(self.key)
+
+
+def parse_layout_file(
+    file_path: Union[Path, str],
+    context: CompileContext,
+    key: Union[str, None] = None,
+) -> LayoutNode:
+    """Parse a layout file into its AST, using the context's layout cache if enabled
+
+    This does not modify the context, so it is safe to call from worker threads.
+
+    :param file_path: The file path to the layout file
+    :type file_path: pathlib.Path | str
+    :param context: The compile context holding the (optional) layout cache
+    :type context: CompileContext
+    :param key: The key the layout is registered under, used for instrumentation.
+        Defaults to the context's current key
+    :type key: str, optional
+    :raises ValueError: Raises if the root tag is not an urwid widget
+    :return: The root node of the layout
+    :rtype: LayoutNode
+    """
+    file_path = Path(file_path)
+    cache = context.layout_cache
+    if cache is None:
+        data = file_path.read_bytes()
+    else:
+        # read once, so the AST is stored with the fingerprint of what was parsed
+        data, fingerprint = read_layout(file_path)
+        if (node := cache.get(file_path, fingerprint)) is not None:
+            return node
+
+    from lxml import etree
+
+    # TODO: ignore comments
+    with context.measure("xml_parse", layout=key):
+        root = etree.fromstring(data, base_url=str(file_path))
+    with context.measure("parse_element", layout=key):
+        node = parse_element(root)
+    if not isinstance(node, LayoutNode):
+        raise ValueError("Root tag must an urwid widget")
+
+    if cache is not None:
+        cache.set(file_path, node, fingerprint)
+    return node
+
+
+def get_stylesheets(root: LayoutNode) -> list[tuple[str, dict[str, str]]]:
+    """Get the stylesheets listed by a layout, without loading them
+
+    :param root: The root node of the layout
+    :type root: LayoutNode
+    :return: The path and variable overrides of every ``mu:stylesheet`` element
+    :rtype: list[tuple[str, dict[str, str]]]
+    """
+    stylesheets = []
+    nodes = [root]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(reversed(node.children))
+        if not node.meta:
+            continue
+        for stylesheet in compile_meta_nodes(node.meta)["resources"].get(
+            "stylesheet", []
+        ):
+            if (path := stylesheet.get("path")) is None:
+                continue
+            vars = {}
+            for var in stylesheet.get("var", []):
+                vars[var.get("name")] = var.get("value")
+            stylesheets.append((path, vars))
+    return stylesheets
+
+
+class StreamFrame:
+    """An element that is being compiled by :func:`stream_layout_file`"""
+
+    def __init__(self, node: LayoutNode, parent: Union["StreamFrame", None] = None):
+        self.node = node
+        self.parent = parent
+        self.plan: Union[NodePlan, None] = None
+        # lazy listboxes and mu:for elements are parsed as a whole
+        self.whole = False
+        self.children: list[tuple[urwid.Widget, SizeOptions, Metadata]] = []
+        self.child_maps: list[tuple[NodePlan, urwid.AttrMap]] = []
+
+    def get_plan(self, ctx: CompileContext) -> NodePlan:
+        if self.plan is None:
+            if self.parent is None:
+                self.plan = plan_node(self.node, ctx)
+            else:
+                parent = self.parent.get_plan(ctx)
+                self.plan = plan_node(
+                    self.node, ctx, parent.style, parent.child_class, parent.scope_names
+                )
+        return self.plan
+
+
+def stream_layout_file(
+    file_path: Union[Path, str], context: CompileContext
+) -> tuple[urwid.Widget, SizeOptions, Metadata]:
+    """Compile a layout file while it is being parsed
+
+    Each element is compiled when its end tag is read, and its XML element and AST node
+    are freed once it is attached to its parent, so memory use depends on the depth of
+    the layout instead of its size. Lazy listboxes and ``mu:for`` elements are parsed
+    as a whole, since their children are compiled from the AST later. Metadata (e.g.
+    ``<mu:resources>``) must come before an element's child widgets.
+
+    :param file_path: The file path to the layout file
+    :type file_path: pathlib.Path | str
+    :param context: The compile context
+    :type context: CompileContext
+    :raises ValueError: Raises if the root tag is not an urwid widget, or metadata
+        follows child widgets
+    :return: The root widget, its sizing options and the root node's metadata
+    :rtype: tuple[urwid.Widget, SizeOptions, Metadata]
+    """
+    from lxml import etree
+
+    frames: list[StreamFrame] = []
+    # an element whose whole subtree is parsed at its end tag
+    whole: Union["etree._Element", None] = None
+    result = None
+
+    for event, element in etree.iterparse(str(file_path), events=("start", "end")):
+        if whole is not None and element is not whole:
+            continue
+
+        tag = str(element.tag)
+        if event == "start":
+            if tag.startswith(XML_NS):
+                if not frames:
+                    raise ValueError("Root tag must an urwid widget")
+                whole = element
+                continue
+
+            meta_attrs, attrs = parse_attrs(dict(element.attrib))
+            parent = frames[-1] if frames else None
+            if parent is not None:
+                # the parent's metadata has been read, so its style can be resolved
+                parent.get_plan(context)
+            frame = StreamFrame(
+                LayoutNode(
+                    tag, None, attrs, meta_attrs, parent=parent.node if parent else None
+                ),
+                parent,
             )
+            if "for" in meta_attrs or meta_attrs.get("lazy") is True:
+                frame.whole = True
+                whole = element
+            frames.append(frame)
+            continue
 
-    # apply style map
-    widget = urwid.AttrMap(widget, hash, focus_hash)
+        whole = None
+        if tag.startswith(XML_NS):
+            frame = frames[-1]
+            if frame.plan is not None:
+                raise ValueError(
+                    f"<{tag.replace(XML_NS, 'mu:')}> must come before the child widgets of <{frame.node.tag}>"
+                )
+            with context.measure("parse_element"):
+                meta = parse_element(element, frame.node)
+            if isinstance(meta, MetaNode):
+                frame.node.meta.append(meta)
+            element.clear()
+            continue
 
-    return builder.after_build(widget), sizing, meta
+        frame = frames.pop()
+        if frame.whole:
+            with context.measure("parse_element"):
+                frame.node = parse_element(element, frame.node.parent)  # type: ignore[assignment]
+        frame.node.text = element.text
+
+        plan = frame.get_plan(context)
+        record: dict[LayoutNode, tuple[NodePlan, urwid.AttrMap]] = {}
+        if plan.repeat is not None:
+            resource, name = plan.repeat
+            items = resolve_resource(context.module_registry, resource)
+            results = [plan.instantiate(context, {name: item}) for item in items]
+        elif frame.whole:
+            results = [plan.instantiate(context, record=record)]
+        else:
+            results = [plan.instantiate(context, record=record, children=frame.children)]
+
+        # link the children's style maps now that the parent's exists
+        if frame.node in record:
+            attr_map = record[frame.node][1]
+            for child_plan, child_map in frame.child_maps:
+                context.style_registry.register_widget(
+                    child_map,
+                    child_plan.node.tag,
+                    child_plan.id,
+                    child_plan.classes,
+                    child_plan.root_style,
+                    attr_map,
+                )
+
+        if frames:
+            frames[-1].children.extend(results)
+            if frame.node in record:
+                frames[-1].child_maps.append((plan, record[frame.node][1]))
+        else:
+            result = results[0]
+
+        # free the compiled element and its previous siblings
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+    if result is None:
+        raise ValueError("Root tag must an urwid widget")
+    return result
 
 
 def parse_xml_layout(
     file_path: Union[Path, str],
     context: CompileContext,
     name: Union[str, None] = None,
+    stream: bool = False,
 ) -> tuple[urwid.Widget, Metadata]:
     if name is None:
         name = Path(file_path).stem
     context.add_local(name)
 
-    # TODO: ignore comments
-    root = etree.parse(file_path).getroot()
-    node = parse_element(root)
-    if not isinstance(node, LayoutNode):
-        raise ValueError("Root tag must an urwid widget")
+    if stream:
+        widget, _, meta = stream_layout_file(file_path, context)
+        return widget, meta
+
+    node = parse_layout_file(file_path, context)
     widget, _, meta = compile_node(node, context)
     return widget, meta
 
@@ -272,7 +847,9 @@ def gen_random_key(length):
 
 
 def compile_widget(
-    file_path: Union[Path, str], context: Union[CompileContext, None] = None
+    file_path: Union[Path, str],
+    context: Union[CompileContext, None] = None,
+    stream: bool = False,
 ) -> tuple[urwid.Widget, dict[str, urwid.Widget]]:
     """Compile an XML file to an urwid Widget
 
@@ -280,6 +857,9 @@ def compile_widget(
     :type file_path: pathlib.Path | str
     :param context: The compile context to use when parsing. May be needed for styling.
     :type context: CompileContext, optional
+    :param stream: If True, compile elements while the file is parsed to reduce memory
+        use for very large layouts. See :func:`stream_layout_file`
+    :type stream: bool, optional
     :return: Two values: the root urwid :class:`~urwid.Widget`, and a dictionary
         mapping any widgets to their respective ``mu:id`` tag
     :rtype: tuple[urwid.Widget, dict[str, urwid.Widget]]
@@ -292,10 +872,36 @@ def compile_widget(
     key = gen_random_key(16)
     context.add_local(key)
 
-    root = etree.parse(file_path).getroot()
-    node = parse_element(root)
-
-    if not isinstance(node, LayoutNode):
-        raise ValueError("Root tag must an urwid widget")
-    widget, _, _ = compile_node(node, context)
+    if stream:
+        widget, _, _ = stream_layout_file(file_path, context)
+    else:
+        node = parse_layout_file(file_path, context)
+        widget, _, _ = compile_node(node, context)
+    context.style_registry.release_with(key, widget)
     return widget, context.get_local(key).mapped_widgets
+
+
+def compile_plan(
+    file_path: Union[Path, str], context: Union[CompileContext, None] = None
+) -> LayoutPlan:
+    """Compile an XML file to a reusable :class:`LayoutPlan`
+
+    :param file_path: The file path to the layout file
+    :type file_path: pathlib.Path | str
+    :param context: The compile context to use when parsing. May be needed for styling.
+    :type context: CompileContext, optional
+    :return: A plan that creates new widget trees with :meth:`LayoutPlan.instantiate`
+    :rtype: LayoutPlan
+    """
+    if isinstance(file_path, str):
+        file_path = Path(file_path)
+
+    if context is None:
+        context = CompileContext(file_path.parent)
+    key = gen_random_key(16)
+    context.add_local(key)
+
+    node = parse_layout_file(file_path, context)
+    root = plan_node(node, context).prepare(context)
+    context.style_registry.notify_palettes()
+    return LayoutPlan(root, context, key)
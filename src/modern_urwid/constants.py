@@ -6,14 +6,12 @@ Module variables:
 - ``XML_NS`` - XML namespace for modern-urwid
 - ``RESOURCE_CHAR`` - The character used to reference resources from ResourceHandler
 - ``DEFAULT_STYLE`` - The default style for widgets
+- ``STORE_NAME`` - The resource name the :class:`~modern_urwid.store.DataStore` is available under
 """
 
+from .style.record import StyleRecord
+
 XML_NS: str = "{https://github.com/Jackkillian/modern-urwid}"
 RESOURCE_CHAR: str = "@"
-DEFAULT_STYLE: dict[str, str] = {
-    "color": "",
-    "background": "",
-    "monochrome": "",
-    "color-adv": "",
-    "background-adv": "",
-}
+DEFAULT_STYLE: StyleRecord = StyleRecord()
+STORE_NAME: str = "store"
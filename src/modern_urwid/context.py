@@ -1,10 +1,16 @@
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Union
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Union
 
 if TYPE_CHECKING:
     from urwid import Widget
 
+    from .stats import CompileStats
+    from .xml.cache import LayoutCache
+
+from .constants import STORE_NAME
 from .resource.registry import ModuleRegistry
+from .stats import NULL_MEASURE
+from .store import DataStore
 from .style.registry import StyleRegistry
 from .widgets.registry import WidgetRegistry
 
@@ -37,6 +43,12 @@ class CompileContext:
     :type style_registry: StyleRegistry, optional
     :param module_registry: The module registery used for all layouts
     :type module_registry: ModuleRegistry, optional
+    :param layout_cache: An on-disk cache for parsed layouts. Disabled by default
+    :type layout_cache: LayoutCache, optional
+    :param stats: Records the time spent in each compile phase. Disabled by default
+    :type stats: CompileStats, optional
+    :param store: Observable data that layouts can bind attributes to, available as the ``store`` resource
+    :type store: DataStore, optional
     """
 
     def __init__(
@@ -45,6 +57,9 @@ class CompileContext:
         widget_registry: WidgetRegistry = None,
         style_registry: StyleRegistry = None,
         module_registry: ModuleRegistry = None,
+        layout_cache: Union["LayoutCache", None] = None,
+        stats: Union["CompileStats", None] = None,
+        store: Union[DataStore, None] = None,
     ):
         self.base_dir = base_dir.resolve()
         if widget_registry is None:
@@ -56,9 +71,20 @@ class CompileContext:
         if module_registry is None:
             module_registry = ModuleRegistry()
         self.module_registry = module_registry
+        if store is None:
+            store = DataStore()
+        self.store = store
+        module_registry.register(STORE_NAME, store.data)
+        self.layout_cache = layout_cache
+        self.stats = stats
+        if stats is not None:
+            self.style_registry.measure = self.measure
         self.local_data: dict[str, LocalData] = {}
         self.current_key: Union[str, None] = None
         self.custom_data: dict[str, Any] = {}
+        # called instead of the callbacks wrapped for this context if set, with the
+        # callback, its positional and its keyword arguments (e.g. to profile them)
+        self.callback_hook: Union[Callable[[Callable, tuple, dict], Any], None] = None
 
     def resolve_path(self, path: Union[str, Path]) -> Path:
         """Resolve a path under the base directory
@@ -70,6 +96,29 @@ class CompileContext:
         """
         return (self.base_dir / Path(path)).resolve()
 
+    def measure(
+        self,
+        phase: str,
+        tag: Union[str, None] = None,
+        layout: Union[str, None] = None,
+    ) -> ContextManager[None]:
+        """Measure the time spent in a compile phase, if instrumentation is enabled
+
+        :param phase: The compile phase
+        :type phase: str
+        :param tag: The tag of the node being compiled
+        :type tag: str, optional
+        :param layout: The key of the layout being compiled. Defaults to the current key
+        :type layout: str, optional
+        :return: A context manager to wrap the phase in
+        :rtype: typing.ContextManager
+        """
+        if self.stats is None:
+            return NULL_MEASURE
+        if layout is None:
+            layout = self.current_key
+        return self.stats.measure(phase, tag, layout)
+
     def add_local(self, name: str):
         """Add a :class:`~modern_urwid.context.LocalData` entry under the given name"""
         self.local_data[name] = LocalData()
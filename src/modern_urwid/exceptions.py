@@ -16,3 +16,7 @@ class LayoutNotSpecified(Exception):
 
 class InvalidTemplate(Exception):
     pass
+
+
+class UnsupportedFeature(Exception):
+    pass
@@ -2,8 +2,6 @@ from typing import TYPE_CHECKING, Any, Union
 
 import urwid
 
-from modern_urwid.style.css_parser import create_wrapper
-
 if TYPE_CHECKING:
     from modern_urwid.context import CompileContext
     from modern_urwid.lifecycle.manager import LifecycleManager
@@ -60,16 +58,23 @@ class Controller(metaclass=SingletonMeta):
         widget = builder.build(*args, **kwargs)
 
         if id:
-            if id in self.context.get(self.name).mapped_widgets:
+            if id in self.context.get_local(self.name).mapped_widgets:
                 raise ValueError(f"Cannot duplicate IDs: {id}")
-            self.context.get(self.name).mapped_widgets[id] = widget
+            self.context.get_local(self.name).mapped_widgets[id] = widget
 
-        style, hash, focus_hash = self.context.style_registry.get(
-            create_wrapper(str(builder_cls.tag), id, classes),
+        style, hash, focus_hash = self.context.style_registry.resolve(
+            str(builder_cls.tag),
+            id,
+            classes,
             # root_style, # TODO: load from layout??
         )
 
         widget = urwid.AttrMap(widget, hash, focus_hash)
+        self.context.style_registry.track(widget, hash, focus_hash)
+        self.context.style_registry.register_widget(
+            widget, str(builder_cls.tag), id, classes
+        )
+        self.context.style_registry.notify_palettes()
         return builder.after_build(widget)
 
     def on_load(self):
@@ -84,6 +89,14 @@ class Controller(metaclass=SingletonMeta):
         """Called when the parent layout is removed from the mainloop with :meth:`~modern_urwid.lifecycle.manager.LifecycleManager.switch`."""
         pass
 
+    def on_evict(self):
+        """Called before the parent layout's widgets are freed by :meth:`~modern_urwid.lifecycle.manager.LifecycleManager.evict` or :meth:`~modern_urwid.lifecycle.manager.LifecycleManager.unregister`. Save any widget state here."""
+        pass
+
+    def on_reload(self):
+        """Called after the parent layout is hot reloaded by :meth:`~modern_urwid.lifecycle.manager.LifecycleManager.reload`. Widgets bound with :func:`~modern_urwid.decorators.assign_widget` are already updated."""
+        pass
+
     def on_unhandled_input(
         self, data: Union[str, tuple[str, int, int, int]]
     ) -> Union[bool, None]:
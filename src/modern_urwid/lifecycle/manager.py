@@ -1,26 +1,51 @@
 import inspect
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import TYPE_CHECKING, Union
 
 import urwid
 
-from modern_urwid.compiler import parse_xml_layout
+from modern_urwid.compiler import (
+    NodePlan,
+    get_stylesheets,
+    parse_layout_file,
+    plan_node,
+)
 from modern_urwid.exceptions import LayoutNotFound, LayoutNotSpecified
 from modern_urwid.lifecycle.controller import Controller
+from modern_urwid.lifecycle.profiler import RuntimeProfiler
+from modern_urwid.lifecycle.watcher import LayoutWatcher
 from modern_urwid.resource.dummies import UnresolvedResource
 from modern_urwid.resource.utils import resolve_resource, wrap_callback
+from modern_urwid.stats import NULL_MEASURE
+from modern_urwid.widgets.builders import get_node_ids
+from modern_urwid.xml.diff import diff_nodes, iter_parents, walk
 
 if TYPE_CHECKING:
     from modern_urwid.context import CompileContext
+    from modern_urwid.xml.ast import LayoutNode
+
+SIZING_ATTRS = ("height", "weight", "pack")
 
 
 class LifecycleManager:
     """
     Manages multiple layouts and shared resources between them.
+
+    :param context: The compile context shared by all layouts
+    :type context: CompileContext
+    :param loop: The mainloop to render layouts on. A new one is created if not provided
+    :type loop: urwid.MainLoop, optional
+    :param max_resident: The maximum number of compiled layouts to keep in memory.
+        The least recently used layouts are evicted and recompiled on their next :meth:`switch`
+    :type max_resident: int, optional
     """
 
     def __init__(
-        self, context: "CompileContext", loop: Union[urwid.MainLoop, None] = None
+        self,
+        context: "CompileContext",
+        loop: Union[urwid.MainLoop, None] = None,
+        max_resident: Union[int, None] = None,
     ):
         if loop is None:
             self.loop = urwid.MainLoop(urwid.Text(""))
@@ -28,26 +53,135 @@ class LifecycleManager:
             self.loop: urwid.MainLoop = loop
         self.controllers: dict[str, "Controller"] = {}
         self.layouts: dict[str, urwid.Widget] = {}
+        self.sources: dict[str, Union[str, Path]] = {}
+        # the AST of each compiled layout and the plan and style map of each of its nodes
+        self.trees: dict[
+            str,
+            tuple["LayoutNode", dict["LayoutNode", tuple[NodePlan, urwid.AttrMap]]],
+        ] = {}
+        self.watcher: Union[LayoutWatcher, None] = None
+        self.profiler: Union[RuntimeProfiler, None] = None
         self.current: Union[str, None] = None
         self.context = context
+        self.max_resident = max_resident
         self.loop._unhandled_input = self.on_unhandled_input
+        self.context.style_registry.palette_listeners.append(self.update_palettes)
+        self.context.store.attach(self.loop)
+        self._warm_up_handle = None
 
-    def register(self, layout_path: Union[str, Path], key: Union[str, None] = None):
+    def register(
+        self,
+        layout_path: Union[str, Path],
+        key: Union[str, None] = None,
+        lazy: bool = False,
+    ):
         """Register a  new layout
 
         :param layout_path: Layout name to switch to
         :type layout_path: str | pathlib.Path
         :param key: The key to register the layout under
         :type key: str, optional
+        :param lazy: If True, only record the layout and compile it on the first
+            :meth:`switch` to it (or during :meth:`warm_up`)
+        :type lazy: bool, optional
         :raises ValueError: Raises if an incorrect key value is found
         :raises TypeError: Raises if the provided controller does not extend :class:`~modern_urwid.lifecycle.controller.Controller`
         """
         if key is None:
             key = Path(layout_path).stem
 
-        node, meta = parse_xml_layout(
-            self.context.resolve_path(layout_path), self.context, key
+        self.sources[key] = layout_path
+        if not lazy:
+            self.load(key)
+
+    def register_many(
+        self,
+        layout_paths: Union[list[Union[str, Path]], dict[str, Union[str, Path]]],
+        max_workers: Union[int, None] = None,
+    ):
+        """Register and compile several layouts at once
+
+        The layout files are parsed, and the stylesheets they list are parsed, in a
+        pool of worker threads. The widgets and controllers are then created on the
+        calling thread, one layout at a time in the given order.
+
+        :param layout_paths: The layouts to register, either as a list of paths (registered
+            under their file names, like :meth:`register`) or as a dictionary of keys to paths
+        :type layout_paths: list[str | pathlib.Path] | dict[str, str | pathlib.Path]
+        :param max_workers: The maximum number of worker threads.
+            Defaults to :class:`concurrent.futures.ThreadPoolExecutor`'s default
+        :type max_workers: int, optional
+        :raises ValueError: Raises if an incorrect key value is found
+        :raises TypeError: Raises if a provided controller does not extend :class:`~modern_urwid.lifecycle.controller.Controller`
+        """
+        if not isinstance(layout_paths, dict):
+            layout_paths = {Path(path).stem: path for path in layout_paths}
+
+        with ThreadPoolExecutor(max_workers) as executor:
+            roots = {
+                key: executor.submit(
+                    parse_layout_file, self.context.resolve_path(path), self.context, key
+                )
+                for key, path in layout_paths.items()
+            }
+
+            # parse each stylesheet once, as soon as a layout listing it is parsed,
+            # so load() finds it in the registry's cache
+            stylesheets = set()
+            style_registry = self.context.style_registry
+            for future in as_completed(roots.values()):
+                if future.exception() is not None:
+                    continue
+                for path, vars in get_stylesheets(future.result()):
+                    path = self.context.resolve_path(path)
+                    if (key := (path, frozenset(vars.items()))) in stylesheets:
+                        continue
+                    stylesheets.add(key)
+                    if path.is_file():
+                        executor.submit(style_registry.parse_stylesheet, path, vars)
+
+        for key, path in layout_paths.items():
+            self.sources[key] = path
+            self.load(key, roots[key].result())
+
+    def get_pending(self) -> list[str]:
+        """Get the keys of registered layouts that have not been compiled yet
+
+        :rtype: list[str]
+        """
+        return [key for key in self.sources if key not in self.layouts]
+
+    def load(self, key: str, root: Union["LayoutNode", None] = None):
+        """Compile a registered layout and set up its controller
+
+        This is done by :meth:`register` unless the layout was registered lazily.
+
+        :param key: The key the layout was registered under
+        :type key: str
+        :param root: The already parsed AST of the layout. The layout file is parsed if not provided
+        :type root: LayoutNode, optional
+        :raises LayoutNotFound: Raises if a layout is not registered with the given key
+        :raises ValueError: Raises if an incorrect key value is found
+        :raises TypeError: Raises if the provided controller does not extend :class:`~modern_urwid.lifecycle.controller.Controller`
+        """
+        if key not in self.sources:
+            raise LayoutNotFound(f"Layout '{key}' is not registered")
+
+        if key in self.layouts:
+            # drop the palette entries only used by the previous widget tree
+            self.context.style_registry.release(key)
+            del self.layouts[key]
+
+        self.context.add_local(key)
+        if root is None:
+            root = parse_layout_file(
+                self.context.resolve_path(self.sources[key]), self.context
+            )
+        record = {}
+        node, _, meta = plan_node(root, self.context).instantiate(
+            self.context, record=record
         )
+        self.trees[key] = (root, record)
 
         layout_config = meta.get("layout")
         if "controller" in layout_config:
@@ -80,7 +214,9 @@ class LifecycleManager:
                         on_load_res,
                     )
                 ):
-                    controller.on_load = wrap_callback(resource, self.context)
+                    controller.on_load = wrap_callback(
+                        resource, self.context, context=self.context
+                    )
             if "on_enter" in layout_config:
                 on_enter_res = layout_config["on_enter"]
                 if not isinstance(on_enter_res, UnresolvedResource):
@@ -91,7 +227,9 @@ class LifecycleManager:
                         on_enter_res,
                     )
                 ):
-                    controller.on_enter = wrap_callback(resource, self.context)
+                    controller.on_enter = wrap_callback(
+                        resource, self.context, context=self.context
+                    )
             if "on_exit" in layout_config:
                 on_exit_res = layout_config["on_exit"]
                 if not isinstance(on_exit_res, UnresolvedResource):
@@ -102,7 +240,9 @@ class LifecycleManager:
                         on_exit_res,
                     )
                 ):
-                    controller.on_exit = wrap_callback(resource, self.context)
+                    controller.on_exit = wrap_callback(
+                        resource, self.context, context=self.context
+                    )
 
         self.layouts[controller.name] = node
         self.controllers[controller.name] = controller
@@ -113,8 +253,228 @@ class LifecycleManager:
                 setattr(controller, name, widget)
         controller.on_load()
 
-        # update all palettes
-        self.loop.screen.register_palette(self.context.style_registry.get_palettes())
+        self.update_palettes()
+        self._evict_overflow(key)
+
+    def unregister(self, name: str):
+        """Remove a layout and free its compiled widget tree
+
+        The controller's :meth:`~modern_urwid.lifecycle.controller.Controller.on_evict` method is called
+        if the layout was compiled.
+
+        :param name: The layout name to remove
+        :type name: str
+        :raises LayoutNotFound: Raises if a layout is not found with the given name
+        :raises ValueError: Raises if the layout is currently rendered
+        """
+        if name not in self.sources:
+            raise LayoutNotFound(f"Layout '{name}' is not registered")
+        elif name == self.current:
+            raise ValueError(f"Cannot unregister the current layout '{name}'")
+
+        if name in self.layouts:
+            self.evict(name)
+        del self.sources[name]
+
+    def evict(self, name: str):
+        """Free a compiled layout, keeping it registered
+
+        The layout is recompiled on the next :meth:`switch` to it. The controller's
+        :meth:`~modern_urwid.lifecycle.controller.Controller.on_evict` method is called first,
+        so it can save any state held by its widgets.
+
+        :param name: The layout name to evict
+        :type name: str
+        :raises LayoutNotFound: Raises if a compiled layout is not found with the given name
+        :raises ValueError: Raises if the layout is currently rendered
+        """
+        if name not in self.layouts:
+            raise LayoutNotFound(f"Layout '{name}' is not compiled")
+        elif name == self.current:
+            raise ValueError(f"Cannot evict the current layout '{name}'")
+
+        controller = self.controllers.pop(name)
+        controller.on_evict()
+        for attr_name, attr in controller.__class__.__dict__.items():
+            if getattr(attr, "_widget_id", None) is not None:
+                controller.__dict__.pop(attr_name, None)
+
+        del self.layouts[name]
+        self.trees.pop(name, None)
+        self.context.local_data.pop(name, None)
+        self.context.style_registry.release(name)
+
+    def _evict_overflow(self, keep: str):
+        if self.max_resident is None:
+            return
+        # self.layouts is kept in least recently used order
+        candidates = [
+            name for name in self.layouts if name not in (keep, self.current)
+        ]
+        while len(self.layouts) > self.max_resident and candidates:
+            self.evict(candidates.pop(0))
+
+    def reload(self, name: str) -> bool:
+        """Reload a compiled layout from its file, recompiling only the changed parts
+
+        Changed elements are rebuilt in place, so the controller and all other widgets
+        (and their ``mu:id`` mappings) are kept. If the root element or its metadata
+        changed, the whole widget tree is rebuilt inside the existing root widget; the
+        controller and the layout's local data are still kept, and ``on_load`` is not
+        called again. The controller's
+        :meth:`~modern_urwid.lifecycle.controller.Controller.on_reload` method is called afterwards.
+
+        :param name: The layout name to reload
+        :type name: str
+        :raises LayoutNotFound: Raises if a layout is not registered with the given name
+        :return: False if the whole widget tree was rebuilt, otherwise True
+        :rtype: bool
+        """
+        if name not in self.sources:
+            raise LayoutNotFound(f"Layout '{name}' is not registered")
+        elif name not in self.layouts:
+            # compiled from the changed file on the next switch
+            return False
+
+        old_root, record = self.trees[name]
+        new_root = parse_layout_file(
+            self.context.resolve_path(self.sources[name]), self.context
+        )
+
+        changes = []
+        for old, new in diff_nodes(old_root, new_root):
+            # the root element is always rebuilt in place
+            while old.parent is not None and not self._can_replace(old, new, record):
+                old, new = old.parent, new.parent
+            changes.append((old, new))
+
+        # drop changes inside of other changed subtrees
+        replaced = {old for old, _ in changes}
+        changes = [
+            (old, new)
+            for old, new in changes
+            if not any(node in replaced for node in iter_parents(old))
+        ]
+
+        previous_key = self.context.current_key
+        self.context.set_local_key(name)
+        try:
+            ids = []
+            for old, new in dict(changes).items():
+                ids.extend(self._replace(name, old, new, record))
+        finally:
+            self.context.set_local_key(previous_key)
+
+        self._remap(old_root, new_root, record)
+        self.trees[name] = (new_root, record)
+
+        controller = self.controllers[name]
+        mapped_widgets = self.context.get_local(name).mapped_widgets
+        for attr_name, attr in controller.__class__.__dict__.items():
+            if (widget_id := getattr(attr, "_widget_id", None)) in ids:
+                setattr(controller, attr_name, mapped_widgets.get(widget_id))
+
+        self.update_palettes()
+        controller.on_reload()
+        return old_root not in replaced
+
+    def _can_replace(
+        self,
+        old: "LayoutNode",
+        new: "LayoutNode",
+        record: dict["LayoutNode", tuple[NodePlan, urwid.AttrMap]],
+    ) -> bool:
+        parent = old.parent
+        if parent is None or parent not in record or old not in record:
+            return False
+        # sizing is applied by the parent container, and lazy or repeated
+        # children are rebuilt from their node by the parent
+        return (
+            parent.meta_attrs.get("lazy") is not True
+            and "for" not in old.meta_attrs
+            and "for" not in new.meta_attrs
+            and all(
+                old.meta_attrs.get(attr) == new.meta_attrs.get(attr)
+                for attr in SIZING_ATTRS
+            )
+        )
+
+    def _replace(
+        self,
+        name: str,
+        old: "LayoutNode",
+        new: "LayoutNode",
+        record: dict["LayoutNode", tuple[NodePlan, urwid.AttrMap]],
+    ) -> list[str]:
+        old_plan, attr_map = record[old]
+        # the palette entries acquired by the plans of the replaced subtree
+        names = [
+            name
+            for plan in old_plan.iter_plans()
+            for name in (plan.palette, plan.focus_palette)
+        ]
+
+        ids = get_node_ids(old)
+        mapped_widgets = self.context.get_local(name).mapped_widgets
+        for id in ids:
+            mapped_widgets.pop(id, None)
+        for node in walk(old):
+            record.pop(node, None)
+
+        if old.parent is None:
+            plan = plan_node(new, self.context)
+            parent = None
+        else:
+            parent_plan, parent = record[old.parent]
+            plan = plan_node(
+                new,
+                self.context,
+                parent_plan.style,
+                parent_plan.child_class,
+                parent_plan.scope_names,
+            )
+        plan.instantiate(self.context, record=record, parent=parent)
+        _, new_map = record[new]
+
+        # swap the contents of the existing style map, so the parent keeps its widget
+        attr_map.original_widget = new_map.original_widget
+        self.context.style_registry.transfer(new_map, attr_map)
+        record[new] = (plan, attr_map)
+        self.context.style_registry.release(name, *names)
+        return ids + get_node_ids(new)
+
+    def _remap(
+        self,
+        old: "LayoutNode",
+        new: "LayoutNode",
+        record: dict["LayoutNode", tuple[NodePlan, urwid.AttrMap]],
+    ):
+        if new in record and old not in record:
+            # replaced subtree
+            return
+        if old in record:
+            record[new] = record.pop(old)
+        for old_child, new_child in zip(old.children, new.children):
+            self._remap(old_child, new_child, record)
+
+    def watch(self, interval: float = 0.5, **kwargs) -> LayoutWatcher:
+        """Start watching the registered layout files and reload them when they change
+
+        :param interval: The number of seconds between checks when polling for changes
+        :type interval: float, optional
+        :param kwargs: Passed to :class:`~modern_urwid.lifecycle.watcher.LayoutWatcher`
+        :return: The started watcher
+        :rtype: LayoutWatcher
+        """
+        if self.watcher is None:
+            self.watcher = LayoutWatcher(self, interval, **kwargs)
+        self.watcher.start()
+        return self.watcher
+
+    def update_palettes(self):
+        """Register palette entries added since the last update with the screen"""
+        if palettes := self.context.style_registry.pop_new_palettes():
+            self.loop.screen.register_palette(palettes)
 
     def switch(self, name: str):
         """
@@ -128,22 +488,88 @@ class LifecycleManager:
         :raises LayoutNotFound: Raises if a layout is not found with the given name
         """
 
-        if name not in self.layouts:
+        if name not in self.sources:
             raise LayoutNotFound(f"Layout '{name}' is not registered")
+        elif name not in self.layouts:
+            self.load(name)
 
         if self.current:
-            self.controllers[self.current].on_exit()
+            with self._measure("on_exit", self.current):
+                self.controllers[self.current].on_exit()
 
         controller = self.controllers[name]
-        controller.on_enter()
+        with self._measure("on_enter", name):
+            controller.on_enter()
+        self.layouts[name] = self.layouts.pop(name)
         self.loop.widget = self.layouts[name]
         self.current = name
+        self._evict_overflow(name)
+
+    def warm_up(self):
+        """Compile lazily registered layouts in the background
 
-    def run(self, name: Union[str, None] = None):
+        One pending layout is compiled each time the main loop becomes idle,
+        until all registered layouts are compiled.
+        """
+        if self._warm_up_handle is None and self.get_pending():
+            self._warm_up_handle = self.loop.event_loop.enter_idle(self._warm_up_step)
+
+    def _warm_up_step(self):
+        if pending := self.get_pending():
+            # loading sets the context's current key, which belongs to the running layout
+            previous_key = self.context.current_key
+            try:
+                self.load(pending[0])
+            finally:
+                self.context.set_local_key(previous_key)
+        if len(pending) <= 1 and self._warm_up_handle is not None:
+            # idle callbacks can not be removed while the event loop runs them
+            self.loop.event_loop.alarm(0, self._stop_warm_up)
+
+    def _stop_warm_up(self):
+        if self._warm_up_handle is not None:
+            self.loop.event_loop.remove_enter_idle(self._warm_up_handle)
+            self._warm_up_handle = None
+
+    def profile(
+        self, profiler: Union[RuntimeProfiler, None] = None, **kwargs
+    ) -> RuntimeProfiler:
+        """Start profiling the MainLoop
+
+        :param profiler: The profiler to use. A new one is created if not provided
+        :type profiler: RuntimeProfiler, optional
+        :param kwargs: Passed to :class:`~modern_urwid.lifecycle.profiler.RuntimeProfiler`
+        :return: The started profiler
+        :rtype: RuntimeProfiler
+        """
+        if profiler is None:
+            profiler = RuntimeProfiler(self, **kwargs)
+        if self.profiler is not None and self.profiler is not profiler:
+            self.profiler.stop()
+        self.profiler = profiler
+        profiler.start()
+        return profiler
+
+    def _measure(self, phase: str, layout: str):
+        if self.profiler is None:
+            return NULL_MEASURE
+        return self.profiler.measure(phase, layout=layout)
+
+    def run(
+        self,
+        name: Union[str, None] = None,
+        warm_up: bool = False,
+        profile: Union[bool, RuntimeProfiler] = False,
+    ):
         """Run the MainLoop
 
         :param name: If provided, switch to this layout before running
         :type name: str, optional
+        :param warm_up: If True, compile lazily registered layouts while the loop is idle
+        :type warm_up: bool, optional
+        :param profile: If True (or a :class:`~modern_urwid.lifecycle.profiler.RuntimeProfiler`),
+            profile the MainLoop until it exits. See :meth:`profile`
+        :type profile: bool | RuntimeProfiler, optional
         """
         if name:
             self.switch(name)
@@ -151,7 +577,16 @@ class LifecycleManager:
         if self.current is None:
             raise LayoutNotSpecified("No layout is selected to render.")
 
-        self.loop.run()
+        if warm_up:
+            self.warm_up()
+
+        if profile:
+            self.profile(profile if isinstance(profile, RuntimeProfiler) else None)
+        try:
+            self.loop.run()
+        finally:
+            if profile and self.profiler is not None:
+                self.profiler.stop()
 
     def get_loop(self) -> urwid.MainLoop:
         """Get this manager's mainloop
@@ -163,5 +598,6 @@ class LifecycleManager:
 
     def on_unhandled_input(self, data) -> Union[bool, None]:
         if self.current:
-            return self.controllers[self.current].on_unhandled_input(data)
+            with self._measure("on_unhandled_input", self.current):
+                return self.controllers[self.current].on_unhandled_input(data)
         return False
@@ -0,0 +1,167 @@
+"""
+Profiling of a running :class:`~modern_urwid.lifecycle.manager.LifecycleManager`
+"""
+
+import json
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Union
+
+from modern_urwid.stats import NULL_MEASURE, RuntimeStats
+
+if TYPE_CHECKING:
+    from modern_urwid.lifecycle.manager import LifecycleManager
+
+
+def get_callback_name(callback: Callable) -> str:
+    module = getattr(callback, "__module__", None)
+    name = getattr(callback, "__qualname__", None) or repr(callback)
+    return f"{module}.{name}" if module else name
+
+
+class RuntimeProfiler:
+    """Records where time is spent while a manager's MainLoop runs
+
+    The following phases are recorded, in total, per name and per current layout:
+
+    - ``draw_screen``: every screen redraw (the per-layout count is the render count)
+    - ``on_enter``, ``on_exit`` and ``on_unhandled_input``: controller hooks
+    - ``callback``: callbacks the manager's context wired through
+      :func:`~modern_urwid.resource.utils.wrap_callback` (signals, widget attributes and
+      ``mu:layout`` hooks), by callback name
+    - ``alarm``: alarm callbacks, by callback name
+
+    :param manager: The manager to profile
+    :type manager: LifecycleManager
+    :param dump_path: If provided, :meth:`snapshot` is written to this file as JSON
+        every ``dump_interval`` seconds and when profiling stops
+    :type dump_path: str | pathlib.Path, optional
+    :param dump_interval: The number of seconds between dumps
+    :type dump_interval: float, optional
+    """
+
+    def __init__(
+        self,
+        manager: "LifecycleManager",
+        dump_path: Union[str, Path, None] = None,
+        dump_interval: float = 10,
+    ):
+        self.manager = manager
+        self.dump_path = Path(dump_path) if dump_path is not None else None
+        self.dump_interval = dump_interval
+        self.stats = RuntimeStats()
+        self.running = False
+        self._alarm: Union[Callable, None] = None
+        self._dump_handle = None
+        self._started = 0.0
+
+    def measure(
+        self,
+        phase: str,
+        name: Union[str, None] = None,
+        layout: Union[str, None] = None,
+    ) -> ContextManager[None]:
+        """Measure the time spent in a ``with`` block, if profiling is running
+
+        :param phase: The phase to record
+        :type phase: str
+        :param name: The name to record the time under (e.g. a callback name)
+        :type name: str, optional
+        :param layout: The layout to record the time under. Defaults to the current layout
+        :type layout: str, optional
+        :rtype: typing.ContextManager
+        """
+        if not self.running:
+            return NULL_MEASURE
+        if layout is None:
+            layout = self.manager.current
+        return self.stats.measure(phase, name, layout)
+
+    def start(self):
+        """Start profiling"""
+        if self.running:
+            return
+        self.running = True
+        self._started = perf_counter()
+
+        loop = self.manager.loop
+        draw_screen = loop.draw_screen
+
+        def profiled_draw_screen(*args, **kwargs):
+            with self.measure("draw_screen"):
+                return draw_screen(*args, **kwargs)
+
+        loop.draw_screen = profiled_draw_screen  # type: ignore[method-assign]
+
+        self._alarm = alarm = loop.event_loop.alarm
+
+        def profiled_alarm(seconds, callback):
+            def profiled_callback():
+                with self.measure("alarm", get_callback_name(callback)):
+                    callback()
+
+            return alarm(seconds, profiled_callback)
+
+        loop.event_loop.alarm = profiled_alarm  # type: ignore[method-assign]
+
+        self.manager.context.callback_hook = self._call_callback
+
+        if self.dump_path is not None:
+            self._dump_handle = self._alarm(self.dump_interval, self._periodic_dump)
+
+    def stop(self):
+        """Stop profiling, restoring the MainLoop, and write the final dump"""
+        if not self.running:
+            return
+
+        loop = self.manager.loop
+        loop.__dict__.pop("draw_screen", None)
+        loop.event_loop.__dict__.pop("alarm", None)
+        context = self.manager.context
+        if context.callback_hook == self._call_callback:
+            context.callback_hook = None
+        if self._dump_handle is not None:
+            loop.event_loop.remove_alarm(self._dump_handle)
+            self._dump_handle = None
+
+        self.running = False
+        if self.dump_path is not None:
+            self.dump()
+
+    def _call_callback(self, callback: Callable, args: tuple, kwargs: dict) -> Any:
+        with self.measure("callback", get_callback_name(callback)):
+            return callback(*args, **kwargs)
+
+    def _periodic_dump(self):
+        self.dump()
+        if self._alarm is not None and self.running:
+            self._dump_handle = self._alarm(self.dump_interval, self._periodic_dump)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Get the recorded stats as plain data
+
+        :return: The elapsed profiling time, and the stats per phase, per callback name
+            (under ``"callbacks"``) and per layout
+        :rtype: dict[str, typing.Any]
+        """
+        return {
+            "elapsed": perf_counter() - self._started if self._started else 0.0,
+            **self.stats.to_dict(),
+        }
+
+    def dump(self, path: Union[str, Path, None] = None):
+        """Write :meth:`snapshot` to a file as JSON
+
+        :param path: The file to write to. Defaults to ``dump_path``
+        :type path: str | pathlib.Path, optional
+        """
+        if path is None:
+            path = self.dump_path
+        if path is None:
+            raise ValueError("No path to dump the profile to")
+        Path(path).write_text(json.dumps(self.snapshot(), indent=2))
+
+    def reset(self):
+        """Clear all recorded stats"""
+        self.stats.reset()
+        self._started = perf_counter() if self.running else 0.0
@@ -0,0 +1,183 @@
+"""
+Watches layout and stylesheet files and reloads them when they change
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Union
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+if TYPE_CHECKING:
+    from modern_urwid.lifecycle.manager import LifecycleManager
+
+
+def get_mtime(path: Path) -> Union[int, None]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+class LayoutWatcher:
+    """Watches the layouts registered with a :class:`~modern_urwid.lifecycle.manager.LifecycleManager`
+    and reloads them with :meth:`~modern_urwid.lifecycle.manager.LifecycleManager.reload` when their files change.
+    Changed stylesheets are applied to the existing widgets with
+    :meth:`~modern_urwid.style.registry.StyleRegistry.reload_stylesheets`.
+
+    Changes are detected with inotify if the optional ``inotify_simple`` package is installed,
+    otherwise modification times are polled on the manager's event loop.
+
+    :param manager: The manager whose layouts are watched
+    :type manager: LifecycleManager
+    :param interval: The number of seconds between checks when polling
+    :type interval: float, optional
+    :param use_inotify: Set to False to always poll
+    :type use_inotify: bool, optional
+    :param on_error: Called with the layout name (or stylesheet path) and the exception if a reload fails
+        (e.g. because of a syntax error). Errors are raised if not provided
+    :type on_error: typing.Callable[[str, Exception], typing.Any], optional
+    """
+
+    def __init__(
+        self,
+        manager: "LifecycleManager",
+        interval: float = 0.5,
+        use_inotify: bool = True,
+        on_error: Union[Callable[[str, Exception], Any], None] = None,
+    ):
+        self.manager = manager
+        self.interval = interval
+        self.on_error = on_error
+        self.mtimes: dict[Path, Union[int, None]] = {}
+        self.inotify = None
+        if use_inotify and inotify_simple is not None:
+            try:
+                self.inotify = inotify_simple.INotify()
+            except OSError:
+                self.inotify = None
+        self.watched_dirs: set[Path] = set()
+        self._handle = None
+
+    def get_paths(self) -> dict[Path, list[str]]:
+        """Get the files of all registered layouts
+
+        :return: A dictionary mapping each file to the layouts registered from it
+        :rtype: dict[pathlib.Path, list[str]]
+        """
+        paths: dict[Path, list[str]] = {}
+        for key, source in self.manager.sources.items():
+            paths.setdefault(self.manager.context.resolve_path(source), []).append(key)
+        return paths
+
+    def start(self):
+        """Start watching on the manager's event loop"""
+        if self._handle is not None:
+            return
+
+        for path in self._get_watched():
+            self.mtimes[path] = get_mtime(path)
+
+        event_loop = self.manager.loop.event_loop
+        if self.inotify is not None:
+            self._watch_dirs()
+            self._handle = event_loop.watch_file(
+                self.inotify.fileno(), self._on_inotify
+            )
+        else:
+            self._handle = event_loop.alarm(self.interval, self._on_alarm)
+
+    def stop(self):
+        """Stop watching and close the inotify instance
+
+        If the watcher is started again, changes are detected by polling.
+        """
+        if self._handle is not None:
+            event_loop = self.manager.loop.event_loop
+            if self.inotify is not None:
+                event_loop.remove_watch_file(self._handle)
+            else:
+                event_loop.remove_alarm(self._handle)
+            self._handle = None
+
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+            self.watched_dirs.clear()
+
+    def _get_watched(self) -> list[Path]:
+        return [
+            *self.get_paths(),
+            *self.manager.context.style_registry.get_stylesheet_paths(),
+        ]
+
+    def _is_changed(self, path: Path) -> bool:
+        mtime = get_mtime(path)
+        if path not in self.mtimes:
+            # registered after the watcher was started
+            self.mtimes[path] = mtime
+        elif mtime is not None and mtime != self.mtimes[path]:
+            self.mtimes[path] = mtime
+            return True
+        return False
+
+    def check(self) -> list[str]:
+        """Reload all layouts and stylesheets whose files changed since the last check
+
+        :return: The names of the reloaded layouts
+        :rtype: list[str]
+        """
+        style_registry = self.manager.context.style_registry
+        if stylesheets := [
+            path
+            for path in style_registry.get_stylesheet_paths()
+            if self._is_changed(path)
+        ]:
+            try:
+                style_registry.reload_stylesheets()
+            except Exception as e:
+                if self.on_error is None:
+                    raise
+                self.on_error(str(stylesheets[0]), e)
+
+        changed = []
+        for path, keys in self.get_paths().items():
+            if self._is_changed(path):
+                changed.extend(keys)
+
+        for key in changed:
+            try:
+                self.manager.reload(key)
+            except Exception as e:
+                if self.on_error is None:
+                    raise
+                self.on_error(key, e)
+        return changed
+
+    def _watch_dirs(self):
+        # editors often replace files instead of writing to them, so watch directories
+        flags = (
+            inotify_simple.flags.CLOSE_WRITE
+            | inotify_simple.flags.MOVED_TO
+            | inotify_simple.flags.CREATE
+        )
+        for path in self._get_watched():
+            if path.parent not in self.watched_dirs:
+                self.inotify.add_watch(path.parent, flags)
+                self.watched_dirs.add(path.parent)
+
+    def _on_inotify(self):
+        self.inotify.read(timeout=0)
+        self._watch_dirs()
+        self.check()
+
+    def _on_alarm(self):
+        self._handle = None
+        try:
+            self.check()
+        finally:
+            self._handle = self.manager.loop.event_loop.alarm(
+                self.interval, self._on_alarm
+            )
@@ -2,6 +2,17 @@
 Various classes representing unresolved AST attributes
 """
 
+import string
+from typing import TYPE_CHECKING, Any, Union
+
+from modern_urwid.exceptions import InvalidTemplate
+from modern_urwid.resource.utils import ResourceAccessor
+
+if TYPE_CHECKING:
+    from modern_urwid.resource.registry import ModuleRegistry
+
+CONVERSIONS = {"r": repr, "s": str, "a": ascii}
+
 
 class UnresolvedResource:
     """Represents an unresolved resource from a module
@@ -16,16 +27,82 @@ class UnresolvedResource:
     def __repr__(self) -> str:
         return f"<UnresolvedResource path={self.path}>"
 
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, UnresolvedResource) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash((UnresolvedResource, self.path))
+
 
 class UnresolvedTemplate:
     """Represents an unresolved string template
 
+    The template is compiled when it is created into a list of literal text and field
+    segments, each field holding a :class:`~modern_urwid.resource.utils.ResourceAccessor`,
+    so rendering it does not parse the string again.
+
     :param template: A string template (e.g. ``User ID: {users.data.id}``)
     :type template: str
+    :raises InvalidTemplate: Raises if the template has unmatched brackets
     """
 
     def __init__(self, template: str):
         self.value = template
+        self.segments: list[
+            tuple[str, Union[ResourceAccessor, None], str, Union[str, None]]
+        ] = []
+        dependencies = set()
+        try:
+            fields = list(string.Formatter().parse(template))
+        except ValueError as e:
+            raise InvalidTemplate(f"{template!r}: {e}") from None
+        for literal, field, spec, conversion in fields:
+            if field is None:
+                self.segments.append((literal, None, "", None))
+                continue
+            elif not field:
+                # empty fields are kept as written
+                self.segments.append((literal + "{}", None, "", None))
+                continue
+            resource = UnresolvedResource(field)
+            dependencies.add(resource)
+            self.segments.append(
+                (literal, ResourceAccessor(resource), spec or "", conversion)
+            )
+        self.dependencies: frozenset[UnresolvedResource] = frozenset(dependencies)
+        self.roots: frozenset[str] = frozenset(
+            segment[1].root for segment in self.segments if segment[1] is not None
+        )
 
     def __repr__(self) -> str:
         return f"<UnresolvedTemplate value={self.value}>"
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, UnresolvedTemplate) and other.value == self.value
+
+    def __hash__(self) -> int:
+        return hash((UnresolvedTemplate, self.value))
+
+    def render(
+        self,
+        module_registry: "ModuleRegistry",
+        scope: Union[dict[str, Any], None] = None,
+    ) -> str:
+        """Render the template
+
+        :param module_registry: The module registry to read fields from
+        :type module_registry: :class:`~modern_urwid.resource.registry.ModuleRegistry`
+        :param scope: Variables that take precedence over registered modules
+        :type scope: dict[str, typing.Any], optional
+        :return: The rendered string
+        :rtype: str
+        """
+        parts = []
+        for literal, accessor, spec, conversion in self.segments:
+            parts.append(literal)
+            if accessor is not None:
+                value = accessor.get(module_registry, scope)[0]
+                if conversion is not None:
+                    value = CONVERSIONS[conversion](value)
+                parts.append(format(value, spec))
+        return "".join(parts)
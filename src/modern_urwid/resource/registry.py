@@ -2,9 +2,15 @@
 Handles storing Python modules
 """
 
+from pathlib import Path
 from types import ModuleType
+from typing import TYPE_CHECKING, Union
 
 from modern_urwid.exceptions import UnknownModule
+from modern_urwid.resource.utils import ResourceAccessor, import_module
+
+if TYPE_CHECKING:
+    from modern_urwid.resource.dummies import UnresolvedResource
 
 
 class ModuleRegistry:
@@ -12,8 +18,13 @@ class ModuleRegistry:
     Simple registry for Python modules
     """
 
+    # modules imported by import_module, keyed by module path or resolved file path.
+    # Shared by all registries, so each file is only executed once per process
+    imported: dict[Union[str, Path], tuple[str, ModuleType]] = {}
+
     def __init__(self):
         self.modules: dict[str, ModuleType] = {}
+        self.accessors: dict[str, ResourceAccessor] = {}
 
     def register(self, name: str, module: ModuleType):
         """Store the given module in the registry
@@ -23,8 +34,46 @@ class ModuleRegistry:
         :param module: The Python module to register
         :type module: types.ModuleType
         """
+        if self.modules.get(name) is module:
+            return
+        if name in self.modules:
+            # drop cached targets that were read from the replaced module
+            self.accessors = {
+                path: accessor
+                for path, accessor in self.accessors.items()
+                if accessor.root != name
+            }
         self.modules[name] = module
 
+    def import_module(
+        self,
+        module_path: Union[str, None] = None,
+        file_path: Union[Path, None] = None,
+    ) -> Union[tuple[str, ModuleType], None]:
+        """Import a Python module from a given module or file path, reusing the module
+        if it was already imported. See :func:`~modern_urwid.resource.utils.import_module`
+
+        :param module_path: A Python module path (e.g. ``tests.advanced.extra``)
+        :type module_path: str, optional
+        :param file_path: A file path to the module
+        :type file_path: pathlib.Path, optional
+        :return: A tuple containing the name of the module and the module,
+            or ``None`` if neither path was given
+        :rtype: tuple[str, types.ModuleType] | None
+        """
+        if module_path:
+            key: Union[str, Path] = module_path
+        elif file_path:
+            key = file_path.resolve()
+        else:
+            return None
+
+        if (result := self.imported.get(key)) is None:
+            result = import_module(module_path, file_path)
+            if result is not None:
+                self.imported[key] = result
+        return result
+
     def is_registered(self, name: str):
         return name in self.modules
 
@@ -37,7 +86,20 @@ class ModuleRegistry:
         :return: The Python module, if registered
         :rtype: types.ModuleType
         """
-        if module := self.modules.get(name):
-            return module
+        if name in self.modules:
+            return self.modules[name]
         else:
             raise UnknownModule(name)
+
+    def get_accessor(self, unresolved: "UnresolvedResource") -> ResourceAccessor:
+        """Get the compiled accessor for a resource, creating it on first use
+
+        :param unresolved: The unresolved resource
+        :type unresolved: :class:`~modern_urwid.resource.dummies.UnresolvedResource`
+        :return: The accessor, cached until its module is replaced
+        :rtype: :class:`~modern_urwid.resource.utils.ResourceAccessor`
+        """
+        accessor = self.accessors.get(unresolved.path)
+        if accessor is None:
+            accessor = self.accessors[unresolved.path] = ResourceAccessor(unresolved)
+        return accessor
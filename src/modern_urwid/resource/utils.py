@@ -12,56 +12,170 @@ from typing import TYPE_CHECKING, Any, Callable, Union
 from modern_urwid.lifecycle.controller import Controller
 
 if TYPE_CHECKING:
+    from modern_urwid.context import CompileContext
     from modern_urwid.resource.dummies import UnresolvedResource
     from modern_urwid.resource.registry import ModuleRegistry
 
 
-def wrap_callback(callback: Callable, *args) -> Callable:
+def wrap_callback(
+    callback: Callable, *args, context: Union["CompileContext", None] = None
+) -> Callable:
     """Wrap a callback with the given arguments
 
     :param callback: The callback to wrap
     :type callback: typing.Callable
-    :return: Lambda that will call the original callback with
+    :param context: If provided, the context's ``callback_hook`` (e.g. set by a profiler)
+        is called instead of the callback while it is set
+    :type context: :class:`~modern_urwid.context.CompileContext`, optional
+    :return: Function that will call the original callback with
         the given arguments and any additional arguments at call time
     :rtype: typing.Callable
     """
-    return lambda *_args, **_kwargs: callback(*args, *_args, **_kwargs)
 
+    def wrapper(*_args, **_kwargs):
+        if context is not None and context.callback_hook is not None:
+            return context.callback_hook(callback, (*args, *_args), _kwargs)
+        return callback(*args, *_args, **_kwargs)
 
-def is_class_method(
-    module_registry: "ModuleRegistry", unresolved: "UnresolvedResource"
-):
+    return wrapper
+
+
+def get_root_name(unresolved: "UnresolvedResource") -> str:
+    """Get the name of the module (or scope variable) a resource is read from"""
     path = unresolved.path
     if path.startswith("@"):
         path = path[1:]
+    return path.split(".", 1)[0]
+
 
-    attrs = path.split(".")
-    module_name = attrs.pop(0)
-    module = module_registry.get(module_name)
-    target = module
-    for attr in attrs:
-        if isinstance(target, dict):
-            if attr not in target:
+class ResourceAccessor:
+    """A resource path compiled into the steps needed to read it
+
+    The path is split once, and the target of callable resources is cached after the
+    first lookup along with its kind, so resolving the same resource again does not
+    walk the path. Only targets read from modules are cached, and the cached target
+    is dropped if the module it was read from is replaced. Values are read again on every lookup since module data may change,
+    and resources rooted in a scope variable (e.g. a ``mu:for`` item) are never cached.
+
+    :param unresolved: The unresolved resource to compile
+    :type unresolved: :class:`~modern_urwid.resource.dummies.UnresolvedResource`
+    """
+
+    VALUE = "value"
+    CALLABLE = "callable"
+    CONTROLLER_METHOD = "controller_method"
+
+    def __init__(self, unresolved: "UnresolvedResource"):
+        self.path = unresolved.path
+        path = self.path[1:] if self.path.startswith("@") else self.path
+        self.root, *attrs = path.split(".")
+        self.attrs = tuple(attrs)
+        self.kind: Union[str, None] = None
+        self.target: Any = None
+        self.module: Any = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # cached targets are only valid for the current process
+        return {**self.__dict__, "kind": None, "target": None, "module": None}
+
+    def __repr__(self) -> str:
+        return f"<ResourceAccessor path={self.path} kind={self.kind}>"
+
+    def walk(self, root: Any, resolve_controllers: bool = True) -> tuple[Any, str]:
+        """Walk the path from its root object
+
+        :param root: The module (or scope variable) the path starts at
+        :type root: typing.Any
+        :param resolve_controllers: Whether or not to instance controller classes
+        :type resolve_controllers: bool
+        :return: The target and its kind
+        :rtype: tuple[typing.Any, str]
+        """
+        target = root
+        controller = False
+        for attr in self.attrs:
+            if isinstance(target, dict):
+                if attr not in target:
+                    raise AttributeError(
+                        f"{target} does not have attribute '{attr}' (reading '{self.path}')"
+                    )
+                target = target[attr]
+            elif hasattr(target, attr):
+                target = getattr(target, attr)
+            else:
                 raise AttributeError(
-                    f"{target} does not have attribute '{attr}' (reading '{unresolved.path}')"
+                    f"{target} does not have attribute '{attr}' (reading '{self.path}')"
                 )
-            target = target[attr]
-        elif hasattr(target, attr):
-            target = getattr(target, attr)
-        else:
-            raise AttributeError(
-                f"{target} does not have attribute '{attr}' (reading '{unresolved.path}')"
-            )
 
-        if inspect.isclass(target) and issubclass(target, Controller):
-            return True
-    return False
+            if inspect.isclass(target) and issubclass(target, Controller):
+                controller = True
+                if resolve_controllers:
+                    target = target()
+
+        if not callable(target):
+            return target, self.VALUE
+        elif controller:
+            return target, self.CONTROLLER_METHOD
+        return target, self.CALLABLE
+
+    def get(
+        self,
+        module_registry: "ModuleRegistry",
+        scope: Union[dict[str, Any], None] = None,
+        resolve_controllers: bool = True,
+    ) -> tuple[Any, str]:
+        """Get the target of the resource and its kind
+
+        :param module_registry: The module registry
+        :type module_registry: :class:`~modern_urwid.resource.registry.ModuleRegistry`
+        :param scope: Variables that take precedence over registered modules
+        :type scope: dict[str, typing.Any], optional
+        :param resolve_controllers: Whether or not to instance controller classes
+        :type resolve_controllers: bool
+        :return: The target and its kind (``VALUE``, ``CALLABLE`` or ``CONTROLLER_METHOD``)
+        :rtype: tuple[typing.Any, str]
+        """
+        if scope and self.root in scope:
+            return self.walk(scope[self.root], resolve_controllers)
+        if not resolve_controllers:
+            return self.walk(module_registry.get(self.root), False)
+        module = module_registry.get(self.root)
+        if self.kind is not None and module is self.module:
+            return self.target, self.kind
+
+        target, kind = self.walk(module)
+        if kind != self.VALUE and isinstance(module, ModuleType):
+            self.target = target
+            self.kind = kind
+            self.module = module
+        return target, kind
+
+
+def is_class_method(
+    module_registry: "ModuleRegistry",
+    unresolved: "UnresolvedResource",
+    scope: Union[dict[str, Any], None] = None,
+) -> bool:
+    """Check if a resource is a callable read through a controller class
+
+    :param module_registry: The module registry
+    :type module_registry: :class:`~modern_urwid.resource.registry.ModuleRegistry`
+    :param unresolved: The unresolved resource to evaluate
+    :type unresolved: :class:`~modern_urwid.resource.dummies.UnresolvedResource`
+    :param scope: Variables that take precedence over registered modules
+    :type scope: dict[str, typing.Any], optional
+    :rtype: bool
+    """
+    accessor = module_registry.get_accessor(unresolved)
+    kind = accessor.get(module_registry, scope)[1]
+    return kind == ResourceAccessor.CONTROLLER_METHOD
 
 
 def resolve_resource(
     module_registry: "ModuleRegistry",
     unresolved: "UnresolvedResource",
     resolve_controllers: bool = True,
+    scope: Union[dict[str, Any], None] = None,
 ) -> Any:
     """Resolve a resource
 
@@ -71,38 +185,13 @@ def resolve_resource(
     :type unresolved: :class:`~modern_urwid.resource.dummies.UnresolvedResource`
     :param resolve_controllers: Whether or not to instance controller classes
     :type resolve_controllers: bool
+    :param scope: Variables that take precedence over registered modules (e.g. the item of a ``mu:for`` row)
+    :type scope: dict[str, typing.Any], optional
     :return: A resolved resource provided by a module
     :rtype: typing.Any
     """
-    path = unresolved.path
-    if path.startswith("@"):
-        path = path[1:]
-
-    attrs = path.split(".")
-    module_name = attrs.pop(0)
-    module = module_registry.get(module_name)
-    target = module
-    for attr in attrs:
-        if isinstance(target, dict):
-            if attr not in target:
-                raise AttributeError(
-                    f"{target} does not have attribute '{attr}' (reading '{unresolved.path}')"
-                )
-            target = target[attr]
-        elif hasattr(target, attr):
-            target = getattr(target, attr)
-        else:
-            raise AttributeError(
-                f"{target} does not have attribute '{attr}' (reading '{unresolved.path}')"
-            )
-
-        if (
-            resolve_controllers
-            and inspect.isclass(target)
-            and issubclass(target, Controller)
-        ):
-            target = target()
-    return target
+    accessor = module_registry.get_accessor(unresolved)
+    return accessor.get(module_registry, scope, resolve_controllers)[0]
 
 
 def import_module(
@@ -0,0 +1,240 @@
+"""
+Optional instrumentation of the compile phases
+"""
+
+from contextlib import nullcontext
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, ContextManager, Union
+
+# returned by measure() when instrumentation is disabled
+NULL_MEASURE: ContextManager[None] = nullcontext()
+
+PHASES = (
+    "xml_parse",
+    "parse_element",
+    "compile_meta_nodes",
+    "import",
+    "parse_stylesheet",
+    "style_get",
+    "build",
+    "attach_children",
+    "after_build",
+    "signals",
+)
+
+
+def null_measure(phase: str, tag: Union[str, None] = None) -> ContextManager[None]:
+    """A measure function that does nothing"""
+    return NULL_MEASURE
+
+
+class PhaseStats:
+    """Call count, total and maximum wall time of a phase"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def __repr__(self) -> str:
+        return f"<PhaseStats count={self.count} total={self.total:.6f} max={self.max:.6f}>"
+
+    def add(self, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def to_dict(self) -> dict[str, Union[int, float]]:
+        return {"count": self.count, "total": self.total, "max": self.max}
+
+
+def add_grouped(
+    groups: dict[str, dict[str, PhaseStats]],
+    key: Union[str, None],
+    phase: str,
+    elapsed: float,
+):
+    """Add a call of a phase to the stats of a group (e.g. a tag), if the key is set"""
+    if key is not None:
+        groups.setdefault(key, {}).setdefault(phase, PhaseStats()).add(elapsed)
+
+
+class Measurement:
+    """Context manager that records the time spent in its block"""
+
+    __slots__ = ("stats", "phase", "tag", "layout", "start")
+
+    def __init__(
+        self,
+        stats: "CompileStats",
+        phase: str,
+        tag: Union[str, None],
+        layout: Union[str, None],
+    ):
+        self.stats = stats
+        self.phase = phase
+        self.tag = tag
+        self.layout = layout
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.stats.record(
+            self.phase, perf_counter() - self.start, self.tag, self.layout
+        )
+
+
+class CompileStats:
+    """Wall time and call counts of the compile phases, in total, per widget tag and per layout
+
+    Pass an instance to :class:`~modern_urwid.context.CompileContext` to enable instrumentation.
+    The phases are listed in :data:`PHASES`.
+
+    :param callback: Called with the phase, elapsed seconds, tag and layout key of every measurement
+    :type callback: typing.Callable[[str, float, str | None, str | None], typing.Any], optional
+    """
+
+    def __init__(
+        self,
+        callback: Union[
+            Callable[[str, float, Union[str, None], Union[str, None]], Any], None
+        ] = None,
+    ):
+        self.callback = callback
+        self.phases: dict[str, PhaseStats] = {}
+        self.tags: dict[str, dict[str, PhaseStats]] = {}
+        self.layouts: dict[str, dict[str, PhaseStats]] = {}
+        # layouts can be parsed from worker threads (see LifecycleManager.register_many)
+        self._lock = Lock()
+
+    def measure(
+        self,
+        phase: str,
+        tag: Union[str, None] = None,
+        layout: Union[str, None] = None,
+    ) -> Measurement:
+        """Measure the time spent in a ``with`` block
+
+        :param phase: The compile phase
+        :type phase: str
+        :param tag: The tag of the node being compiled
+        :type tag: str, optional
+        :param layout: The key of the layout being compiled
+        :type layout: str, optional
+        :rtype: Measurement
+        """
+        return Measurement(self, phase, tag, layout)
+
+    def record(
+        self,
+        phase: str,
+        elapsed: float,
+        tag: Union[str, None] = None,
+        layout: Union[str, None] = None,
+    ):
+        """Record a single call of a phase
+
+        :param phase: The compile phase
+        :type phase: str
+        :param elapsed: The wall time of the call, in seconds
+        :type elapsed: float
+        :param tag: The tag of the node being compiled
+        :type tag: str, optional
+        :param layout: The key of the layout being compiled
+        :type layout: str, optional
+        """
+        with self._lock:
+            self.phases.setdefault(phase, PhaseStats()).add(elapsed)
+            add_grouped(self.tags, tag, phase, elapsed)
+            add_grouped(self.layouts, layout, phase, elapsed)
+        if self.callback is not None:
+            self.callback(phase, elapsed, tag, layout)
+
+    def reset(self):
+        """Clear all recorded stats"""
+        self.phases.clear()
+        self.tags.clear()
+        self.layouts.clear()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get the recorded stats as plain data (e.g. to serialize as JSON)
+
+        :rtype: dict[str, typing.Any]
+        """
+        return {
+            "phases": {name: stats.to_dict() for name, stats in self.phases.items()},
+            "tags": {
+                tag: {name: stats.to_dict() for name, stats in phases.items()}
+                for tag, phases in self.tags.items()
+            },
+            "layouts": {
+                layout: {name: stats.to_dict() for name, stats in phases.items()}
+                for layout, phases in self.layouts.items()
+            },
+        }
+
+
+class RuntimeStats(CompileStats):
+    """Wall time and call counts of a running MainLoop, in total, per callback name and per layout
+
+    Used by :class:`~modern_urwid.lifecycle.profiler.RuntimeProfiler`. The name passed to
+    :meth:`measure` is a callback name, and is kept under ``callbacks`` instead of ``tags``.
+
+    :param callback: Called with the phase, elapsed seconds, callback name and layout key of every measurement
+    :type callback: typing.Callable[[str, float, str | None, str | None], typing.Any], optional
+    """
+
+    def __init__(
+        self,
+        callback: Union[
+            Callable[[str, float, Union[str, None], Union[str, None]], Any], None
+        ] = None,
+    ):
+        super().__init__(callback)
+        self.callbacks: dict[str, dict[str, PhaseStats]] = {}
+
+    def record(
+        self,
+        phase: str,
+        elapsed: float,
+        name: Union[str, None] = None,
+        layout: Union[str, None] = None,
+    ):
+        """Record a single call of a phase
+
+        :param phase: The phase
+        :type phase: str
+        :param elapsed: The wall time of the call, in seconds
+        :type elapsed: float
+        :param name: The name of the callback that was called
+        :type name: str, optional
+        :param layout: The current layout
+        :type layout: str, optional
+        """
+        with self._lock:
+            self.phases.setdefault(phase, PhaseStats()).add(elapsed)
+            add_grouped(self.callbacks, name, phase, elapsed)
+            add_grouped(self.layouts, layout, phase, elapsed)
+        if self.callback is not None:
+            self.callback(phase, elapsed, name, layout)
+
+    def reset(self):
+        """Clear all recorded stats"""
+        super().reset()
+        self.callbacks.clear()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get the recorded stats as plain data (e.g. to serialize as JSON)
+
+        :rtype: dict[str, typing.Any]
+        """
+        data = super().to_dict()
+        del data["tags"]
+        data["callbacks"] = {
+            name: {phase: stats.to_dict() for phase, stats in phases.items()}
+            for name, phases in self.callbacks.items()
+        }
+        return data
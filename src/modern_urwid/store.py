@@ -0,0 +1,200 @@
+"""
+Observable data that layouts can bind widget attributes to
+"""
+
+import weakref
+from typing import TYPE_CHECKING, Any, Union
+
+from modern_urwid.constants import STORE_NAME
+from modern_urwid.resource.dummies import UnresolvedResource, UnresolvedTemplate
+
+if TYPE_CHECKING:
+    import urwid
+
+    from modern_urwid.widgets.builder import WidgetBuilder
+
+
+def get_store_keys(
+    value: Union[UnresolvedResource, UnresolvedTemplate],
+) -> frozenset[Union[str, None]]:
+    """Get the store keys an attribute value reads
+
+    :param value: The attribute value
+    :type value: UnresolvedResource | UnresolvedTemplate
+    :return: The top level keys read from the store. ``None`` is included
+        if the whole store is read (e.g. ``@store``)
+    :rtype: frozenset[str | None]
+    """
+    if isinstance(value, UnresolvedResource):
+        path = value.path[1:] if value.path.startswith("@") else value.path
+        paths = [path]
+    else:
+        paths = [resource.path for resource in value.dependencies]
+
+    keys: set[Union[str, None]] = set()
+    for path in paths:
+        root, _, rest = path.partition(".")
+        if root == STORE_NAME:
+            keys.add(rest.split(".", 1)[0] or None)
+    return frozenset(keys)
+
+
+class Binding:
+    """Keeps a widget attribute in sync with the store
+
+    :param builder: The builder that created the widget, used to resolve the value
+    :type builder: WidgetBuilder
+    :param widget: The widget created by the builder (a weak reference is kept)
+    :type widget: urwid.Widget
+    :param name: The name of the attribute
+    :type name: str
+    :param value: The unresolved attribute value
+    :type value: UnresolvedResource | UnresolvedTemplate
+    """
+
+    def __init__(
+        self,
+        builder: "WidgetBuilder",
+        widget: "urwid.Widget",
+        name: str,
+        value: Union[UnresolvedResource, UnresolvedTemplate],
+    ):
+        self.builder = builder
+        self.widget = weakref.ref(widget)
+        self.name = name
+        self.value = value
+
+    def update(self) -> bool:
+        """Resolve the value again and apply it to the widget
+
+        :return: True if the widget is still alive and was updated
+        :rtype: bool
+        """
+        if (widget := self.widget()) is None:
+            return False
+        return self.builder.update_attr(
+            widget, self.name, self.builder.resolve_value(self.value)
+        )
+
+
+class DataStore:
+    """Observable key-value store, available to layouts as the ``store`` resource
+
+    Attributes that read the store (e.g. ``markup="CPU: {store.cpu}%"``) are bound to
+    their widgets when the widgets are created. Changing a key marks only the bindings
+    that read it as dirty, and all changes made within one frame are applied together
+    from a single mainloop alarm, so the screen is redrawn at most once per frame.
+    Without a mainloop, changes are applied immediately.
+
+    :param frame_time: The minimum number of seconds between updates
+    :type frame_time: float, optional
+    """
+
+    def __init__(self, frame_time: float = 1 / 30):
+        self.data: dict[str, Any] = {}
+        self.frame_time = frame_time
+        self.bindings: dict[Union[str, None], list[Binding]] = {}
+        self.dirty: set[str] = set()
+        self.loop: Union["urwid.MainLoop", None] = None
+        self._alarm = None
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __setitem__(self, key: str, value: Any):
+        self.set(key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a value from the store"""
+        return self.data.get(key, default)
+
+    def set(self, key: str, value: Any):
+        """Set a value and schedule an update of the widgets bound to it
+
+        :param key: The key to set
+        :type key: str
+        :param value: The new value
+        :type value: typing.Any
+        """
+        self.data[key] = value
+        self.touch(key)
+
+    def update(self, values: Union[dict[str, Any], None] = None, **kwargs):
+        """Set multiple values at once"""
+        values = {**(values or {}), **kwargs}
+        self.data.update(values)
+        self.touch(*values)
+
+    def touch(self, *keys: str):
+        """Mark keys as changed, e.g. after mutating a stored value in place
+
+        :param keys: The keys that changed
+        :type keys: str
+        """
+        self.dirty.update(keys)
+        if self.loop is None:
+            self.flush()
+        elif self._alarm is None:
+            self._alarm = self.loop.set_alarm_in(self.frame_time, self._on_alarm)
+
+    def bind(self, binding: Binding, keys: frozenset[Union[str, None]]):
+        """Update a binding whenever one of the given keys changes
+
+        Bindings of widgets that no longer exist are dropped from these keys first,
+        so keys that never change don't keep them around.
+        """
+        for key in keys:
+            bindings = [b for b in self.bindings.get(key, ()) if b.widget() is not None]
+            bindings.append(binding)
+            self.bindings[key] = bindings
+
+    def attach(self, loop: "urwid.MainLoop"):
+        """Coalesce updates through the given mainloop"""
+        self.detach()
+        self.loop = loop
+
+    def detach(self):
+        """Stop using the mainloop and apply any pending changes"""
+        if self.loop is not None and self._alarm is not None:
+            self.loop.remove_alarm(self._alarm)
+        self._alarm = None
+        self.loop = None
+        self.flush()
+
+    def _on_alarm(self, loop: "urwid.MainLoop", user_data: Any = None):
+        self._alarm = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Apply all pending changes now
+
+        :return: The number of widgets that were updated
+        :rtype: int
+        """
+        if not self.dirty:
+            return 0
+        if self.loop is not None and self._alarm is not None:
+            self.loop.remove_alarm(self._alarm)
+            self._alarm = None
+        keys, self.dirty = self.dirty, set()
+
+        updated = 0
+        seen = set()
+        for key in (*keys, None):
+            if not (bindings := self.bindings.get(key)):
+                continue
+            alive = []
+            for binding in bindings:
+                if binding.widget() is None:
+                    continue
+                alive.append(binding)
+                if id(binding) in seen:
+                    continue
+                seen.add(id(binding))
+                if binding.update():
+                    updated += 1
+            self.bindings[key] = alive
+        return updated
@@ -1,26 +1,21 @@
 """
 Utilities to parse CSS rules
+
+``cssselect2``, ``lxml`` and ``tinycss2`` are imported on first use, so importing
+this module does not slow down programs that never parse a stylesheet.
 """
 
 from pathlib import Path
-from typing import Union
+from typing import TYPE_CHECKING, Union
 
-import cssselect2
-import lxml.etree
-import tinycss2
-from tinycss2.ast import (
-    Declaration,
-    FunctionBlock,
-    HashToken,
-    IdentToken,
-    Node,
-    WhitespaceToken,
-)
+if TYPE_CHECKING:
+    import cssselect2
+    from tinycss2.ast import Declaration, IdentToken, Node
 
 
 def create_wrapper(
     tag: str, id: Union[str, None] = None, classes: Union[str, None] = None
-) -> cssselect2.ElementWrapper:
+) -> "cssselect2.ElementWrapper":
     """Create a wrapper for styling
 
     :param tag: The tag for the element
@@ -32,6 +27,9 @@ def create_wrapper(
     :return: An element wrapper made from the provided settings
     :rtype: cssselect2.ElementWrapper
     """
+    import cssselect2
+    import lxml.etree
+
     element = lxml.etree.Element(tag)
     if id:
         element.set("id", id)
@@ -60,6 +58,8 @@ def pop_pseudos_from_tokens(tokens):
 
 
 def split_tokens_by_comma(tokens):
+    from tinycss2.ast import WhitespaceToken
+
     selectors = []
     current = []
     for token in tokens:
@@ -76,13 +76,16 @@ def split_tokens_by_comma(tokens):
 
 
 def get_props(tokens, variables):
+    import tinycss2
+    from tinycss2.ast import FunctionBlock, HashToken, IdentToken
+
     modified = [
         IdentToken(-1, -1, variables.get(token.arguments[0].value))
         if isinstance(token, FunctionBlock)
         else token
         for token in tokens
     ]
-    decls: list[Declaration] = tinycss2.parse_declaration_list(
+    decls: list["Declaration"] = tinycss2.parse_declaration_list(
         modified, skip_comments=True, skip_whitespace=True
     )
     return {
@@ -98,11 +101,11 @@ def get_props(tokens, variables):
     }
 
 
-def get_tokens_value(tokens: list[Node]) -> str:
+def get_tokens_value(tokens: list["Node"]) -> str:
     return "".join([token.serialize() for token in tokens])
 
 
-def split_decl(tokens: list[Node]) -> list[tuple[IdentToken, list[Node]]]:
+def split_decl(tokens: list["Node"]) -> list[tuple["IdentToken", list["Node"]]]:
     result = []
     name = []
     value = []
@@ -126,6 +129,9 @@ def split_decl(tokens: list[Node]) -> list[tuple[IdentToken, list[Node]]]:
 def parse_stylesheet(
     path: Path, variable_overrides: dict[str, str] = {}
 ) -> tuple[list[tuple], dict]:
+    import cssselect2
+    import tinycss2
+
     if not path.exists():
         raise FileNotFoundError(
             f"Could not find stylesheet: {path.absolute()} does not exist"
@@ -136,7 +142,7 @@ def parse_stylesheet(
         )
 
     variables = variable_overrides.copy()
-    rules: list[Node] = tinycss2.parse_stylesheet(
+    rules: list["Node"] = tinycss2.parse_stylesheet(
         path.read_text(),
         skip_comments=True,
         skip_whitespace=True,
@@ -154,7 +160,7 @@ def parse_stylesheet(
                 if name not in variables:
                     variables[name] = value
 
-        element_selectors: list[list[Node]] = split_tokens_by_comma(rule.prelude)
+        element_selectors: list[list["Node"]] = split_tokens_by_comma(rule.prelude)
         props = get_props(rule.content, variables)
         for selectors in element_selectors:
             compiled = cssselect2.compile_selector_list(selectors)
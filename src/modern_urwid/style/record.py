@@ -0,0 +1,61 @@
+"""
+Immutable style records
+"""
+
+from typing import NamedTuple
+
+# CSS property name -> record field
+PROPERTY_FIELDS: dict[str, str] = {
+    "color": "color",
+    "background": "background",
+    "monochrome": "monochrome",
+    "color-adv": "color_adv",
+    "background-adv": "background_adv",
+}
+
+
+class StyleRecord(NamedTuple):
+    """Hashable, immutable set of style properties
+
+    Fields are ordered like an urwid palette entry, so ``(name, *record)``
+    can be registered as a palette directly.
+    """
+
+    color: str = ""
+    background: str = ""
+    monochrome: str = ""
+    color_adv: str = ""
+    background_adv: str = ""
+
+    @classmethod
+    def from_dict(cls, props: dict[str, str]) -> "StyleRecord":
+        """Create a record from CSS properties
+
+        :param props: CSS properties (e.g. ``{"color-adv": "#fff"}``)
+        :type props: dict[str, str]
+        :rtype: StyleRecord
+        """
+        return cls().merge(props)
+
+    def merge(self, props: dict[str, str]) -> "StyleRecord":
+        """Get a record with the given CSS properties applied on top of this one
+
+        Unknown properties are ignored. If nothing changes, this record is returned.
+
+        :param props: CSS properties to apply
+        :type props: dict[str, str]
+        :rtype: StyleRecord
+        """
+        changes = {
+            PROPERTY_FIELDS[name]: value
+            for name, value in props.items()
+            if name in PROPERTY_FIELDS
+        }
+        return self._replace(**changes) if changes else self
+
+    def to_dict(self) -> dict[str, str]:
+        """Get the CSS properties of this record
+
+        :rtype: dict[str, str]
+        """
+        return {name: getattr(self, field) for name, field in PROPERTY_FIELDS.items()}
@@ -2,17 +2,52 @@
 Handles storing styling rules
 """
 
-from typing import TYPE_CHECKING, Union
-
-from cssselect2 import Matcher
-from dict_hash import md5
+import weakref
+from collections import Counter
+from collections.abc import Hashable
+from itertools import count
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Union
 
 from modern_urwid.constants import DEFAULT_STYLE
+from modern_urwid.stats import null_measure
+from modern_urwid.style.css_parser import create_wrapper, parse_stylesheet
+from modern_urwid.style.record import StyleRecord
 
 if TYPE_CHECKING:
+    from cssselect2 import Matcher
     from cssselect2.tree import ElementWrapper
 
 
+def may_match(selector: Any, key: tuple) -> bool:
+    """Check if a compiled selector can match elements with a style key's tag, ID and
+    classes. Only the parts cssselect2 indexes selectors by are compared, so a
+    selector that may match returns True
+
+    :param selector: The compiled selector
+    :type selector: cssselect2.compiler.CompiledSelector
+    :param key: The style key (tag, ID, classes and starting style)
+    :type key: tuple
+    :rtype: bool
+    """
+    tag, id, classes = key[:3]
+    if selector.never_matches:
+        return False
+    if selector.id is not None and selector.id != id:
+        return False
+    if selector.class_name is not None and selector.class_name not in classes:
+        return False
+    if selector.lower_local_name is not None:
+        return selector.lower_local_name == tag.lower()
+    return True
+
+
+def get_mtime(path: Path) -> Union[int, None]:
+    """Get the modification time of a file, or ``None`` if it does not exist"""
+    return path.stat().st_mtime_ns if path.is_file() else None
+
+
 class StyleRegistry:
     """Registry for styling rules
 
@@ -23,64 +58,568 @@ class StyleRegistry:
     """
 
     def __init__(self, selectors: list[tuple] = [], pseudos: dict = {}):
-        self.matcher = Matcher()
+        # created on first use, so cssselect2 is only imported once styles are needed
+        self._matcher: Union["Matcher", None] = None
+        # everything added to the matcher, in order, so it can be rebuilt
+        self.rule_sources: list[tuple] = []
+        self.pseudo_map = {}
+        self.style_index: dict[
+            tuple, tuple[tuple[StyleRecord, str, Union[str, None]], weakref.WeakSet]
+        ] = {}
+        self.style_keys: weakref.WeakKeyDictionary[Any, tuple] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.style_children: weakref.WeakKeyDictionary[Any, weakref.WeakSet] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.palettes: dict[str, StyleRecord] = {}
+        self.palette_names: dict[StyleRecord, str] = {}
+        self._palette_counter = count()
+        self.new_palettes: list[str] = []
+        self.palette_refs: dict[str, int] = {}
+        self.owners: dict[Hashable, Counter[str]] = {}
+        # the owner of the palette entries of each tracked widget
+        self.tracked: weakref.WeakKeyDictionary[Any, object] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.palette_listeners: list[Callable[[], None]] = []
+        self.resolved: dict[tuple, tuple[StyleRecord, str, Union[str, None]]] = {}
+        self.stylesheets: dict[tuple, tuple[list[tuple], dict]] = {}
+        # stylesheets can be parsed from worker threads (see
+        # LifecycleManager.register_many)
+        self._stylesheet_lock = Lock()
+        # the modification time each stylesheet had when its rules were registered,
+        # keyed by its path and variable overrides
+        self.registered_stylesheets: dict[tuple[Path, frozenset], Union[int, None]] = {}
+        # set by CompileContext when instrumentation is enabled
+        self.measure: Callable[..., ContextManager[None]] = null_measure
         if selectors:
             self.add_selectors(selectors)
-        self.pseudo_map = pseudos.copy()
-        self.palettes = {}
+        if pseudos:
+            self.add_pseudos(pseudos)
+
+    @property
+    def matcher(self) -> "Matcher":
+        """The ``cssselect2`` matcher holding all registered rules"""
+        if self._matcher is None:
+            from cssselect2 import Matcher
+
+            self._matcher = Matcher()
+        return self._matcher
+
+    def intern(self, style: StyleRecord) -> str:
+        """Get the palette name for a style, registering it if needed
+
+        :param style: The style to intern
+        :type style: StyleRecord
+        :return: The urwid palette name for the style
+        :rtype: str
+        """
+        if (name := self.palette_names.get(style)) is None:
+            name = f"mu{next(self._palette_counter)}"
+            self.palette_names[style] = name
+            self.new_palettes.append(name)
+        # released styles keep their name, since screens can not unregister entries
+        self.palettes.setdefault(name, style)
+        return name
+
+    def acquire(self, owner: Hashable, *names: Union[str, None]):
+        """Mark palette entries as used by an owner (e.g. a layout key)
+
+        Entries are dropped once every owner that acquired them is released.
+        Entries that were never acquired are kept forever.
+
+        :param owner: The owner of the entries
+        :type owner: collections.abc.Hashable
+        :param names: The palette names to acquire
+        :type names: str
+        """
+        counter = self.owners.setdefault(owner, Counter())
+        for name in names:
+            if name is not None and name in self.palettes:
+                counter[name] += 1
+                self.palette_refs[name] = self.palette_refs.get(name, 0) + 1
+
+    def release(self, owner: Hashable, *names: Union[str, None]):
+        """Release all palette entries acquired by an owner
+
+        Entries that are no longer used are removed from :meth:`get_palettes`. Their
+        styles keep the same palette name if they are used again.
+
+        :param owner: The owner of the entries
+        :type owner: collections.abc.Hashable
+        :param names: If provided, only release one reference to each of these names
+            (e.g. the names acquired for part of a layout)
+        :type names: str
+        """
+        if not names:
+            if (counter := self.owners.pop(owner, None)) is None:
+                return
+        else:
+            if (owned := self.owners.get(owner)) is None:
+                return
+            counter = Counter()
+            for name in names:
+                if name is not None and owned[name] > counter[name]:
+                    counter[name] += 1
+            owned.subtract(counter)
+            for name in counter:
+                if owned[name] <= 0:
+                    del owned[name]
+
+        dropped = set()
+        for name, amount in counter.items():
+            if name not in self.palette_refs:
+                continue
+            self.palette_refs[name] -= amount
+            if self.palette_refs[name] <= 0:
+                del self.palette_refs[name]
+                del self.palettes[name]
+                dropped.add(name)
+
+        if dropped:
+            self.resolved = {
+                key: result
+                for key, result in self.resolved.items()
+                if result[1] not in dropped and result[2] not in dropped
+            }
+
+    def track(self, widget: Any, *names: Union[str, None]):
+        """Acquire palette entries for as long as a widget is alive
+
+        Tracking a widget again replaces the entries it acquired before.
+
+        :param widget: The widget using the entries
+        :type widget: typing.Any
+        :param names: The palette names to acquire
+        :type names: str
+        """
+        if (owner := self.tracked.get(widget)) is None:
+            owner = self.tracked[widget] = object()
+            weakref.finalize(widget, self.release, owner)
+        # the entries the widget used before (e.g. before a restyle) are released
+        # after the new ones are acquired, so entries in both are not dropped
+        previous = list(self.owners.get(owner, Counter()).elements())
+        self.acquire(owner, *names)
+        if previous:
+            self.release(owner, *previous)
+
+    def release_with(self, owner: Hashable, widget: Any):
+        """Release an owner's palette entries once a widget is garbage collected
+
+        :param owner: The owner of the entries
+        :type owner: collections.abc.Hashable
+        :param widget: The widget using the entries (e.g. the root of a layout)
+        :type widget: typing.Any
+        """
+        weakref.finalize(widget, self.release, owner)
 
     def get(
-        self, element: "ElementWrapper", default: dict[str, str] = DEFAULT_STYLE
-    ) -> tuple[dict[str, str], str, Union[str, None]]:
-        """Get the style properties and hashes for an element
+        self,
+        element: "ElementWrapper",
+        default: Union[StyleRecord, dict[str, str]] = DEFAULT_STYLE,
+    ) -> tuple[StyleRecord, str, Union[str, None]]:
+        """Get the style properties and palette names for an element
 
         :param element: The element to lookup styles for
         :type element: cssselect2.tree.ElementWrapper
         :param default: The starting style to override
-        :type default: dict[str, str], optional
-        :return: A tuple containing the style properties, the normal style hash, and the focus style hash (if applicable)
-        :rtype: tuple[dict[str, str], str, str | None]
+        :type default: StyleRecord | dict[str, str], optional
+        :return: A tuple containing the style record, the normal palette name, and the focus palette name (if applicable)
+        :rtype: tuple[StyleRecord, str, str | None]
         """
-        style = default.copy()
+        if isinstance(default, dict):
+            default = StyleRecord.from_dict(default)
+
+        with self.measure("style_get"):
+            return self._get(element, default)
+
+    def _get(
+        self, element: "ElementWrapper", default: StyleRecord
+    ) -> tuple[StyleRecord, str, Union[str, None]]:
+        style = default
         pseudos = {}
         if matches := self.matcher.match(element):
             matches.sort()
             for match in matches:
                 specificity, order, pseudo, payload = match
                 sel_str, data = payload
-                style.update(data)
+                style = style.merge(data)
 
                 # Default to 8-bit colors if true colors are not defined
                 if "color-adv" not in data:
-                    style["color-adv"] = style["color"]
+                    style = style._replace(color_adv=style.color)
 
                 if "background-adv" not in data:
-                    style["background-adv"] = style["background"]
+                    style = style._replace(background_adv=style.background)
 
                 if sel_str in self.pseudo_map:
                     pseudos = self.pseudo_map[sel_str]
 
-        normal_hash = md5(style)
-        if normal_hash not in self.palettes:
-            self.palettes[normal_hash] = style
+        normal_name = self.intern(style)
+        style = self.palettes[normal_name]
+
+        focus_name = normal_name
+        if "focus" in pseudos:
+            focus_name = self.intern(style.merge(pseudos["focus"]))
+
+        return style, normal_name, focus_name
+
+    def resolve(
+        self,
+        tag: str,
+        id: Union[str, None] = None,
+        classes: Union[str, None] = None,
+        default: Union[StyleRecord, dict[str, str]] = DEFAULT_STYLE,
+    ) -> tuple[StyleRecord, str, Union[str, None]]:
+        """Get the style properties and palette names for an element, memoizing the result
+
+        Unlike :meth:`get`, no element wrapper is created if an element with the same
+        tag, ID, classes and starting style was resolved before.
+
+        :param tag: The tag for the element
+        :type tag: str
+        :param id: The ID for the element
+        :type id: str, optional
+        :param classes: The classes for the element
+        :type classes: str, optional
+        :param default: The starting style to override
+        :type default: StyleRecord | dict[str, str], optional
+        :return: A tuple containing the style record, the normal palette name, and the focus palette name (if applicable)
+        :rtype: tuple[StyleRecord, str, str | None]
+        """
+        key = self._resolve_key(tag, id, classes, default)
+        if (result := self.resolved.get(key)) is None:
+            result = self.get(create_wrapper(tag, id, classes), key[3])
+            self.resolved[key] = result
+        return result
+
+    def _resolve_key(
+        self,
+        tag: str,
+        id: Union[str, None],
+        classes: Union[str, None],
+        default: Union[StyleRecord, dict[str, str]],
+    ) -> tuple[str, Union[str, None], tuple[str, ...], StyleRecord]:
+        if isinstance(default, dict):
+            default = StyleRecord.from_dict(default)
+        return (
+            tag,
+            id,
+            tuple(sorted(set(classes.split()))) if classes else (),
+            default,
+        )
+
+    def register_widget(
+        self,
+        widget: Any,
+        tag: str,
+        id: Union[str, None] = None,
+        classes: Union[str, None] = None,
+        default: Union[StyleRecord, dict[str, str]] = DEFAULT_STYLE,
+        parent: Any = None,
+    ):
+        """Index a style map, so it is updated by :meth:`restyle` when the style rules change
+
+        If the parent's style map was restyled since ``default`` was resolved, the
+        widget is restyled right away.
+
+        :param widget: The style map of the element
+        :type widget: urwid.AttrMap
+        :param tag: The tag for the element
+        :type tag: str
+        :param id: The ID for the element
+        :type id: str, optional
+        :param classes: The classes for the element
+        :type classes: str, optional
+        :param default: The style inherited from the parent element
+        :type default: StyleRecord | dict[str, str], optional
+        :param parent: The style map of the parent element, which ``default`` is inherited from
+        :type parent: urwid.AttrMap, optional
+        """
+        if parent is not None and (parent_key := self.style_keys.get(parent)):
+            self.style_children.setdefault(parent, weakref.WeakSet()).add(widget)
+            default = self.style_index[parent_key][0][0]
+
+        self._apply_style(widget, self._resolve_key(tag, id, classes, default))
+
+    def transfer(self, source: Any, target: Any):
+        """Make a style map take over the index entries of another one (e.g. after
+        moving the other map's contents into it)
+
+        :param source: The style map to take the entries from
+        :type source: urwid.AttrMap
+        :param target: The style map to give the entries to
+        :type target: urwid.AttrMap
+        """
+        if (key := self.style_keys.pop(source, None)) is not None:
+            self.style_index[key][1].discard(source)
+            self._apply_style(target, key)
+        if (children := self.style_children.pop(source, None)) is not None:
+            self.style_children[target] = children
+
+    def _apply_style(self, widget: Any, key: tuple):
+        result = self.resolve(key[0], key[1], " ".join(key[2]) or None, key[3])
 
-        focus_hash = normal_hash
-        if (
-            "focus" in pseudos
-            and (focus_hash := md5(pseudos["focus"])) not in self.palettes
+        if (old_key := self.style_keys.get(widget)) is not None and old_key != key:
+            self.style_index[old_key][1].discard(widget)
+        self.style_keys[widget] = key
+        if (entry := self.style_index.get(key)) is None:
+            entry = self.style_index[key] = (result, weakref.WeakSet())
+        entry[1].add(widget)
+
+        _, name, focus_name = result
+        if widget.get_attr_map() != {None: name} or widget.get_focus_map() != (
+            {None: focus_name} if focus_name else None
         ):
-            self.palettes[focus_hash] = {**style.copy(), **pseudos["focus"]}
+            widget.set_attr_map({None: name})
+            widget.set_focus_map({None: focus_name} if focus_name else None)
+            self.track(widget, name, focus_name)
+
+    def _invalidate(self, selectors: Union[list, None]) -> Callable[[tuple], bool]:
+        """Drop the memoized styles that the given selectors can change
+
+        :param selectors: The compiled selectors that were added, or ``None`` if
+            any style may have changed
+        :type selectors: list[cssselect2.compiler.CompiledSelector], optional
+        :return: A function that checks if a style key may have changed
+        :rtype: typing.Callable[[tuple], bool]
+        """
+        if selectors is None:
+            self.resolved.clear()
+            return lambda key: True
+
+        # selectors with the same tag, ID and class can not change different keys
+        selectors = list(
+            {
+                (s.lower_local_name, s.id, s.class_name): s
+                for s in selectors
+                if not s.never_matches
+            }.values()
+        )
+
+        def changed(key: tuple) -> bool:
+            return any(may_match(selector, key) for selector in selectors)
+
+        self.resolved = {
+            key: result for key, result in self.resolved.items() if not changed(key)
+        }
+        return changed
+
+    def restyle(self, selectors: Union[list, None] = None) -> int:
+        """Update all indexed style maps whose style changed since they were resolved
+
+        Only the affected style maps and the ones inheriting from them are updated.
+
+        :param selectors: The compiled selectors that were added. If provided, only
+            style maps these selectors can match are resolved again
+        :type selectors: list[cssselect2.compiler.CompiledSelector], optional
+        :return: The number of updated style maps
+        :rtype: int
+        """
+        changed = self._invalidate(selectors)
+        restyled: set[int] = set()
+
+        def update(widget: Any, key: tuple):
+            self._apply_style(widget, key)
+            restyled.add(id(widget))
+            style = self.style_index[key][0][0]
+            for child in list(self.style_children.get(widget, ())):
+                if (child_key := self.style_keys.get(child)) is not None:
+                    update(child, (*child_key[:3], style))
 
-        return style, normal_hash, focus_hash
+        for key, (result, widgets) in list(self.style_index.items()):
+            if not widgets:
+                del self.style_index[key]
+                continue
+            if not changed(key):
+                continue
+
+            new_result = self.resolve(key[0], key[1], " ".join(key[2]) or None, key[3])
+            if new_result == result:
+                continue
+
+            self.style_index[key] = (new_result, widgets)
+            for widget in list(widgets):
+                if self.style_keys.get(widget) == key:
+                    update(widget, key)
+
+        self.notify_palettes()
+        return len(restyled)
 
     def add_selectors(self, selectors: list[tuple]):
-        """Add selectors to the registry
+        """Add selectors to the registry. Indexed style maps are restyled if needed
 
         :param selectors: List of selectors to register
         :type selectors: list[tuple]
         """
+        self.rule_sources.append(("selectors", selectors))
         for selector in selectors:
             self.matcher.add_selector(*selector)
+        self._rules_added([selector[0] for selector in selectors])
+
+    def add_pseudos(self, pseudo_map: dict):
+        """Add pseudo class overrides to the registry. Indexed style maps are restyled if needed
+
+        :param pseudo_map: Pseudo class overrides, keyed by selector
+        :type pseudo_map: dict
+        """
+        from cssselect2 import SelectorError, compile_selector_list
+
+        self.rule_sources.append(("pseudos", pseudo_map))
+        self.pseudo_map.update(pseudo_map)
+        try:
+            selectors = [
+                selector
+                for sel_str in pseudo_map
+                for selector in compile_selector_list(sel_str)
+            ]
+        except SelectorError:
+            selectors = None
+        self._rules_added(selectors)
+
+    def _rules_added(self, selectors: Union[list, None], restyle: bool = True):
+        """Drop the memoized styles that new rules can change, and restyle the
+        affected style maps
+
+        :param selectors: The compiled selectors of the new rules, or ``None`` if
+            any style may have changed
+        :type selectors: list[cssselect2.compiler.CompiledSelector], optional
+        :param restyle: Whether or not to restyle the indexed style maps
+        :type restyle: bool, optional
+        """
+        if restyle and self.style_index:
+            self.restyle(selectors)
+        else:
+            self._invalidate(selectors)
+
+    def _stylesheet_key(
+        self, path: Path, variable_overrides: dict[str, str]
+    ) -> tuple[Path, Union[int, None], frozenset]:
+        path = path.resolve()
+        return path, get_mtime(path), frozenset(variable_overrides.items())
+
+    def parse_stylesheet(
+        self, path: Path, variable_overrides: dict[str, str] = {}
+    ) -> tuple[list[tuple], dict]:
+        """Parse a stylesheet, reusing the result of earlier calls if the file is unchanged
+
+        :param path: The path to the stylesheet
+        :type path: pathlib.Path
+        :param variable_overrides: CSS variables to override
+        :type variable_overrides: dict[str, str], optional
+        :return: The parsed selectors and pseudo class map
+        :rtype: tuple[list[tuple], dict]
+        """
+        key = self._stylesheet_key(path, variable_overrides)
+        with self._stylesheet_lock:
+            if (parsed := self.stylesheets.get(key)) is None:
+                with self.measure("parse_stylesheet"):
+                    parsed = parse_stylesheet(key[0], variable_overrides)
+                self.stylesheets[key] = parsed
+        return parsed
+
+    def load_stylesheet(
+        self,
+        path: Path,
+        variable_overrides: dict[str, str] = {},
+        restyle: bool = True,
+    ):
+        """Parse a stylesheet and register its rules
+
+        Stylesheets that were already registered with the same variable overrides only
+        add their rules once. If the file changed since it was registered, its old
+        rules are replaced by the new ones.
+
+        :param path: The path to the stylesheet
+        :type path: pathlib.Path
+        :param variable_overrides: CSS variables to override
+        :type variable_overrides: dict[str, str], optional
+        :param restyle: Whether or not to restyle existing style maps that the new rules
+            match. Layouts loading their own stylesheets while they are compiled skip
+            this, like styles resolved before the stylesheet was loaded
+        :type restyle: bool, optional
+        """
+        path = path.resolve()
+        key = (path, frozenset(variable_overrides.items()))
+        mtime = get_mtime(path)
+        if key in self.registered_stylesheets:
+            if self.registered_stylesheets[key] != mtime:
+                self._rebuild_matcher()
+                self._rules_added(None, restyle)
+            return
+
+        selectors, pseudo_map = self.parse_stylesheet(path, variable_overrides)
+        self.rule_sources.append(("stylesheet", key, variable_overrides))
+        for selector in selectors:
+            self.matcher.add_selector(*selector)
+        self.pseudo_map.update(pseudo_map)
+        self.registered_stylesheets[key] = mtime
+        self._rules_added([selector[0] for selector in selectors], restyle)
+
+    def get_stylesheet_paths(self) -> list[Path]:
+        """Get the paths of all registered stylesheets
+
+        :rtype: list[pathlib.Path]
+        """
+        return list(
+            dict.fromkeys(
+                source[1][0]
+                for source in self.rule_sources
+                if source[0] == "stylesheet"
+            )
+        )
+
+    def reload_stylesheets(self) -> int:
+        """Re-read the registered stylesheets whose files changed, and restyle the
+        affected style maps
+
+        :return: The number of updated style maps
+        :rtype: int
+        """
+        if all(
+            mtime == get_mtime(key[0])
+            for key, mtime in self.registered_stylesheets.items()
+        ):
+            return 0
+        self._rebuild_matcher()
+        return self.restyle()
+
+    def _rebuild_matcher(self):
+        """Register all rule sources again, reading the current version of each stylesheet"""
+        # cssselect2 can not remove selectors, so rebuild the matcher
+        self._matcher = None
+        self.pseudo_map = {}
+        for source in self.rule_sources:
+            if source[0] == "selectors":
+                selectors, pseudo_map = source[1], {}
+            elif source[0] == "pseudos":
+                selectors, pseudo_map = [], source[1]
+            else:
+                _, key, variable_overrides = source
+                self.registered_stylesheets[key] = get_mtime(key[0])
+                selectors, pseudo_map = self.parse_stylesheet(
+                    key[0], variable_overrides
+                )
+            for selector in selectors:
+                self.matcher.add_selector(*selector)
+            self.pseudo_map.update(pseudo_map)
+
+    def pop_new_palettes(self) -> list[tuple]:
+        """Get palettes added since the last call, in urwid form
+
+        :return: A list of palettes, in urwid form
+        :rtype: list[tuple]
+        """
+        names, self.new_palettes = self.new_palettes, []
+        return [(name, *self.palettes[name]) for name in names if name in self.palettes]
+
+    def notify_palettes(self):
+        """Notify listeners (e.g. :class:`~modern_urwid.lifecycle.manager.LifecycleManager`) that
+        palette entries may have been added outside of a layout compile"""
+        if self.new_palettes:
+            for listener in self.palette_listeners:
+                listener()
 
     def get_palettes(self) -> list[tuple]:
         """Get palettes for registered style rules
@@ -88,4 +627,4 @@ class StyleRegistry:
         :return: A list of palettes, in urwid form
         :rtype: list[tuple]
         """
-        return [(hash, *style.values()) for hash, style in self.palettes.items()]
+        return [(name, *style) for name, style in self.palettes.items()]
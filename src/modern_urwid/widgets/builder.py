@@ -1,9 +1,8 @@
-import string
-from typing import TYPE_CHECKING, Any, Union
+from typing import TYPE_CHECKING, Any, Callable, Union
 
 from modern_urwid.resource.dummies import UnresolvedResource, UnresolvedTemplate
 from modern_urwid.resource.utils import (
-    is_class_method,
+    ResourceAccessor,
     resolve_resource,
     wrap_callback,
 )
@@ -32,6 +31,13 @@ class WidgetBuilder:
     """
 
     tag: Union[str, None] = None
+    # Variables visible to resources and templates (e.g. the item of a mu:for row)
+    scope: dict[str, Any] = {}
+    # Attribute values that were already resolved when the layout was planned
+    preset_attrs: Union[dict[str, Any], None] = None
+    # Widget methods used to update attributes bound to the data store,
+    # for attributes whose setter is not named ``set_<attribute>``
+    setters: dict[str, str] = {"markup": "set_text", "current": "set_completion"}
 
     def __init__(self, node: Union["LayoutNode", None], context: "CompileContext"):
         self.node = node
@@ -48,6 +54,25 @@ class WidgetBuilder:
     ):
         raise NotImplementedError
 
+    def attach_lazy_children(
+        self,
+        widget: "Widget",
+        nodes: list["LayoutNode"],
+        compile_child: Callable[
+            ["LayoutNode"], tuple["Widget", "SizeOptions", "Metadata"]
+        ],
+        release_child: Union[Callable[["LayoutNode"], None], None] = None,
+    ) -> bool:
+        """
+        Optional hook to compile children on demand instead of up front.
+        Return True if the children were attached, in which case :meth:`attach_children`
+        is not called. ``compile_child`` compiles a single child row, which is either a
+        node or a ``(node, scope)`` tuple for rows stamped out by ``mu:for``.
+        ``release_child`` should be called with a row once its widget is dropped, to
+        unmap its ``mu:id`` values and release its palette entries.
+        """
+        return False
+
     def after_build(self, widget: "AttrMap") -> "Widget":
         """
         Optional hook to wrap or modify the widget after creation.
@@ -55,21 +80,50 @@ class WidgetBuilder:
         """
         return widget
 
+    def update_attr(self, widget: "Widget", name: str, value: Any) -> bool:
+        """Update an attribute of a widget created by this builder. Used when data
+        bound to the attribute changes.
+
+        :param widget: The widget returned by :meth:`build`
+        :type widget: urwid.Widget
+        :param name: The name of the attribute
+        :type name: str
+        :param value: The new, resolved value
+        :type value: typing.Any
+        :return: True if the widget was updated
+        :rtype: bool
+        """
+        setter = getattr(widget, self.setters.get(name, f"set_{name}"), None)
+        if setter is None:
+            return False
+        setter(value)
+        return True
+
     def resolve_resource(self, unresolved: UnresolvedResource):
         """Resolve a module attribute."""
-        return resolve_resource(self.context.module_registry, unresolved)
+        return resolve_resource(
+            self.context.module_registry, unresolved, scope=self.scope
+        )
 
     def resolve_template(self, unresolved: UnresolvedTemplate):
         """Resolve a string template."""
-        value = unresolved.value
-        variables = [
-            field for _, field, _, _ in string.Formatter().parse(value) if field
-        ]
-        for variable in variables:
-            value = value.replace(
-                f"{{{variable}}}",
-                str(self.resolve_resource(UnresolvedResource(variable))),
-            )
+        return unresolved.render(self.context.module_registry, self.scope)
+
+    def resolve_value(self, value: Any) -> Any:
+        """Resolve a single attribute value. Callable resources are wrapped so they
+        receive this builder's node (and the context, unless they are controller methods)"""
+        if isinstance(value, UnresolvedResource):
+            registry = self.context.module_registry
+            resource, kind = registry.get_accessor(value).get(registry, self.scope)
+            if kind == ResourceAccessor.CONTROLLER_METHOD:
+                resource = wrap_callback(resource, self.node, context=self.context)
+            elif kind == ResourceAccessor.CALLABLE:
+                resource = wrap_callback(
+                    resource, self.node, self.context, context=self.context
+                )
+            return resource
+        elif isinstance(value, UnresolvedTemplate):
+            return self.resolve_template(value)
         return value
 
     def resolve_attrs(self) -> dict[str, Any]:
@@ -79,16 +133,9 @@ class WidgetBuilder:
         :rtype: dict[str, typing.Any]"""
         if self.node is None:
             return {}
-        kwargs = self.node.attrs.copy()
-        for k, v in kwargs.items():
-            if isinstance(v, UnresolvedResource):
-                resource = self.resolve_resource(v)
-                if callable(resource):
-                    if is_class_method(self.context.module_registry, v):
-                        resource = wrap_callback(resource, self.node)
-                    else:
-                        resource = wrap_callback(resource, self.node, self.context)
-                kwargs[k] = resource
-            elif isinstance(v, UnresolvedTemplate):
-                kwargs[k] = self.resolve_template(v)
-        return kwargs
+        if self.preset_attrs is None:
+            return {k: self.resolve_value(v) for k, v in self.node.attrs.items()}
+        return {
+            k: self.preset_attrs[k] if k in self.preset_attrs else self.resolve_value(v)
+            for k, v in self.node.attrs.items()
+        }
@@ -1,87 +1,165 @@
-import inspect
+from typing import TYPE_CHECKING, Any, Union
 
 import urwid
 
 from .builder import WidgetBuilder
+from .walkers import LazyListWalker
 
+if TYPE_CHECKING:
+    from modern_urwid.xml.ast import LayoutNode
 
-def find_urwid_class(tag: str):
-    tag = tag.lower()
-    for name, cls in inspect.getmembers(urwid, inspect.isclass):
-        if name.lower() == tag:
-            return cls
-    return None
+
+def missing_widget(tag: str) -> urwid.Widget:
+    """Get the placeholder widget of a tag that is not in the tag index"""
+    return urwid.Filler(urwid.Text(f"Could not find widget {tag} in urwid"))
+
+
+def create_widget(
+    cls: type, strategy: str, text: Union[str, None], kwargs: dict[str, Any]
+) -> urwid.Widget:
+    """Create a widget with the build strategy of its class (see the tag index)
+
+    :param cls: The widget class
+    :type cls: type
+    :param strategy: The build strategy of the class
+    :type strategy: str
+    :param text: The text content of the node
+    :type text: str, optional
+    :param kwargs: The resolved attributes of the node
+    :type kwargs: dict[str, typing.Any]
+    :rtype: urwid.Widget
+    """
+    if strategy == "container":
+        return cls([], **kwargs)
+    elif strategy == "scrollbar":
+        return cls(urwid.ListBox([]))
+    elif strategy == "decoration":
+        return cls(urwid.Text("null"))
+    elif strategy == "text":
+        if text and text.strip():
+            return cls(text, **kwargs)
+        else:
+            text = kwargs.pop("markup", "")
+            if not text:
+                text = kwargs.pop("label", "")
+            if not text:
+                text = kwargs.pop("caption", "")
+            return cls(text, **kwargs)
+    else:
+        return cls(**kwargs)
+
+
+def set_children(widget: urwid.Widget, children: list[tuple]):
+    """Set the children of a container or decoration widget
+
+    :param widget: The parent widget
+    :type widget: urwid.Widget
+    :param children: The children, with their sizing options and metadata
+    :type children: list[tuple[urwid.Widget, SizeOptions, Metadata]]
+    """
+    if hasattr(widget, "contents"):
+        try:
+            setattr(
+                widget,
+                "contents",
+                [
+                    (child, widget.options(sizing.wh_type, sizing.wh_amount))
+                    for child, sizing, _ in children
+                ],
+            )
+        except urwid.WidgetError:
+            setattr(
+                widget,
+                "contents",
+                [(child, widget.options()) for child, _, _ in children],
+            )
+    elif hasattr(widget, "original_widget"):
+        setattr(widget, "original_widget", children[0][0])
+    else:
+        raise ValueError(f"Could not set children for widget {widget}")
+
+
+def set_selectable(widget: urwid.Widget, selectable: bool, children: list[tuple]):
+    """Apply a ``mu:selectable`` override to a widget
+
+    :param widget: The widget
+    :type widget: urwid.Widget
+    :param selectable: Whether or not the widget is selectable
+    :type selectable: bool
+    :param children: The children attached to the widget
+    :type children: list[tuple[urwid.Widget, SizeOptions, Metadata]]
+    """
+    widget._selectable = selectable
+
+    # TODO: extremely hacky
+    if isinstance(widget, (urwid.LineBox)):
+        setattr(
+            widget,
+            "keypress",
+            lambda size, key: children[0][0].keypress(size, key),
+        )
 
 
 class GenericWidgetBuilder(WidgetBuilder):
     tag = "*"
 
     def build(self) -> urwid.Widget:
-        if (cls := find_urwid_class(self.node.tag)) is None:
-            return urwid.Filler(
-                urwid.Text(f"Could not find widget {self.node.tag} in urwid")
-            )
-        kwargs = self.resolve_attrs()
-        if issubclass(
-            cls,
-            urwid.WidgetContainerMixin,
-        ):
-            return cls([], **kwargs)
-        elif cls is urwid.ScrollBar:
-            return cls(urwid.ListBox([]))
-        elif issubclass(
-            cls,
-            urwid.WidgetDecoration,
-        ):
-            return cls(urwid.Text("null"))
-        elif issubclass(cls, urwid.Widget):
-            if issubclass(cls, (urwid.Text, urwid.Button)):
-                if self.node.text and self.node.text.strip():
-                    return cls(self.node.text, **kwargs)
-                else:
-                    text = kwargs.pop("markup", "")
-                    if not text:
-                        text = kwargs.pop("label", "")
-                    if not text:
-                        text = kwargs.pop("caption", "")
-                    return cls(text, **kwargs)
-            else:
-                return cls(**kwargs)
-        else:
-            return urwid.Filler(
-                urwid.Text(f"Could not find widget {self.node.tag} in urwid")
-            )
+        if (entry := self.context.widget_registry.tag_index.get(self.node.tag)) is None:
+            return missing_widget(self.node.tag)
+        cls, strategy = entry
+        return create_widget(cls, strategy, self.node.text, self.resolve_attrs())
 
     def attach_children(self, widget, children):
-        if hasattr(widget, "contents"):
-            try:
-                setattr(
-                    widget,
-                    "contents",
-                    [
-                        (child, widget.options(sizing.wh_type, sizing.wh_amount))
-                        for child, sizing, _ in children
-                    ],
-                )
-            except urwid.WidgetError:
-                setattr(
-                    widget,
-                    "contents",
-                    [(child, widget.options()) for child, _, _ in children],
-                )
-        elif hasattr(widget, "original_widget"):
-            setattr(widget, "original_widget", children[0][0])
-        else:
-            raise ValueError(f"Could not set children for widget {widget}")
+        set_children(widget, children)
 
 
 class ListBoxBuilder(WidgetBuilder):
     tag = "listbox"
 
     def build(self) -> urwid.ListBox:
-        kwargs = {"body": urwid.SimpleFocusListWalker([])}
+        if self.node is not None and self.node.get_meta_attr("lazy") is True:
+            cache_size = self.node.get_meta_attr("cache_size", 100)
+            if not isinstance(cache_size, int):
+                raise TypeError(f"mu:cache_size '{cache_size}' is not an int")
+            body = LazyListWalker(cache_size=cache_size)
+        else:
+            body = urwid.SimpleFocusListWalker([])
+        kwargs = {"body": body}
         kwargs.update(self.resolve_attrs())
         return urwid.ListBox(**kwargs)
 
     def attach_children(self, widget, children):
         widget.body.extend([child for child, sizing, _ in children])
+
+    def attach_lazy_children(self, widget, nodes, compile_child, release_child=None):
+        if not isinstance(widget.body, LazyListWalker):
+            return False
+
+        context = self.context
+        key = context.current_key
+
+        def factory(row) -> urwid.Widget:
+            previous_key, context.current_key = context.current_key, key
+            try:
+                widget = compile_child(row)[0]
+            finally:
+                context.current_key = previous_key
+            context.style_registry.notify_palettes()
+            return widget
+
+        widget.body.factory = factory
+        if release_child is not None:
+            # evicted rows drop their IDs and palette entries, so they can be freed
+            widget.body.on_evict = lambda row, _: release_child(row)
+        widget.body.extend(nodes)
+        return True
+
+
+def get_node_ids(node: "LayoutNode") -> list[str]:
+    """Get all ``mu:id`` values in a node's subtree"""
+    ids = []
+    if isinstance(id := node.meta_attrs.get("id"), str):
+        ids.append(id)
+    for child in node.children:
+        ids.extend(get_node_ids(child))
+    return ids
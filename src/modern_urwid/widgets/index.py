@@ -0,0 +1,113 @@
+"""
+Index of widget classes that can be created from tags without a dedicated builder
+"""
+
+import inspect
+from functools import lru_cache
+from types import ModuleType
+from typing import Literal, Union
+
+import urwid
+
+Strategy = Literal["container", "scrollbar", "decoration", "text", "plain"]
+
+
+def get_strategy(cls: type) -> Union[Strategy, None]:
+    """Get the strategy used to construct a widget class
+
+    :param cls: The widget class
+    :type cls: type
+    :return: The construction strategy, or ``None`` if the class is not a widget
+    :rtype: str | None
+    """
+    try:
+        if issubclass(cls, urwid.WidgetContainerMixin):
+            return "container"
+        elif cls is urwid.ScrollBar:
+            return "scrollbar"
+        elif issubclass(cls, urwid.WidgetDecoration):
+            return "decoration"
+        elif issubclass(cls, (urwid.Text, urwid.Button)):
+            return "text"
+        elif issubclass(cls, urwid.Widget):
+            return "plain"
+    except TypeError:
+        pass
+    return None
+
+
+@lru_cache(maxsize=None)
+def scan_module(
+    module: ModuleType, namespace: Union[str, None] = None
+) -> dict[str, tuple[type, Strategy]]:
+    """Find all widget classes in a module
+
+    :param module: The module to scan
+    :type module: types.ModuleType
+    :param namespace: An XML namespace to place the tags under
+    :type namespace: str, optional
+    :return: A dictionary mapping lowercase tags to their class and construction strategy
+    :rtype: dict[str, tuple[type, str]]
+    """
+    prefix = f"{{{namespace}}}" if namespace else ""
+    entries: dict[str, tuple[type, Strategy]] = {}
+    for name, cls in inspect.getmembers(module, inspect.isclass):
+        if (strategy := get_strategy(cls)) is not None:
+            entries.setdefault(f"{prefix}{name}".lower(), (cls, strategy))
+    return entries
+
+
+class TagIndex:
+    """Maps tags to widget classes and the strategy used to construct them
+
+    Tags are matched case-insensitively. Classes from other modules can be added under
+    an XML namespace, so ``<rl:readlineedit xmlns:rl="urwid_readline" />`` can be
+    used after calling ``index.register_module(urwid_readline, "urwid_readline")``.
+
+    :param modules: The modules to index. Defaults to ``urwid``
+    :type modules: list[types.ModuleType], optional
+    """
+
+    def __init__(self, modules: list[ModuleType] = [urwid]):
+        self.entries: dict[str, tuple[type, Strategy]] = {}
+        for module in modules:
+            self.register_module(module)
+
+    def register_module(self, module: ModuleType, namespace: Union[str, None] = None):
+        """Add all widget classes in a module to the index
+
+        Tags that are already indexed are not overwritten.
+
+        :param module: The module to index
+        :type module: types.ModuleType
+        :param namespace: An XML namespace to place the tags under
+        :type namespace: str, optional
+        """
+        for tag, entry in scan_module(module, namespace).items():
+            self.entries.setdefault(tag, entry)
+
+    def register(
+        self, tag: str, cls: type, strategy: Union[Strategy, None] = None
+    ):
+        """Add a single widget class to the index
+
+        :param tag: The tag to use for the class
+        :type tag: str
+        :param cls: The widget class
+        :type cls: type
+        :param strategy: The construction strategy. Detected from the class if not provided
+        :type strategy: str, optional
+        :raises TypeError: Raises if the class is not an urwid widget
+        """
+        if strategy is None and (strategy := get_strategy(cls)) is None:
+            raise TypeError(f"{cls.__name__} is not an urwid widget")
+        self.entries[tag.lower()] = (cls, strategy)
+
+    def get(self, tag: str) -> Union[tuple[type, Strategy], None]:
+        """Get the class and construction strategy for a tag
+
+        :param tag: The tag to lookup
+        :type tag: str
+        :rtype: tuple[type, str] | None
+        """
+        return self.entries.get(tag.lower())
@@ -1,20 +1,38 @@
-from typing import TYPE_CHECKING, Union
-
-if TYPE_CHECKING:
-    from modern_urwid.widgets.builder import WidgetBuilder
+import inspect
+from functools import lru_cache
+from types import ModuleType
+from typing import Union
 
+from modern_urwid.widgets.builder import WidgetBuilder
 from modern_urwid.widgets.builders import GenericWidgetBuilder, ListBoxBuilder
+from modern_urwid.widgets.index import TagIndex
 
 DEFAULT_BUILDERS = [ListBoxBuilder]
 
 
+@lru_cache(maxsize=None)
+def scan_builders(module: ModuleType) -> tuple[type[WidgetBuilder], ...]:
+    """Find all :class:`~modern_urwid.widgets.builder.WidgetBuilder` subclasses in a module
+
+    :param module: The module to scan
+    :type module: types.ModuleType
+    :rtype: tuple[type[WidgetBuilder], ...]
+    """
+    return tuple(
+        obj
+        for _, obj in inspect.getmembers(module, inspect.isclass)
+        if issubclass(obj, WidgetBuilder) and obj is not WidgetBuilder
+    )
+
+
 class WidgetRegistry:
-    def __init__(self, builders: list[type["WidgetBuilder"]] = []):
-        self.builders: dict[str, type["WidgetBuilder"]] = {}
+    def __init__(self, builders: list[type[WidgetBuilder]] = []):
+        self.builders: dict[str, type[WidgetBuilder]] = {}
+        self.tag_index = TagIndex()
         for builder in DEFAULT_BUILDERS + builders:
             self.register(builder)
 
-    def register(self, builder_cls: Union[type["WidgetBuilder"], None] = None):
+    def register(self, builder_cls: Union[type[WidgetBuilder], None] = None):
         """
         Register a custom widget builder.
 
@@ -24,7 +42,7 @@ class WidgetRegistry:
             ``widget_registry.register(MyCustomBuilder)``
         """
 
-        def decorator(cls: type["WidgetBuilder"]):
+        def decorator(cls: type[WidgetBuilder]):
             if not cls.tag:
                 raise ValueError("WidgetBuilder must define a tag")
             self.builders[cls.tag] = cls
@@ -35,7 +53,19 @@ class WidgetRegistry:
 
         return decorator
 
-    def get(self, tag: str) -> type["WidgetBuilder"]:
+    def register_module(self, module: ModuleType, namespace: Union[str, None] = None):
+        """Register all widget builders in a module, and add its widget classes to the tag index
+
+        :param module: The module to register
+        :type module: types.ModuleType
+        :param namespace: An XML namespace to place the module's widget classes under
+        :type namespace: str, optional
+        """
+        for builder_cls in scan_builders(module):
+            self.register(builder_cls)
+        self.tag_index.register_module(module, namespace)
+
+    def get(self, tag: str) -> type[WidgetBuilder]:
         if builder := self.builders.get(tag):
             return builder
         else:
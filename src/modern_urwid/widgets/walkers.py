@@ -0,0 +1,108 @@
+"""
+List walkers used by the listbox builder
+"""
+
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any, Callable, Union
+
+import urwid
+
+
+class LazyListWalker(urwid.ListWalker):
+    """List walker that creates its widgets on demand
+
+    Each row is stored as an arbitrary value (e.g. an AST node) and only turned into a
+    widget by ``factory`` when urwid asks for that position. At most ``cache_size``
+    created widgets are kept; the least recently used ones are recreated when needed
+    again. The focused widget is never evicted.
+
+    :param rows: The values to create rows from
+    :type rows: collections.abc.Iterable, optional
+    :param factory: Called with a row value to create its widget
+    :type factory: typing.Callable, optional
+    :param cache_size: The maximum number of created widgets to keep
+    :type cache_size: int, optional
+    :param on_evict: Called with a row value and its widget when the widget is
+        dropped from the cache
+    :type on_evict: typing.Callable, optional
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[Any] = (),
+        factory: Union[Callable[[Any], urwid.Widget], None] = None,
+        cache_size: int = 100,
+        on_evict: Union[Callable[[Any, urwid.Widget], None], None] = None,
+    ):
+        self.rows = list(rows)
+        self.factory = factory
+        self.on_evict = on_evict
+        self.cache_size = max(cache_size, 1)
+        self.cache: OrderedDict[int, urwid.Widget] = OrderedDict()
+        self.focus = 0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, position: int) -> urwid.Widget:
+        if not isinstance(position, int) or not 0 <= position < len(self.rows):
+            raise IndexError(position)
+
+        if (widget := self.cache.get(position)) is not None:
+            self.cache.move_to_end(position)
+            return widget
+
+        if self.factory is None:
+            raise ValueError("LazyListWalker has no factory to create rows with")
+        widget = self.factory(self.rows[position])
+        self.cache[position] = widget
+        self._trim()
+        return widget
+
+    def _trim(self):
+        for position in list(self.cache):
+            if len(self.cache) <= self.cache_size:
+                break
+            if position != self.focus:
+                self._evict(position)
+
+    def _evict(self, position: int):
+        widget = self.cache.pop(position)
+        if self.on_evict is not None:
+            self.on_evict(self.rows[position], widget)
+
+    def next_position(self, position: int) -> int:
+        if position + 1 >= len(self.rows):
+            raise IndexError(position)
+        return position + 1
+
+    def prev_position(self, position: int) -> int:
+        if position <= 0:
+            raise IndexError(position)
+        return position - 1
+
+    def positions(self, reverse: bool = False) -> Iterable[int]:
+        if reverse:
+            return range(len(self.rows) - 1, -1, -1)
+        return range(len(self.rows))
+
+    def set_focus(self, position: int):
+        if not 0 <= position < len(self.rows):
+            raise IndexError(position)
+        self.focus = position
+        self._modified()
+
+    def extend(self, rows: Iterable[Any]):
+        """Append row values to the walker
+
+        :param rows: The values to create rows from
+        :type rows: collections.abc.Iterable
+        """
+        self.rows.extend(rows)
+        self._modified()
+
+    def clear_cache(self):
+        """Drop all created widgets"""
+        for position in list(self.cache):
+            self._evict(position)
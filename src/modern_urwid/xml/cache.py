@@ -0,0 +1,125 @@
+"""
+Persistent on-disk cache for parsed layout ASTs
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Union
+
+from modern_urwid.__about__ import VERSION
+from modern_urwid.xml.ast import LayoutNode
+
+# Bump whenever the pickled shape of the AST changes
+CACHE_FORMAT = f"{VERSION}-2"
+
+
+def read_layout(path: Path) -> tuple[bytes, tuple[int, str]]:
+    """Read a layout file, and get its fingerprint from the same read
+
+    :param path: The path to the layout file
+    :type path: pathlib.Path
+    :return: The content of the file, and its modification time and content hash
+    :rtype: tuple[bytes, tuple[int, str]]
+    """
+    # a write after the stat leaves an outdated mtime, so the entry is not reused
+    mtime = path.stat().st_mtime_ns
+    data = path.read_bytes()
+    return data, (mtime, hashlib.blake2b(data, digest_size=16).hexdigest())
+
+
+class LayoutCache:
+    """Opt-in cache that stores parsed :class:`~modern_urwid.xml.ast.LayoutNode` trees on disk
+
+    Entries are stored per layout path and are only used if both the modification
+    time and the content hash of the layout file still match.
+
+    :param cache_dir: The directory to store cached layouts in
+    :type cache_dir: pathlib.Path | str
+    """
+
+    def __init__(self, cache_dir: Union[Path, str]):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, path: Path) -> Path:
+        name = hashlib.sha1(str(path.resolve()).encode()).hexdigest()
+        return self.cache_dir / f"{name}.pickle"
+
+    def get(
+        self,
+        path: Union[Path, str],
+        fingerprint: Union[tuple[int, str], None] = None,
+    ) -> Union[LayoutNode, None]:
+        """Get the cached AST for a layout file
+
+        :param path: The path to the layout file
+        :type path: pathlib.Path | str
+        :param fingerprint: The fingerprint from :func:`read_layout`. The file is read
+            if not provided
+        :type fingerprint: tuple[int, str], optional
+        :return: The cached root node, or ``None`` if there is no valid entry
+        :rtype: LayoutNode | None
+        """
+        path = Path(path)
+        entry_path = self._entry_path(path)
+        if not entry_path.is_file():
+            return None
+
+        try:
+            with entry_path.open("rb") as f:
+                entry = pickle.load(f)
+        except Exception:
+            return None
+
+        if not isinstance(entry, dict) or entry.get("format") != CACHE_FORMAT:
+            return None
+        if fingerprint is None:
+            fingerprint = read_layout(path)[1]
+        if (entry.get("mtime"), entry.get("digest")) != fingerprint:
+            return None
+        if not isinstance(node := entry.get("node"), LayoutNode):
+            return None
+        return node
+
+    def set(
+        self,
+        path: Union[Path, str],
+        node: LayoutNode,
+        fingerprint: Union[tuple[int, str], None] = None,
+    ):
+        """Store the AST for a layout file
+
+        :param path: The path to the layout file
+        :type path: pathlib.Path | str
+        :param node: The parsed root node of the layout
+        :type node: LayoutNode
+        :param fingerprint: The fingerprint from :func:`read_layout`, read together
+            with the content the node was parsed from. The file is read if not provided
+        :type fingerprint: tuple[int, str], optional
+        """
+        path = Path(path)
+        if fingerprint is None:
+            fingerprint = read_layout(path)[1]
+        mtime, digest = fingerprint
+        entry = {"format": CACHE_FORMAT, "mtime": mtime, "digest": digest, "node": node}
+
+        entry_path = self._entry_path(path)
+        # each writer (process or thread) gets its own temporary file
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=self.cache_dir, suffix=".tmp", delete=False
+        ) as f:
+            try:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, entry_path)
+
+    def clear(self):
+        """Remove all cached entries"""
+        for entry_path in self.cache_dir.glob("*.pickle"):
+            entry_path.unlink(missing_ok=True)
@@ -0,0 +1,70 @@
+"""
+Comparison of layout ASTs, used to find the parts of a layout that changed
+"""
+
+from typing import Iterator
+
+from .ast import LayoutNode, Node
+
+
+def same_meta(a: Node, b: Node) -> bool:
+    """Check if two meta nodes (and their children) are equal"""
+    return (
+        a.tag == b.tag
+        and a.attrs == b.attrs
+        and a.meta_attrs == b.meta_attrs
+        and len(a.children) == len(b.children)
+        and all(same_meta(x, y) for x, y in zip(a.children, b.children))
+    )
+
+
+def same_node(a: LayoutNode, b: LayoutNode) -> bool:
+    """Check if two layout nodes are equal, ignoring their children's contents
+
+    :rtype: bool
+    """
+    return (
+        a.tag == b.tag
+        and a.text == b.text
+        and a.attrs == b.attrs
+        and a.meta_attrs == b.meta_attrs
+        and len(a.children) == len(b.children)
+        and len(a.meta) == len(b.meta)
+        and all(same_meta(x, y) for x, y in zip(a.meta, b.meta))
+    )
+
+
+def diff_nodes(
+    old: LayoutNode, new: LayoutNode
+) -> list[tuple[LayoutNode, LayoutNode]]:
+    """Find the topmost nodes that differ between two layout trees
+
+    A node whose number of children changed is reported as a whole.
+
+    :param old: The root of the previous tree
+    :type old: LayoutNode
+    :param new: The root of the new tree
+    :type new: LayoutNode
+    :return: Pairs of the old and new version of every changed subtree
+    :rtype: list[tuple[LayoutNode, LayoutNode]]
+    """
+    if not same_node(old, new):
+        return [(old, new)]
+
+    changes = []
+    for old_child, new_child in zip(old.children, new.children):
+        changes.extend(diff_nodes(old_child, new_child))
+    return changes
+
+
+def walk(node: LayoutNode) -> Iterator[LayoutNode]:
+    """Iterate over a node and all of its descendants"""
+    yield node
+    for child in node.children:
+        yield from walk(child)
+
+
+def iter_parents(node: LayoutNode) -> Iterator[LayoutNode]:
+    """Iterate over the ancestors of a node, starting with its parent"""
+    while (node := node.parent) is not None:  # type: ignore[assignment]
+        yield node
@@ -0,0 +1,174 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import urwid
+
+from modern_urwid import CompileContext, compile_widget
+from modern_urwid.__main__ import main
+from modern_urwid.aot.codegen import check_module, compile_module, load_module
+from modern_urwid.exceptions import UnsupportedFeature
+
+LAYOUT = """<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid" mu:id="root">
+    <mu:resources>
+        <mu:python path="data.py" />
+        <mu:stylesheet path="styles.css" />
+    </mu:resources>
+    <filler mu:height="1"><text mu:class="title" markup="Hello {data.user.name:>8}!" /></filler>
+    <columns mu:weight="3">
+        <listbox mu:id="items" mu:weight="2">
+            <button mu:id="first" on_press="@data.on_press">First</button>
+            <text>Second</text>
+        </listbox>
+        <filler mu:height="16">
+            <linebox mu:selectable="True">
+                <edit caption="@data.caption">
+                    <mu:signal name="change" callback="@data.on_change" />
+                </edit>
+            </linebox>
+        </filler>
+    </columns>
+    <progressbar normal="pg normal" complete="pg complete" current="@data.progress" mu:pack="True" />
+</pile>
+"""
+
+DATA = """user = {"name": "John"}
+caption = "Name: "
+progress = 42
+
+
+def on_press(node, ctx, w):
+    pass
+
+
+def on_change(node, ctx, w, text):
+    pass
+"""
+
+STYLES = """pile { color: dark blue; background: light gray; }
+.title { color: yellow; }
+button:focus { background: dark red; }
+"""
+
+
+@pytest.fixture
+def layout(tmp_path):
+    (tmp_path / "layout.xml").write_text(LAYOUT)
+    (tmp_path / "data.py").write_text(DATA)
+    (tmp_path / "styles.css").write_text(STYLES)
+    return tmp_path / "layout.xml"
+
+
+def test_compiled_module_matches_compile_widget(layout, tmp_path):
+    output = compile_module(layout, tmp_path / "build" / "layout_ui.py")
+    module = load_module(output)
+    assert module.IDS == ("root", "items", "first")
+    assert check_module(layout, module) is None
+
+    context = CompileContext(layout.parent)
+    widget, ids = module.build(context)
+    assert isinstance(widget.base_widget, urwid.Pile)
+    assert widget.base_widget.contents[0][0].base_widget.text == "Hello     John!"
+    assert ids["items"].body[0].base_widget is ids["first"]
+    assert ids["first"].selectable()
+    # the palette is registered with the context, so it can be passed to the screen
+    assert sorted(tuple(style) for _, *style in module.PALETTE) == sorted(
+        tuple(style) for style in context.style_registry.palettes.values()
+    )
+
+    # the CLI compiles and checks the same layout
+    basic = Path(__file__).parent / "basic" / "layout.xml"
+    assert main(["compile", str(basic), "-o", str(tmp_path / "cli"), "--check"]) == 0
+    assert check_module(basic, load_module(tmp_path / "cli" / "layout.py")) is None
+
+
+@pytest.mark.parametrize("name", ["layout", "layout2"])
+def test_compiled_modules_match_advanced_layouts(name, tmp_path):
+    base_dir = Path(__file__).parent / "advanced"
+    layout = base_dir / "layouts" / f"{name}.xml"
+    output = compile_module(layout, tmp_path / f"{name}.py", CompileContext(base_dir))
+    module = load_module(output)
+    assert (
+        check_module(layout, module, CompileContext(base_dir), CompileContext(base_dir))
+        is None
+    )
+
+
+def test_custom_builders_get_child_metadata(tmp_path):
+    (tmp_path / "recording.py").write_text(
+        "import urwid\n"
+        "from modern_urwid import WidgetBuilder\n"
+        "class RecordingBuilder(WidgetBuilder):\n"
+        "    tag = 'recordingpile'\n"
+        "    def build(self, **kwargs):\n"
+        "        return urwid.Pile([])\n"
+        "    def attach_children(self, widget, children):\n"
+        "        self.context.set_custom('metas', [meta for _, _, meta in children])\n"
+        "        widget.contents = [(child, widget.options()) for child, _, _ in children]\n"
+    )
+    (tmp_path / "data.py").write_text("def on_change(node, ctx, w, text):\n    pass\n")
+    (tmp_path / "layout.xml").write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        '<mu:resources><mu:widget path="recording.py" />'
+        '<mu:python path="data.py" /></mu:resources>'
+        "<recordingpile>"
+        '<edit><mu:signal name="change" callback="@data.on_change" /></edit>'
+        "<text>Plain</text>"
+        "</recordingpile></pile>"
+    )
+    context = CompileContext(tmp_path)
+    compile_widget(tmp_path / "layout.xml", context)
+    module = load_module(compile_module(tmp_path / "layout.xml", tmp_path / "ui.py"))
+    module_context = CompileContext(tmp_path)
+    module.build(module_context)
+
+    metas = module_context.get_custom("metas")
+    assert metas == context.get_custom("metas")
+    assert metas[0]["signals"][0]["name"] == "change"
+
+
+def test_compiled_module_does_not_import_parsers(layout, tmp_path):
+    output = compile_module(layout, tmp_path / "layout_ui.py")
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys\n"
+            f"sys.path.insert(0, {str(tmp_path)!r})\n"
+            "import layout_ui\n"
+            "widget, ids = layout_ui.build()\n"
+            "print(*sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert output.exists()
+    assert not set(result.stdout.split()) & {"lxml", "cssselect2", "tinycss2"}
+
+
+def test_unsupported_features(tmp_path):
+    (tmp_path / "layout.xml").write_text(
+        """<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">
+    <listbox mu:lazy="True"><text>Row</text></listbox>
+</pile>"""
+    )
+    with pytest.raises(UnsupportedFeature):
+        compile_module(tmp_path / "layout.xml", tmp_path / "layout_ui.py")
+
+
+def test_compiled_module_releases_its_build(layout, tmp_path):
+    import gc
+
+    module = load_module(compile_module(layout, tmp_path / "layout_ui.py"))
+    context = CompileContext(layout.parent)
+    local_keys = set(context.local_data)
+    widget, ids = module.build(context)
+    registry = context.style_registry
+    assert registry.palette_refs and set(context.local_data) != local_keys
+
+    del widget, ids
+    gc.collect()
+    assert not registry.palette_refs
+    assert set(context.local_data) == local_keys
@@ -0,0 +1,59 @@
+import json
+
+from benchmarks.generate import LayoutParams, write_layouts
+from benchmarks.render import parse_keys, run_render
+from benchmarks.suite import main
+from modern_urwid import CompileContext, LifecycleManager, compile_widget
+
+
+def test_generated_layout_compiles(tmp_path):
+    params = LayoutParams(depth=2, breadth=2, selectors=8)
+    paths = write_layouts(tmp_path, params)
+
+    _, mapped = compile_widget(paths["main"], CompileContext(tmp_path))
+    # 1 + 2 containers and 4 leaves
+    assert len(mapped) == 7
+
+
+def test_suite_writes_results(tmp_path):
+    output = tmp_path / "results.json"
+    main(["--depth", "1", "--breadth", "2", "--repeat", "1", "--output", str(output)])
+
+    results = json.loads(output.read_text())
+    assert results["params"]["depth"] == 1
+    for name in ("parse_stylesheet", "compile_widget", "register", "switch"):
+        assert results["results"][name]["min"] >= 0
+        assert results["results"][name]["peak_memory"] > 0
+
+
+def test_render_harness(tmp_path):
+    paths = write_layouts(tmp_path, LayoutParams(depth=2, breadth=2, selectors=8))
+    context = CompileContext(tmp_path)
+    widget, _ = compile_widget(paths["main"], context)
+
+    results = run_render(
+        widget,
+        [(40, 10)],
+        parse_keys("down*2,right,a"),
+        frames=3,
+        palette=context.style_registry.get_palettes(),
+    )
+    result = results["40x10"]
+    assert result["first_frame"] > 0
+    assert result["frame_cache_hit_rate"] > 0
+    assert result["keypress"]["max"] >= result["keypress"]["min"]
+
+
+def test_render_harness_with_manager(tmp_path, monkeypatch):
+    paths = write_layouts(tmp_path, LayoutParams(depth=2, breadth=2, selectors=8))
+    manager = LifecycleManager(CompileContext(tmp_path))
+    manager.register(paths["main"], "main")
+    manager.switch("main")
+
+    unhandled = []
+    controller = manager.controllers["main"]
+    monkeypatch.setattr(controller, "on_unhandled_input", unhandled.append)
+    screen, widget = manager.loop.screen, manager.loop.widget
+    run_render(manager, [(40, 10)], ["f5", "f6"], frames=2)
+    assert unhandled == ["f5", "f6"]
+    assert manager.loop.screen is screen and manager.loop.widget is widget
@@ -0,0 +1,281 @@
+import gc
+import importlib.resources
+import os
+import types
+import weakref
+from pathlib import Path
+
+import pytest
+import urwid
+
+import modern_urwid.compiler
+from modern_urwid import (
+    CompileContext,
+    CompileStats,
+    LayoutCache,
+    compile_plan,
+    compile_widget,
+)
+from modern_urwid.compiler import parse_layout_file
+
+
+def test_layout_cache(tmp_path, monkeypatch):
+    base_dir = Path(importlib.resources.files("tests.basic"))
+    cache = LayoutCache(tmp_path)
+
+    widget, _ = compile_widget(
+        base_dir / "layout.xml", CompileContext(base_dir, layout_cache=cache)
+    )
+    assert isinstance(widget.base_widget, urwid.Pile)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("layout should have been loaded from the cache")
+
+    monkeypatch.setattr(modern_urwid.compiler, "parse_element", fail)
+    widget, mapped = compile_widget(
+        base_dir / "layout.xml", CompileContext(base_dir, layout_cache=cache)
+    )
+    assert isinstance(widget.base_widget, urwid.Pile)
+    assert "dynamic_listbox" in mapped
+
+
+def test_layout_cache_fingerprints_parsed_content(tmp_path, monkeypatch):
+    path = tmp_path / "layout.xml"
+    path.write_text('<pile><text markup="Old" /></pile>')
+    cache = LayoutCache(tmp_path / "cache")
+    context = CompileContext(tmp_path, layout_cache=cache)
+
+    reads = []
+    read_bytes = Path.read_bytes
+
+    def counting_read(self):
+        reads.append(self)
+        return read_bytes(self)
+
+    parse_element = modern_urwid.compiler.parse_element
+
+    def edit_while_parsing(element):
+        path.write_text('<pile><text markup="New" /></pile>')
+        os.utime(path, ns=(0, 0))
+        return parse_element(element)
+
+    monkeypatch.setattr(Path, "read_bytes", counting_read)
+    monkeypatch.setattr(modern_urwid.compiler, "parse_element", edit_while_parsing)
+    node = parse_layout_file(path, context)
+    assert reads == [path]
+    assert node.children[0].attrs["markup"] == "Old"
+
+    # the AST of the old content is not served for the new content
+    monkeypatch.setattr(modern_urwid.compiler, "parse_element", parse_element)
+    assert cache.get(path) is None
+    assert parse_layout_file(path, context).children[0].attrs["markup"] == "New"
+
+
+def test_namespaced_tag_index(tmp_path):
+    class FancyText(urwid.Text):
+        pass
+
+    module = types.ModuleType("fancy_widgets")
+    module.FancyText = FancyText  # type: ignore[attr-defined]
+
+    context = CompileContext(tmp_path)
+    context.widget_registry.tag_index.register_module(module, "fancy")
+    (tmp_path / "layout.xml").write_text(
+        '<pile xmlns:f="fancy"><f:fancytext markup="Fancy" /><text>Plain</text></pile>'
+    )
+
+    widget, _ = compile_widget(tmp_path / "layout.xml", context)
+    fancy, plain = [child.base_widget for child, _ in widget.base_widget.contents]
+    assert type(fancy) is FancyText and fancy.text == "Fancy"
+    assert type(plain) is urwid.Text and plain.text == "Plain"
+
+
+def test_lazy_listbox(tmp_path, monkeypatch):
+    rows = "".join(
+        f'<text mu:id="row{i}" markup="Row {i}" />' for i in range(10_000)
+    )
+    (tmp_path / "layout.xml").write_text(
+        '<listbox xmlns:mu="https://github.com/Jackkillian/modern-urwid"'
+        f' mu:lazy="True" mu:cache_size="20">{rows}</listbox>'
+    )
+
+    planned = []
+    plan_node = modern_urwid.compiler.plan_node
+
+    def count_plans(node, *args, **kwargs):
+        planned.append(node)
+        return plan_node(node, *args, **kwargs)
+
+    monkeypatch.setattr(modern_urwid.compiler, "plan_node", count_plans)
+    context = CompileContext(tmp_path)
+    widget, mapped = compile_widget(tmp_path / "layout.xml", context)
+    listbox = widget.base_widget
+    assert len(listbox.body) == 10_000
+    assert len(mapped) <= 1
+    # rows are only planned when they are created
+    assert len(planned) == 1
+    compile_plan(tmp_path / "layout.xml", CompileContext(tmp_path))
+    assert len(planned) == 2
+
+    listbox.render((20, 10), focus=True)
+    assert 0 < len(listbox.body.cache) <= 20
+    assert mapped["row0"].base_widget.text == "Row 0"
+
+    first_row = weakref.ref(mapped["row0"])
+    for _ in range(30):
+        listbox.keypress((20, 10), "page down")
+        listbox.render((20, 10), focus=True)
+    assert len(listbox.body.cache) <= 20
+    assert listbox.focus.base_widget.text == f"Row {listbox.focus_position}"
+
+    # evicted rows are unmapped and freed, and release their palette entries
+    gc.collect()
+    assert first_row() is None
+    assert "row0" not in mapped and 0 < len(mapped) <= 20
+    refs = sum(context.style_registry.owners[context.current_key].values())
+    assert refs <= 2 * (len(listbox.body.cache) + 1)
+
+
+def test_repeat(tmp_path):
+    (tmp_path / "data.py").write_text(
+        "rows = [{'name': name} for name in ('a', 'b', 'c')]\n"
+        "def on_click(node, ctx, button):\n"
+        "    pass\n"
+    )
+    (tmp_path / "layout.xml").write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        '<mu:resources><mu:python path="data.py" /></mu:resources>'
+        "<text>Header</text>"
+        '<button mu:for="@data.rows" mu:as="row" label="Row {row.name}"'
+        ' on_press="@data.on_click" />'
+        '<listbox mu:lazy="True" mu:height="5">'
+        '<text mu:for="@data.rows" markup="{item.name}" />'
+        "</listbox>"
+        "</pile>"
+    )
+
+    widget, _ = compile_widget(tmp_path / "layout.xml", CompileContext(tmp_path))
+    children = [child.base_widget for child, _ in widget.base_widget.contents]
+    assert len(children) == 5
+    assert [button.label for button in children[1:4]] == ["Row a", "Row b", "Row c"]
+
+    listbox = children[4]
+    assert len(listbox.body) == 3
+    assert [listbox.body[i].base_widget.text for i in range(3)] == ["a", "b", "c"]
+
+    (tmp_path / "layout.xml").write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        '<mu:resources><mu:python path="data.py" /></mu:resources>'
+        '<text mu:for="@data.rows" mu:id="row" markup="{item.name}" />'
+        "</pile>"
+    )
+    with pytest.raises(ValueError):
+        compile_widget(tmp_path / "layout.xml", CompileContext(tmp_path))
+
+
+def test_layout_plan(monkeypatch):
+    base_dir = Path(importlib.resources.files("tests.basic"))
+    context = CompileContext(base_dir)
+    plan = compile_plan(base_dir / "layout.xml", context)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("instances should be created from the plan")
+
+    monkeypatch.setattr(modern_urwid.compiler, "plan_node", fail)
+    monkeypatch.setattr(modern_urwid.compiler, "parse_element", fail)
+
+    first, first_mapped = plan.instantiate()
+    second, second_mapped = plan.instantiate()
+    assert first is not second
+    assert first_mapped.keys() == second_mapped.keys()
+    assert first_mapped["dynamic_listbox"] is not second_mapped["dynamic_listbox"]
+    assert first.attr_map == second.attr_map
+
+
+def test_layout_plan_instances_release_their_palette_entries(tmp_path):
+    rows = "".join(f'<text mu:class="row{i % 3}">Row {i}</text>' for i in range(50))
+    (tmp_path / "styles.css").write_text(
+        ".row0 { color: yellow; } .row1 { color: dark red; } .row2 { color: black; }"
+    )
+    (tmp_path / "layout.xml").write_text(
+        '<listbox xmlns:mu="https://github.com/Jackkillian/modern-urwid"'
+        ' mu:lazy="True" mu:cache_size="10">'
+        '<mu:resources><mu:stylesheet path="styles.css" /></mu:resources>'
+        f"{rows}</listbox>"
+    )
+    context = CompileContext(tmp_path)
+    plan = compile_plan(tmp_path / "layout.xml", context)
+    context.set_local_key("previous")
+
+    widget, _ = plan.instantiate("instance")
+    assert context.current_key == "previous"
+    widget.base_widget.render((20, 10), focus=True)
+    assert sum(context.style_registry.owners["instance"].values()) > 0
+
+    del widget
+    gc.collect()
+    assert "instance" not in context.style_registry.owners
+    plan.release()
+    assert not context.style_registry.palettes
+
+
+def test_stream_compile(tmp_path):
+    (tmp_path / "data.py").write_text("rows = ['x', 'y']\n")
+    sections = "".join(
+        f'<pile mu:id="section{i}" mu:class="section">'
+        + "".join(f'<text markup="Item {i}.{j}" />' for j in range(50))
+        + "</pile>"
+        for i in range(20)
+    )
+    (tmp_path / "layout.xml").write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        '<mu:resources><mu:python path="data.py" /></mu:resources>'
+        f"{sections}"
+        '<text mu:for="@data.rows" markup="{item}" />'
+        '<listbox mu:lazy="True" mu:height="5"><text markup="Lazy" /></listbox>'
+        "</pile>"
+    )
+
+    def texts(widget):
+        widget = widget.base_widget
+        if isinstance(widget, urwid.Text):
+            return [widget.text]
+        elif isinstance(widget, urwid.ListBox):
+            return [text for row in widget.body for text in texts(row)]
+        return [text for child, _ in widget.contents for text in texts(child)]
+
+    widget, mapped = compile_widget(tmp_path / "layout.xml", CompileContext(tmp_path))
+    streamed, streamed_mapped = compile_widget(
+        tmp_path / "layout.xml", CompileContext(tmp_path), stream=True
+    )
+    assert texts(streamed) == texts(widget)
+    assert streamed_mapped.keys() == mapped.keys()
+    assert len(texts(streamed)) == 20 * 50 + 3
+
+    (tmp_path / "late_meta.xml").write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        '<text markup="First" /><mu:resources /></pile>'
+    )
+    with pytest.raises(ValueError):
+        compile_widget(tmp_path / "late_meta.xml", CompileContext(tmp_path), stream=True)
+
+
+def test_compile_stats():
+    base_dir = Path(importlib.resources.files("tests.basic"))
+    events = []
+    stats = CompileStats(callback=lambda *event: events.append(event))
+    context = CompileContext(base_dir, stats=stats)
+
+    compile_widget(base_dir / "layout.xml", context)
+    layout = context.current_key
+
+    for phase in ("xml_parse", "parse_element", "compile_meta_nodes", "build"):
+        assert stats.phases[phase].count > 0
+    assert stats.phases["parse_stylesheet"].count == 1
+    assert stats.tags["pile"]["build"].count >= 1
+    assert stats.layouts[layout]["build"].count == stats.phases["build"].count
+    assert len(events) == sum(phase.count for phase in stats.phases.values())
+    assert "pile" in stats.to_dict()["tags"]
+
+    disabled = CompileContext(base_dir)
+    assert disabled.measure("build") is disabled.measure("xml_parse")
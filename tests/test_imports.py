@@ -0,0 +1,49 @@
+import subprocess
+import sys
+from pathlib import Path
+
+HEAVY_MODULES = {"lxml", "cssselect2", "tinycss2"}
+
+
+def run_imports(code: str) -> tuple[set[str], dict[str, int]]:
+    """Run code in a new interpreter and get the loaded modules and the
+    cumulative import time of each top level import, in microseconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{code}\nprint(*sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return set(result.stdout.split()), times
+
+
+def test_import_time():
+    modules, times = run_imports("import sys\nimport modern_urwid")
+    assert "urwid" not in modules
+    assert not modules & HEAVY_MODULES
+    # eagerly importing urwid and the parsers takes several hundred milliseconds
+    assert times["modern_urwid"] < 150_000
+
+    modules, _ = run_imports(
+        "import sys\n"
+        "from modern_urwid import CompileContext, Controller, LifecycleManager"
+    )
+    assert not modules & HEAVY_MODULES
+
+    # the parsers are imported once a layout is compiled
+    layout = Path(__file__).parent / "basic" / "layout.xml"
+    modules, _ = run_imports(
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from modern_urwid import CompileContext, compile_widget\n"
+        f"path = Path({str(layout)!r})\n"
+        "compile_widget(path, CompileContext(path.parent))"
+    )
+    assert HEAVY_MODULES <= modules
@@ -0,0 +1,257 @@
+import importlib.resources
+import json
+import os
+from pathlib import Path
+
+import pytest
+import urwid
+
+from modern_urwid import CompileContext, LifecycleManager
+from modern_urwid.resource.utils import wrap_callback
+
+ADVANCED_DIR = Path(importlib.resources.files("tests.advanced"))
+
+
+def test_lazy_register_and_warm_up():
+    manager = LifecycleManager(CompileContext(ADVANCED_DIR))
+    manager.register("layouts/layout.xml", "main", lazy=True)
+    manager.register("layouts/layout2.xml", lazy=True)
+    assert manager.layouts == {}
+    assert manager.get_pending() == ["main", "layout2"]
+
+    manager.switch("main")
+    assert isinstance(manager.loop.widget.base_widget, urwid.Pile)
+    assert manager.get_pending() == ["layout2"]
+
+    def exit_when_warm():
+        if not manager.get_pending():
+            raise urwid.ExitMainLoop()
+
+    current_key = manager.context.current_key
+    manager.warm_up()
+    manager.loop.event_loop.enter_idle(exit_when_warm)
+    manager.loop.event_loop.run()
+    assert manager.get_pending() == []
+    assert "layout2" in manager.controllers
+    # compiling in the background does not change the context's current key
+    assert manager.context.current_key == current_key
+
+
+def test_unregister_and_lru_eviction():
+    evicted = []
+    manager = LifecycleManager(CompileContext(ADVANCED_DIR), max_resident=1)
+    manager.register("layouts/layout.xml", "main")
+    manager.register("layouts/layout2.xml")
+    manager.controllers["layout2"].on_evict = lambda: evicted.append("layout2")
+    assert list(manager.layouts) == ["layout2"]
+
+    manager.switch("main")
+    assert list(manager.layouts) == ["main"]
+    assert evicted == ["layout2"]
+    assert "layout2" not in manager.context.local_data
+
+    manager.switch("layout2")
+    assert list(manager.layouts) == ["layout2"]
+    assert manager.controllers["layout2"].text.text == "Welcome to modern-urwid"
+
+    manager.unregister("main")
+    assert "main" not in manager.sources
+    with pytest.raises(ValueError):
+        manager.unregister("layout2")
+
+
+def test_hot_reload(tmp_path, monkeypatch):
+    layout = (
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        '<text mu:id="title" markup="{title}" />'
+        '<columns mu:id="row"><text mu:id="left" markup="Left" /></columns>'
+        "</pile>"
+    )
+    path = tmp_path / "layout.xml"
+    path.write_text(layout.format(title="Title"))
+
+    manager = LifecycleManager(CompileContext(tmp_path))
+    manager.register("layout.xml", "main")
+    manager.switch("main")
+    watcher = manager.watch(use_inotify=False)
+
+    root = manager.loop.widget
+    mapped = manager.context.get_local("main").mapped_widgets
+    row, left = mapped["row"], mapped["left"]
+    controller = manager.controllers["main"]
+
+    path.write_text(layout.format(title="Changed"))
+    os.utime(path, ns=(0, 0))
+    assert watcher.check() == ["main"]
+    assert manager.loop.widget is root
+    assert manager.controllers["main"] is controller
+    assert mapped["title"].text == "Changed"
+    assert mapped["row"] is row and mapped["left"] is left
+
+    # changing the root element rebuilds the whole tree in place
+    registry = manager.context.style_registry
+    refs = sum(registry.owners["main"].values())
+    manager.context.get_local("main").custom_data["kept"] = True
+    monkeypatch.setattr(
+        controller, "on_load", lambda: pytest.fail("on_load should not run again")
+    )
+    path.write_text(layout.format(title="Changed").replace("<pile ", '<pile mu:class="x" '))
+    assert manager.reload("main") is False
+    assert manager.loop.widget is root
+    assert manager.controllers["main"] is controller
+    assert manager.context.get_local("main").custom_data == {"kept": True}
+    assert mapped["row"] is not row and mapped["title"].text == "Changed"
+    assert sum(registry.owners["main"].values()) == refs
+    watcher.stop()
+
+
+def test_watcher_stop_closes_inotify(tmp_path):
+    pytest.importorskip("inotify_simple")
+    (tmp_path / "layout.xml").write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        '<text markup="Title" /></pile>'
+    )
+    manager = LifecycleManager(CompileContext(tmp_path))
+    manager.register("layout.xml", "main")
+    watcher = manager.watch()
+    inotify = watcher.inotify
+    assert inotify is not None and not inotify.closed
+
+    watcher.stop()
+    assert inotify.closed
+    assert watcher.inotify is None
+
+
+def test_runtime_profiler(tmp_path):
+    manager = LifecycleManager(CompileContext(ADVANCED_DIR))
+    manager.register("layouts/layout.xml", "main")
+    manager.register("layouts/layout2.xml")
+    manager.switch("main")
+
+    profiler = manager.profile(dump_path=tmp_path / "profile.json")
+    manager.switch("layout2")
+    manager.on_unhandled_input("x")
+
+    def exit_loop():
+        raise urwid.ExitMainLoop()
+
+    manager.loop.event_loop.alarm(0, exit_loop)
+    manager.loop.event_loop.run()
+
+    # callbacks are only profiled for the profiled manager's context
+    callback = manager.context.callback_hook
+    other = CompileContext(ADVANCED_DIR)
+    assert callback is not None and other.callback_hook is None
+    wrap_callback(lambda: None, context=manager.context)()
+    wrap_callback(lambda: None, context=other)()
+    profiler.stop()
+    assert manager.context.callback_hook is None
+
+    snapshot = profiler.snapshot()
+    assert snapshot["phases"]["on_exit"]["count"] == 1
+    assert snapshot["layouts"]["layout2"]["on_enter"]["count"] == 1
+    assert snapshot["phases"]["on_unhandled_input"]["count"] == 1
+    assert snapshot["phases"]["alarm"]["count"] == 1
+    assert snapshot["phases"]["callback"]["count"] == 1
+    assert "tags" not in snapshot
+    names = [name for name, phases in snapshot["callbacks"].items() if "alarm" in phases]
+    assert names == ["tests.test_lifecycle.test_runtime_profiler.<locals>.exit_loop"]
+    assert json.loads((tmp_path / "profile.json").read_text())["phases"]
+
+
+def test_data_store_bindings(tmp_path):
+    (tmp_path / "layout.xml").write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        '<text mu:id="cpu" markup="CPU: {store.cpu}%" />'
+        '<text mu:id="static" markup="Static" />'
+        '<progressbar mu:id="bar" normal="a" complete="b" current="@store.progress" />'
+        "</pile>"
+    )
+    context = CompileContext(tmp_path)
+    context.store.update(cpu=1, progress=10)
+    manager = LifecycleManager(context)
+    manager.register("layout.xml", "main")
+    mapped = context.get_local("main").mapped_widgets
+    assert mapped["cpu"].text == "CPU: 1%"
+    assert mapped["bar"].current == 10
+
+    alarms = []
+    manager.loop.set_alarm_in = lambda sec, callback: alarms.append(callback) or sec
+    for i in range(100):
+        context.store.set("cpu", i)
+    # changes are coalesced into a single update
+    assert len(alarms) == 1
+    assert mapped["cpu"].text == "CPU: 1%"
+    alarms[0](manager.loop, None)
+    assert mapped["cpu"].text == "CPU: 99%"
+    assert mapped["bar"].current == 10
+
+    # only the widgets reading a changed key are updated
+    manager.loop.remove_alarm = lambda handle: None
+    context.store.set("progress", 50)
+    assert context.store.flush() == 1
+    assert mapped["bar"].current == 50
+    assert mapped["static"].text == "Static"
+
+
+def test_data_store_drops_dead_bindings():
+    import gc
+
+    from modern_urwid.store import Binding, DataStore
+
+    store = DataStore()
+    for _ in range(50):
+        widget = urwid.Text("")
+        store.bind(Binding(None, widget, "markup", None), frozenset({"never"}))
+        del widget
+        gc.collect()
+    # the key is never set, so only binding can drop the dead entries
+    assert len(store.bindings["never"]) == 1
+
+
+def test_register_many(monkeypatch):
+    import modern_urwid.style.registry
+
+    parsed = []
+    parse_stylesheet = modern_urwid.style.registry.parse_stylesheet
+
+    def counting_parse(path, *args):
+        parsed.append(path)
+        return parse_stylesheet(path, *args)
+
+    monkeypatch.setattr(modern_urwid.style.registry, "parse_stylesheet", counting_parse)
+    manager = LifecycleManager(CompileContext(ADVANCED_DIR))
+    manager.register_many(
+        {"main": "layouts/layout.xml", "layout2": "layouts/layout2.xml"}, max_workers=2
+    )
+    assert list(manager.layouts) == ["main", "layout2"]
+    assert list(manager.controllers) == ["main", "layout2"]
+    assert isinstance(manager.layouts["main"].base_widget, urwid.Pile)
+    assert manager.controllers["layout2"].text.text == "Welcome to modern-urwid"
+    assert len(parsed) == len(set(parsed)) > 0
+
+
+
+def test_parse_layout_file_with_layout_cache_from_threads(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from modern_urwid import LayoutCache
+    from modern_urwid.compiler import parse_layout_file
+
+    path = tmp_path / "layout.xml"
+    path.write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        '<text markup="Cached" /></pile>'
+    )
+    # like register_many with the same layout under several keys, every
+    # worker writes the same cache entry at once
+    for i in range(20):
+        cache = LayoutCache(tmp_path / f"cache{i}")
+        context = CompileContext(tmp_path, layout_cache=cache)
+        with ThreadPoolExecutor(8) as executor:
+            futures = [
+                executor.submit(parse_layout_file, path, context) for _ in range(8)
+            ]
+        assert all(future.result().tag == "pile" for future in futures)
+        assert cache.get(path) is not None
+        assert not list(cache.cache_dir.glob("*.tmp"))
@@ -0,0 +1,136 @@
+import pickle
+import types
+
+import pytest
+
+from modern_urwid import (
+    CompileContext,
+    Controller,
+    InvalidTemplate,
+    ModuleRegistry,
+    compile_widget,
+)
+from modern_urwid.resource.dummies import UnresolvedResource, UnresolvedTemplate
+from modern_urwid.resource.utils import (
+    ResourceAccessor,
+    is_class_method,
+    resolve_resource,
+)
+
+
+EXECUTED = []
+
+
+class ResourceController(Controller):
+    name = "resource_test"
+
+    def on_click(self, node):
+        return node
+
+
+def test_resource_accessors_are_cached_and_invalidated():
+    def on_load(node, ctx):
+        pass
+
+    def other_load(node, ctx):
+        pass
+
+    module = types.ModuleType("data")
+    module.on_load = on_load
+    module.config = {"title": "first"}
+    module.ResourceController = ResourceController
+
+    registry = ModuleRegistry()
+    registry.register("data", module)
+
+    callback = UnresolvedResource("@data.on_load")
+    method = UnresolvedResource("@data.ResourceController.on_click")
+    value = UnresolvedResource("@data.config.title")
+
+    assert resolve_resource(registry, callback) is on_load
+    accessor = registry.get_accessor(callback)
+    assert accessor.kind == ResourceAccessor.CALLABLE
+    assert registry.get_accessor(UnresolvedResource("@data.on_load")) is accessor
+
+    assert is_class_method(registry, method)
+    assert registry.get_accessor(method).kind == ResourceAccessor.CONTROLLER_METHOD
+    assert not is_class_method(registry, callback)
+
+    # values are read again on every lookup
+    assert resolve_resource(registry, value) == "first"
+    module.config["title"] = "second"
+    assert resolve_resource(registry, value) == "second"
+    assert registry.get_accessor(value).kind is None
+
+    # scope variables shadow modules and are not cached
+    scope = {"data": {"config": {"title": "x"}}}
+    assert resolve_resource(registry, value, scope=scope) == "x"
+
+    # the cached target is kept until the module is replaced
+    module.on_load = other_load
+    assert resolve_resource(registry, callback) is on_load
+    registry.register("data", module)
+    assert registry.get_accessor(callback) is accessor
+    replacement = types.ModuleType("data")
+    replacement.on_load = other_load
+    registry.register("data", replacement)
+    assert registry.get_accessor(callback) is not accessor
+    assert resolve_resource(registry, callback) is other_load
+
+
+def test_compiled_templates():
+    module = types.ModuleType("data")
+    module.user = {"name": "Ada", "id": 7}
+    registry = ModuleRegistry()
+    registry.register("data", module)
+
+    template = UnresolvedTemplate("{data.user.name} (#{data.user.id:03}) {{}} {item}")
+    assert template.dependencies == {
+        UnresolvedResource("data.user.name"),
+        UnresolvedResource("data.user.id"),
+        UnresolvedResource("item"),
+    }
+    assert template.roots == {"data", "item"}
+    assert template.render(registry, {"item": "x"}) == "Ada (#007) {} x"
+
+    module.user["name"] = "Grace"
+    assert template.render(registry, {"item": "y"}) == "Grace (#007) {} y"
+
+    # templates are stored in the layout cache
+    assert pickle.loads(pickle.dumps(template)).render(registry, {"item": 1}) == (
+        "Grace (#007) {} 1"
+    )
+
+    with pytest.raises(InvalidTemplate):
+        UnresolvedTemplate("{data.user")
+
+
+def test_imports_are_cached(tmp_path):
+    (tmp_path / "widgets.py").write_text(
+        "import urwid\n"
+        "from modern_urwid import WidgetBuilder\n"
+        "from tests import test_resource\n"
+        "test_resource.EXECUTED.append(__name__)\n"
+        "class Greeting(WidgetBuilder):\n"
+        "    tag = 'greeting'\n"
+        "    def build(self, **kwargs):\n"
+        "        return urwid.Text('Hello')\n"
+    )
+    (tmp_path / "layout.xml").write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        "<mu:resources>"
+        '<mu:python path="widgets.py" as="first" />'
+        '<mu:python path="./widgets.py" as="second" />'
+        '<mu:widget path="widgets.py" />'
+        "</mu:resources>"
+        "<greeting />"
+        "</pile>"
+    )
+
+    for _ in range(2):
+        context = CompileContext(tmp_path)
+        widget, _ = compile_widget(tmp_path / "layout.xml", context)
+        assert widget.base_widget.contents[0][0].base_widget.text == "Hello"
+        registry = context.module_registry
+        assert registry.get("first") is registry.get("second")
+    assert EXECUTED == ["widgets"]
@@ -0,0 +1,235 @@
+import gc
+import importlib.resources
+import os
+import time
+from pathlib import Path
+
+import urwid
+
+import modern_urwid.style.registry
+from modern_urwid import CompileContext, StyleRegistry, compile_widget
+from modern_urwid.style.css_parser import parse_stylesheet
+
+STYLES_DIR = Path(importlib.resources.files("tests.advanced")) / "styles"
+
+
+def test_shared_stylesheet_is_registered_once(monkeypatch):
+    calls = []
+
+    def counting_parse(*args, **kwargs):
+        calls.append(args)
+        return parse_stylesheet(*args, **kwargs)
+
+    monkeypatch.setattr(modern_urwid.style.registry, "parse_stylesheet", counting_parse)
+
+    registry = StyleRegistry()
+    registry.load_stylesheet(STYLES_DIR / "styles.css", {"--my-var": "light gray"})
+    rule_count = registry.matcher.order
+    registry.load_stylesheet(STYLES_DIR / "styles.css", {"--my-var": "light gray"})
+
+    assert len(calls) == 1
+    assert registry.matcher.order == rule_count
+
+
+def test_stylesheet_is_parsed_once_from_threads(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls = []
+
+    def slow_parse(*args, **kwargs):
+        calls.append(args)
+        time.sleep(0.05)
+        return parse_stylesheet(*args, **kwargs)
+
+    monkeypatch.setattr(modern_urwid.style.registry, "parse_stylesheet", slow_parse)
+
+    registry = StyleRegistry()
+    with ThreadPoolExecutor(8) as executor:
+        futures = [
+            executor.submit(registry.parse_stylesheet, STYLES_DIR / "styles.css")
+            for _ in range(8)
+        ]
+    assert len({id(future.result()) for future in futures}) == 1
+    assert len(calls) == 1
+
+
+def test_changed_stylesheet_replaces_its_rules(tmp_path):
+    stylesheet = tmp_path / "styles.css"
+    stylesheet.write_text("text { color: light red; } .title { color: yellow; }")
+    registry = StyleRegistry()
+    registry.load_stylesheet(stylesheet)
+    rule_count = registry.matcher.order
+
+    stylesheet.write_text("text { color: dark blue; }")
+    os.utime(stylesheet, ns=(0, 0))
+    registry.load_stylesheet(stylesheet)
+    assert registry.matcher.order < rule_count
+    assert registry.resolve("text")[0].color == "dark blue"
+    # the rules removed from the file no longer apply
+    assert registry.resolve("text", classes="title")[0].color == "dark blue"
+
+    registry.load_stylesheet(stylesheet)
+    assert registry.reload_stylesheets() == 0
+    assert len(registry.rule_sources) == 1
+
+
+def test_resolve_is_memoized_and_invalidated():
+    registry = StyleRegistry()
+    registry.load_stylesheet(STYLES_DIR / "styles.css", {"--my-var": "light gray"})
+
+    first = registry.resolve("button", classes="custom-class custom-class-bg")
+    assert registry.resolve("button", classes="custom-class-bg custom-class") is first
+    assert first[0].color == "light blue"
+    assert first[1] != first[2]
+
+    assert registry.resolve("text", classes="inverted")[0].color == "black"
+    registry.load_stylesheet(STYLES_DIR / "layout2.css")
+    assert registry.resolve("button", classes="custom-class custom-class-bg") == first
+    assert registry.resolve("text", classes="inverted")[0].color == "light red"
+
+
+def test_styles_are_interned():
+    registry = StyleRegistry()
+    registry.load_stylesheet(STYLES_DIR / "styles.css", {"--my-var": "light gray"})
+
+    style, name, _ = registry.resolve("text", classes="custom")
+    same_style, same_name, _ = registry.resolve("edit", classes="custom")
+    assert style is same_style and name == same_name
+
+    unstyled, unstyled_name, _ = registry.resolve("unknown", default=style)
+    assert unstyled is style and unstyled_name == name
+
+    assert (name, *style) in registry.get_palettes()
+    assert len(registry.get_palettes()) == len(set(registry.get_palettes()))
+
+
+def test_palette_registration_and_release():
+    registry = StyleRegistry()
+    registry.load_stylesheet(STYLES_DIR / "styles.css", {"--my-var": "light gray"})
+
+    _, custom, _ = registry.resolve("text", classes="custom")
+    _, dark, _ = registry.resolve("text", classes="dark")
+    registry.acquire("first", custom, dark)
+    registry.acquire("second", dark)
+    assert [entry[0] for entry in registry.pop_new_palettes()] == [custom, dark]
+    assert registry.pop_new_palettes() == []
+
+    registry.release("first")
+    assert custom not in registry.palettes and dark in registry.palettes
+
+    widget = urwid.Text("")
+    _, button, focus = registry.resolve("button")
+    registry.track(widget, button, focus)
+    del widget
+    gc.collect()
+    assert button not in registry.palettes and focus not in registry.palettes
+
+    # dropped styles keep their name, since screens can not unregister entries
+    assert registry.resolve("text", classes="custom")[1] == custom
+    assert custom in registry.palettes
+    assert registry.pop_new_palettes() == []
+
+
+def test_palette_names_are_stable(tmp_path):
+    (tmp_path / "styles.css").write_text(
+        "#root { color: dark blue; } text { color: yellow; }"
+    )
+    (tmp_path / "layout.xml").write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid" mu:id="root">'
+        '<mu:resources><mu:stylesheet path="styles.css" /></mu:resources>'
+        '<text markup="Hello" /></pile>'
+    )
+    context = CompileContext(tmp_path)
+    registry = context.style_registry
+
+    names = set()
+    for _ in range(5):
+        widget, _ = compile_widget(tmp_path / "layout.xml", context)
+        names.update(registry.palettes)
+        # the palette refs of compile_widget are released with the widget
+        del widget
+        gc.collect()
+        assert not registry.palettes
+    assert len(names) == 2
+
+
+def test_restyle_live_widgets(tmp_path):
+    stylesheet = tmp_path / "styles.css"
+    stylesheet.write_text("#title { color: light red; } .row { color: dark blue; }")
+    (tmp_path / "layout.xml").write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        '<mu:resources><mu:stylesheet path="styles.css" /></mu:resources>'
+        '<text mu:id="title" markup="Title" />'
+        '<columns mu:class="row"><text markup="Child" /></columns>'
+        "</pile>"
+    )
+
+    context = CompileContext(tmp_path)
+    widget, _ = compile_widget(tmp_path / "layout.xml", context)
+    registry = context.style_registry
+    title, row = [child for child, _ in widget.base_widget.contents]
+    child = row.base_widget.contents[0][0]
+    row_palette = row.get_attr_map()[None]
+
+    stylesheet.write_text("#title { color: light red; } .row { color: yellow; }")
+    os.utime(stylesheet, ns=(0, 0))
+    assert registry.reload_stylesheets() == 2
+
+    assert row.get_attr_map()[None] != row_palette
+    assert registry.palettes[row.get_attr_map()[None]].color == "yellow"
+    # inherited from the restyled parent
+    assert registry.palettes[child.get_attr_map()[None]].color == "yellow"
+    assert registry.palettes[title.get_attr_map()[None]].color == "light red"
+
+    # only styles the new rules can match are resolved again
+    resolved = []
+    get = registry.get
+
+    def counting_get(element, *args, **kwargs):
+        resolved.append(element.etree_element.get("id"))
+        return get(element, *args, **kwargs)
+
+    registry.get = counting_get
+    (tmp_path / "extra.css").write_text("#title { color: black; }")
+    registry.add_selectors(parse_stylesheet(tmp_path / "extra.css")[0])
+    assert registry.palettes[title.get_attr_map()[None]].color == "black"
+    assert resolved == ["title"]
+
+    # stylesheets of layouts compiled later do not restyle existing widgets
+    (tmp_path / "other.css").write_text(".row { color: light green; }")
+    (tmp_path / "other.xml").write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        '<mu:resources><mu:stylesheet path="other.css" /></mu:resources>'
+        '<text markup="Other" /></pile>'
+    )
+    resolved.clear()
+    compile_widget(tmp_path / "other.xml", context)
+    assert None in resolved and "title" not in resolved
+    assert registry.palettes[row.get_attr_map()[None]].color == "yellow"
+
+
+def test_restyle_releases_old_palette_entries(tmp_path):
+    stylesheet = tmp_path / "styles.css"
+    (tmp_path / "layout.xml").write_text(
+        '<pile xmlns:mu="https://github.com/Jackkillian/modern-urwid">'
+        '<mu:resources><mu:stylesheet path="styles.css" /></mu:resources>'
+        '<text mu:id="title" markup="Title" /></pile>'
+    )
+    stylesheet.write_text("#title { color: light red; }")
+    context = CompileContext(tmp_path)
+    widget, mapped = compile_widget(tmp_path / "layout.xml", context)
+    registry = context.style_registry
+    title = widget.base_widget.contents[0][0]
+
+    names = [title.get_attr_map()[None]]
+    for i, color in enumerate(("yellow", "dark blue")):
+        stylesheet.write_text(f"#title {{ color: {color}; }}")
+        os.utime(stylesheet, ns=(i, i))
+        registry.reload_stylesheets()
+        names.append(title.get_attr_map()[None])
+
+    assert len(set(names)) == 3
+    # the entry of the first restyle is released by the second one
+    assert names[1] not in registry.palette_refs
+    assert names[1] not in [entry[0] for entry in registry.get_palettes()]
+    assert names[2] in registry.palette_refs